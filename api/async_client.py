@@ -0,0 +1,165 @@
+import asyncio
+import json
+import aiohttp
+from api.profiling import SPANS
+from api.tag_parser import ThinkTagParser
+
+class AsyncOllamaClient:
+    def __init__(self, base_url="http://localhost:11434", max_connections=8):
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self._session = None
+
+    def _get_session(self):
+        # Created lazily so the session binds to the loop it is used from
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60)
+            timeout = aiohttp.ClientTimeout(total=None, sock_connect=5, sock_read=30)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def get_models(self):
+        try:
+            async with self._get_session().get(f"{self.base_url}/api/tags",
+                                               timeout=aiohttp.ClientTimeout(total=5)) as response:
+                response.raise_for_status()
+                data = await response.json()
+                return data.get('models', [])
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise Exception(f"Failed to connect to Ollama: {str(e)}") from e
+
+    async def running_models(self):
+        try:
+            async with self._get_session().get(f"{self.base_url}/api/ps",
+                                               timeout=aiohttp.ClientTimeout(total=5)) as response:
+                response.raise_for_status()
+                data = await response.json()
+                return data.get('models', [])
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise Exception(f"Failed to connect to Ollama: {str(e)}") from e
+
+    async def version(self):
+        try:
+            async with self._get_session().get(f"{self.base_url}/api/version",
+                                               timeout=aiohttp.ClientTimeout(total=5)) as response:
+                response.raise_for_status()
+                data = await response.json()
+                return data.get('version', '')
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise Exception(f"Failed to connect to Ollama: {str(e)}") from e
+
+    async def show(self, model):
+        # Model details; "parameters" holds the Modelfile settings (num_ctx among them) and
+        # "model_info" the architecture's limits, e.g. "llama.context_length"
+        try:
+            async with self._get_session().post(f"{self.base_url}/api/show", json={"model": model},
+                                                timeout=aiohttp.ClientTimeout(total=10)) as response:
+                response.raise_for_status()
+                return await response.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise Exception(f"Failed to connect to Ollama: {str(e)}") from e
+
+    async def preload(self, model, keep_alive=None):
+        # An empty message list makes Ollama load (or, with keep_alive=0, unload) the
+        # model without generating anything
+        payload = {
+            "model": model,
+            "messages": [],
+            "stream": False
+        }
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+
+        try:
+            # Loading a large model from disk can take well over the usual read timeout
+            timeout = aiohttp.ClientTimeout(total=None, sock_connect=5, sock_read=300)
+            async with self._get_session().post(f"{self.base_url}/api/chat", json=payload,
+                                                timeout=timeout) as response:
+                response.raise_for_status()
+                return await response.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise Exception(f"Preload request failed: {str(e)}") from e
+
+    async def embed(self, model, inputs):
+        # One request for the whole batch; returns a vector per input, in order
+        try:
+            async with self._get_session().post(f"{self.base_url}/api/embed",
+                                                json={"model": model, "input": list(inputs)}) as response:
+                response.raise_for_status()
+                data = await response.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise Exception(f"Embedding request failed: {str(e)}") from e
+        embeddings = data.get('embeddings', [])
+        if len(embeddings) != len(inputs):
+            raise Exception(f"Embedding request failed: expected {len(inputs)} vectors, got {len(embeddings)}")
+        return embeddings
+
+    async def chat_stream(self, model, messages, metrics=None, keep_alive=None, options=None):
+        payload = {
+            "model": model,
+            "messages": messages,
+            "stream": True
+        }
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        if options:
+            payload["options"] = options
+
+        if metrics is not None:
+            metrics.mark('request_sent')
+
+        try:
+            response = await self._get_session().post(f"{self.base_url}/api/chat", json=payload)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise Exception(f"Chat request failed: {str(e)}") from e
+
+        completed = False
+        try:
+            response.raise_for_status()
+            parser = ThinkTagParser()
+
+            async for line in response.content:
+                line = line.strip()
+                if not line:
+                    continue
+                if metrics is not None:
+                    metrics.mark('first_byte')
+                started = SPANS.start()
+                try:
+                    data = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+                if 'message' in data and 'content' in data['message']:
+                    content = data['message']['content']
+                    if content and metrics is not None:
+                        metrics.on_token()
+                    events = parser.feed(content)
+                    SPANS.end('stream.parse', started)
+                    for event in events:
+                        yield event
+
+                if data.get('done', False):
+                    if metrics is not None:
+                        metrics.record_server(data)
+                    break
+
+            # Drain the chunked terminator so the keep-alive connection returns to the pool
+            await response.content.read()
+            completed = True
+
+            for event in parser.flush():
+                yield event
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise Exception(f"Chat request failed: {str(e)}") from e
+        finally:
+            # Dropping the connection mid-stream is what tells Ollama to stop generating
+            if completed:
+                response.release()
+            else:
+                response.close()
@@ -0,0 +1,124 @@
+import asyncio
+import time
+from storage.response_cache import cache_key
+
+REPLAY_INSTANT = 'instant'
+REPLAY_PACED = 'paced'
+# How long a model digest read from /api/tags is trusted before it is read again
+DIGEST_TTL = 5.0
+
+def _replay_gap(events, duration, replay):
+    if replay != REPLAY_PACED or len(events) < 2:
+        return 0
+    return duration / len(events)
+
+def _tagged(model):
+    # Ollama reads an untagged name as name:latest; /api/tags only lists the tagged one
+    return model if ":" in model.rsplit("/", 1)[-1] else f"{model}:latest"
+
+def _mark_replay(metrics):
+    if metrics is not None:
+        metrics.cache_hit = True
+        metrics.mark('request_sent')
+        metrics.mark('first_byte')
+
+# Opt-in cache in front of OllamaClient.chat_stream. Requests are keyed on the model's
+# digest from /api/tags, so re-pulling a model under the same name never replays the old
+# model's answers; if the digest can't be looked up the request goes straight through.
+# Digests are re-read once they are DIGEST_TTL seconds old, so an `ollama pull` during the
+# session stops old answers from matching within that time.
+# Hits replay the stored events instantly or paced at the original generation speed.
+class CachedOllamaClient:
+    def __init__(self, client, cache, replay=REPLAY_INSTANT):
+        self.client = client
+        self.cache = cache
+        self.replay = replay
+        self._digests = {}
+        self._digests_read = 0.0
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def _digest(self, model):
+        model = _tagged(model)
+        if model not in self._digests or time.monotonic() - self._digests_read > DIGEST_TTL:
+            try:
+                models = self.client.get_models()
+            except Exception:
+                return None
+            self._digests = {_tagged(m['name']): m.get('digest') for m in models}
+            self._digests_read = time.monotonic()
+        return self._digests.get(model)
+
+    def chat_stream(self, model, messages, metrics=None, keep_alive=None, options=None):
+        digest = self._digest(model)
+        key = cache_key(_tagged(model), digest, options, messages) if digest else None
+        cached = self.cache.get(key) if key else None
+        if cached is not None:
+            events, duration = cached
+            _mark_replay(metrics)
+            gap = _replay_gap(events, duration, self.replay)
+            for event in events:
+                if gap:
+                    time.sleep(gap)
+                if metrics is not None:
+                    metrics.on_token()
+                yield event
+            return
+
+        events = []
+        started = time.perf_counter()
+        for event in self.client.chat_stream(model, messages, metrics, keep_alive, options):
+            events.append(event)
+            yield event
+        # Only reached when the stream ran to completion; stopped or failed ones aren't kept
+        if key:
+            self.cache.put(key, model, events, time.perf_counter() - started)
+
+class AsyncCachedOllamaClient:
+    def __init__(self, client, cache, replay=REPLAY_INSTANT):
+        self.client = client
+        self.cache = cache
+        self.replay = replay
+        self._digests = {}
+        self._digests_read = 0.0
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    async def _digest(self, model):
+        model = _tagged(model)
+        if model not in self._digests or time.monotonic() - self._digests_read > DIGEST_TTL:
+            try:
+                models = await self.client.get_models()
+            except Exception:
+                return None
+            self._digests = {_tagged(m['name']): m.get('digest') for m in models}
+            self._digests_read = time.monotonic()
+        return self._digests.get(model)
+
+    async def chat_stream(self, model, messages, metrics=None, keep_alive=None, options=None):
+        # SQLite lookups and writes go to the executor so they never stall the event loop
+        loop = asyncio.get_running_loop()
+        digest = await self._digest(model)
+        key = cache_key(_tagged(model), digest, options, messages) if digest else None
+        cached = await loop.run_in_executor(None, self.cache.get, key) if key else None
+        if cached is not None:
+            events, duration = cached
+            _mark_replay(metrics)
+            gap = _replay_gap(events, duration, self.replay)
+            for event in events:
+                if gap:
+                    await asyncio.sleep(gap)
+                if metrics is not None:
+                    metrics.on_token()
+                yield event
+            return
+
+        events = []
+        started = time.perf_counter()
+        async for event in self.client.chat_stream(model, messages, metrics, keep_alive, options):
+            events.append(event)
+            yield event
+        if key:
+            await loop.run_in_executor(None, self.cache.put, key, model, events, time.perf_counter() - started)
@@ -0,0 +1,162 @@
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+SUMMARY_TOKENS = 256
+# Ollama's num_ctx when neither the request nor the Modelfile sets one (OLLAMA_CONTEXT_LENGTH)
+OLLAMA_DEFAULT_CONTEXT = 4096
+# When the window overflows it slides far enough to leave this share of the budget free, so
+# the next several turns send a byte-identical prefix and Ollama can reuse its KV cache
+WINDOW_REFILL = 0.6
+
+SUMMARY_PROMPT = (
+    "Summarize the conversation below in a few short paragraphs. Keep names, facts, "
+    "decisions and open questions. Reply with the summary only."
+)
+
+def estimate_tokens(text):
+    return MESSAGE_OVERHEAD_TOKENS + (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def estimate_messages_tokens(messages):
+    return sum(estimate_tokens(message['content']) for message in messages)
+
+def summary_request(previous_summary, messages):
+    # Messages asking a model to fold messages into previous_summary
+    transcript = "\n\n".join(f"{m['role'].upper()}: {m['content']}" for m in messages)
+    if previous_summary:
+        transcript = f"EARLIER SUMMARY: {previous_summary}\n\n{transcript}"
+    return [
+        {"role": "system", "content": SUMMARY_PROMPT},
+        {"role": "user", "content": transcript}
+    ]
+
+def make_async_summarizer(client, model, keep_alive=None):
+    async def summarize(previous_summary, messages):
+        parts = []
+        async for content_type, text in client.chat_stream(model, summary_request(previous_summary, messages),
+                                                           None, keep_alive):
+            if content_type == 'message':
+                parts.append(text)
+        return "".join(parts).strip()
+    return summarize
+
+def context_window(show, options=None, default=OLLAMA_DEFAULT_CONTEXT):
+    # Tokens Ollama keeps for a model, from its /api/show answer: num_ctx from the request
+    # options, else from the Modelfile parameters, else the server default; never more than
+    # the model's trained context length
+    num_ctx = (options or {}).get('num_ctx')
+    if num_ctx is None:
+        for line in (show.get('parameters') or "").splitlines():
+            parts = line.split()
+            if len(parts) == 2 and parts[0] == 'num_ctx' and parts[1].isdigit():
+                num_ctx = int(parts[1])
+    if num_ctx is None:
+        num_ctx = default
+    trained = next((value for key, value in (show.get('model_info') or {}).items()
+                    if key.endswith('.context_length') and isinstance(value, int)), None)
+    return min(num_ctx, trained) if trained else num_ctx
+
+# Canonical chat history plus the context-window policy applied when sending it.
+# strategy is 'truncate' (sliding window) or 'summarize' (older turns folded into a summary).
+# Callers check summary_due() before sending and hand the summary they get to set_summary();
+# one saved by the background jobs is set the same way. Either is sent in place of the turns
+# it covers.
+# History is append-only and the window start only moves when it has to, so consecutive
+# requests share the longest possible prefix.
+class ConversationManager:
+    def __init__(self, system_prompt=None, context_budgets=None, default_budget=4096,
+                 reserve_tokens=1024, keep_recent=4, strategy='truncate'):
+        self.system_prompt = system_prompt
+        self.context_budgets = dict(context_budgets or {})
+        self.default_budget = default_budget
+        self.reserve_tokens = reserve_tokens
+        self.keep_recent = keep_recent
+        self.strategy = strategy
+        self.clear()
+
+    def clear(self):
+        self.messages = []
+        self.token_counts = []
+        self.total_tokens = 0
+        self.summary = ""
+        self.summarized_upto = 0
+        self.window_start = 0
+        self.window_dropped_tokens = 0
+
+    def add_message(self, role, content):
+        self.messages.append({"role": role, "content": content})
+        tokens = estimate_tokens(content)
+        self.token_counts.append(tokens)
+        self.total_tokens += tokens
+
+    def budget_for(self, model, window=None):
+        # A budget configured for the model (or its family) wins over the context window
+        # Ollama reports for it; default_budget is the fallback for neither
+        budget = self.context_budgets.get(model)
+        if budget is None:
+            budget = self.context_budgets.get(model.split(':')[0])
+        if budget is None:
+            budget = window or self.default_budget
+        return max(0, budget - self.reserve_tokens)
+
+    def _available(self, model, window, extra_tokens):
+        available = self.budget_for(model, window) - extra_tokens
+        if self.system_prompt:
+            available -= estimate_tokens(self.system_prompt)
+        if (self.summary or self.strategy == 'summarize') and self.total_tokens > available:
+            available -= estimate_tokens(self.summary) if self.summary else SUMMARY_TOKENS
+        return available
+
+    def set_summary(self, summary, summarized_upto):
+        self.summary = summary
+        self.summarized_upto = summarized_upto
+
+    def summary_due(self, model, window=None, extra_tokens=0):
+        # (previous summary, messages, upto) when turns have fallen out of the window that
+        # the summary doesn't cover yet; only those get summarized. None otherwise.
+        if self.strategy != 'summarize':
+            return None
+        start = self._window_start(self._available(model, window, extra_tokens))
+        if start <= self.summarized_upto:
+            return None
+        return self.summary, self.messages[self.summarized_upto:start], start
+
+    def build_messages(self, model, window=None, extra_tokens=0):
+        # extra_tokens is context sent along with the history, such as retrieved excerpts
+        prefix = []
+        if self.system_prompt:
+            prefix.append({"role": "system", "content": self.system_prompt})
+
+        start = self._window_start(self._available(model, window, extra_tokens))
+
+        if self.summary and start > 0:
+            prefix.append({"role": "system",
+                           "content": f"Summary of the earlier conversation:\n{self.summary}"})
+            # The summary may reach past the window start (a larger budget, another model, a
+            # stored summary); the turns it covers aren't sent a second time
+            start = max(start, self.summarized_upto)
+
+        return prefix + self.messages[start:]
+
+    def _window_start(self, available):
+        count = len(self.messages)
+        if self.total_tokens <= available:
+            return 0
+        # Keep the previous window while it still fits
+        if self.window_start < count and self.total_tokens - self.window_dropped_tokens <= available:
+            return self.window_start
+
+        target = int(available * WINDOW_REFILL)
+        used = 0
+        start = count
+        while start > 0:
+            tokens = self.token_counts[start - 1]
+            if count - start >= self.keep_recent and used + tokens > target:
+                break
+            used += tokens
+            start -= 1
+
+        # Never open the window on a dangling assistant reply
+        while start < count - 1 and self.messages[start]['role'] != 'user':
+            start += 1
+        self.window_start = start
+        self.window_dropped_tokens = sum(self.token_counts[:start])
+        return start
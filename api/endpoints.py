@@ -0,0 +1,211 @@
+import random
+import threading
+import time
+
+BREAKER_CLOSED = 'closed'
+BREAKER_OPEN = 'open'
+BREAKER_HALF_OPEN = 'half_open'
+
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_RESET_SECONDS = 30
+DEFAULT_HEALTH_SECONDS = 30
+DEFAULT_RETRIES = 2
+BACKOFF_BASE_SECONDS = 0.25
+BACKOFF_MAX_SECONDS = 4
+
+def parse_endpoints(value):
+    # "--url http://a:11434,http://b:11434" or a list from settings.json
+    if isinstance(value, str):
+        value = value.split(",")
+    return [url.strip().rstrip("/") for url in value if url and url.strip()]
+
+def backoff_delay(attempt, base=BACKOFF_BASE_SECONDS, cap=BACKOFF_MAX_SECONDS):
+    # Full jitter, so clients that failed together don't all come back at the same moment
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+def is_client_error(error):
+    # Ollama refused the request itself (unknown model, bad request): every host would refuse
+    # it the same way and it says nothing about this one's health. Timeouts (408) and rate
+    # limits (429) are the host's doing. The clients keep the HTTP error as the cause.
+    while error is not None:
+        status = getattr(error, 'status', None)
+        if status is None:
+            status = getattr(getattr(error, 'response', None), 'status_code', None)
+        if isinstance(status, int):
+            return 400 <= status < 500 and status not in (408, 429)
+        error = error.__cause__
+    return False
+
+# Per-endpoint breaker. After failure_threshold consecutive failures it opens and the endpoint
+# gets no traffic for reset_seconds; then a single trial request is let through (half open),
+# which either closes the breaker again or re-opens it for another reset_seconds.
+class CircuitBreaker:
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD, reset_seconds=DEFAULT_RESET_SECONDS):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+        self.opened_at = 0
+        self._trial = False
+
+    def available(self, now=None):
+        if self.state == BREAKER_CLOSED:
+            return True
+        if self.state == BREAKER_HALF_OPEN:
+            return not self._trial
+        now = time.monotonic() if now is None else now
+        return now - self.opened_at >= self.reset_seconds
+
+    def acquire(self):
+        if self.state == BREAKER_OPEN:
+            self.state = BREAKER_HALF_OPEN
+        if self.state == BREAKER_HALF_OPEN:
+            self._trial = True
+
+    def release(self):
+        # The attempt ended without a verdict (e.g. the user stopped it)
+        self._trial = False
+
+    def record_success(self):
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+        self._trial = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial = False
+        if self.state == BREAKER_HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = BREAKER_OPEN
+            self.opened_at = time.monotonic()
+
+class Endpoint:
+    def __init__(self, url, breaker):
+        self.url = url
+        self.breaker = breaker
+        # None until the first health check
+        self.healthy = None
+        self.version = None
+        self.models = {}
+        self.resident = set()
+        self.latency_ms = None
+        self.error = None
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+
+    def to_dict(self):
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "version": self.version,
+            "breaker": self.breaker.state,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "failures": self.failures,
+            "latency_ms": self.latency_ms,
+            "resident": sorted(self.resident),
+            "error": self.error
+        }
+
+# Routing state shared by every client talking to the same set of Ollama hosts (one per
+# batch thread, or the GUI's async client). Requests go to the least-loaded endpoint that
+# already has the model resident, then the least-loaded one that has it installed; hosts
+# that failed their last health check or whose breaker is open are skipped. Load is the
+# number of our own requests in flight there. Thread-safe.
+class EndpointPool:
+    def __init__(self, urls, failure_threshold=DEFAULT_FAILURE_THRESHOLD, reset_seconds=DEFAULT_RESET_SECONDS,
+                 health_seconds=DEFAULT_HEALTH_SECONDS):
+        urls = parse_endpoints(urls)
+        if not urls:
+            raise Exception("No Ollama endpoints configured")
+        self.endpoints = [Endpoint(url, CircuitBreaker(failure_threshold, reset_seconds)) for url in urls]
+        self.health_seconds = health_seconds
+        self.retries = 0
+        self._checked_at = float('-inf')
+        self._lock = threading.Lock()
+
+    def claim_health_check(self, force=False):
+        # True for the one caller that should run the (stale) health check now
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._checked_at < self.health_seconds:
+                return False
+            self._checked_at = now
+            return True
+
+    def record_health(self, endpoint, version, models, running, latency_ms):
+        with self._lock:
+            endpoint.healthy = True
+            endpoint.error = None
+            endpoint.version = version
+            endpoint.models = {model['name']: model for model in models}
+            endpoint.resident = {model.get('name', '') for model in running}
+            endpoint.latency_ms = latency_ms
+            if endpoint.breaker.state != BREAKER_CLOSED and endpoint.breaker.available():
+                # A passing check counts as the half-open trial
+                endpoint.breaker.record_success()
+
+    def record_health_failure(self, endpoint, error):
+        with self._lock:
+            endpoint.healthy = False
+            endpoint.error = error
+            endpoint.resident = set()
+            endpoint.breaker.record_failure()
+
+    def acquire(self, model=None, exclude=()):
+        with self._lock:
+            now = time.monotonic()
+            usable = [e for e in self.endpoints if e not in exclude and e.breaker.available(now)]
+            candidates = [e for e in usable if e.healthy is not False] or usable
+            if not candidates:
+                return None
+            if model:
+                candidates = [e for e in candidates if model in e.models] or candidates
+            endpoint = min(candidates, key=lambda e: (model not in e.resident, e.in_flight,
+                                                      e.latency_ms if e.latency_ms is not None else 0))
+            endpoint.breaker.acquire()
+            endpoint.in_flight += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def release(self, endpoint, model=None, ok=None, error=None):
+        with self._lock:
+            endpoint.in_flight -= 1
+            if ok:
+                endpoint.breaker.record_success()
+                endpoint.healthy = True
+                if model:
+                    # Serving it loaded it there; keep routing this model to the same host
+                    endpoint.resident.add(model)
+            elif ok is None:
+                endpoint.breaker.release()
+            else:
+                endpoint.failures += 1
+                endpoint.error = error
+                endpoint.breaker.record_failure()
+
+    def forget(self, endpoint, model):
+        with self._lock:
+            endpoint.resident.discard(model)
+
+    def note_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def models(self):
+        # Every model any reachable host has, first host's entry winning
+        merged = {}
+        with self._lock:
+            for endpoint in self.endpoints:
+                if endpoint.healthy:
+                    for name, model in endpoint.models.items():
+                        merged.setdefault(name, model)
+        return list(merged.values())
+
+    def reachable(self):
+        with self._lock:
+            return [e for e in self.endpoints if e.healthy and e.breaker.available()]
+
+    def status(self):
+        with self._lock:
+            return [endpoint.to_dict() for endpoint in self.endpoints]
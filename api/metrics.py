@@ -0,0 +1,166 @@
+import json
+import time
+
+OLLAMA_TIMING_FIELDS = (
+    'total_duration', 'load_duration', 'prompt_eval_count',
+    'prompt_eval_duration', 'eval_count', 'eval_duration'
+)
+
+NANOSECONDS = 1e9
+
+# Timings for one response. Client-side stamps are time.perf_counter() seconds;
+# server fields are copied verbatim from Ollama's final NDJSON object (durations in ns).
+class ResponseMetrics:
+    def __init__(self, model=""):
+        self.model = model
+        self.created_at = time.time()
+        self.request_sent = None
+        self.first_byte = None
+        self.first_token = None
+        self.first_visible = None
+        self.last_token = None
+        self.render_done = None
+        self.chunk_count = 0
+        self.prompt_tokens_estimated = None
+        self.cache_hit = False
+        self.server = {}
+
+    def mark(self, name):
+        if getattr(self, name) is None:
+            setattr(self, name, time.perf_counter())
+
+    def on_token(self):
+        now = time.perf_counter()
+        if self.first_token is None:
+            self.first_token = now
+        self.last_token = now
+        self.chunk_count += 1
+
+    def record_server(self, data):
+        for field in OLLAMA_TIMING_FIELDS:
+            if field in data:
+                self.server[field] = data[field]
+
+    def _since_sent(self, stamp):
+        if stamp is None or self.request_sent is None:
+            return None
+        return stamp - self.request_sent
+
+    def to_dict(self):
+        def ms(value):
+            return round(value * 1000, 3) if value is not None else None
+
+        record = {
+            "model": self.model,
+            "created_at": self.created_at,
+            "first_byte_ms": ms(self._since_sent(self.first_byte)),
+            "ttft_ms": ms(self._since_sent(self.first_token)),
+            "first_visible_ms": ms(self._since_sent(self.first_visible)),
+            "last_token_ms": ms(self._since_sent(self.last_token)),
+            "render_ms": ms(self.render_done - self.last_token
+                            if self.render_done is not None and self.last_token is not None else None),
+            "chunk_count": self.chunk_count,
+        }
+        record.update(self.server)
+        if self.cache_hit:
+            record["cache_hit"] = True
+        if self.prompt_tokens_estimated is not None:
+            record["prompt_tokens_estimated"] = self.prompt_tokens_estimated
+            # Ollama only counts the tokens it had to evaluate; the rest came from its cache
+            if 'prompt_eval_count' in self.server:
+                record["prompt_tokens_reused"] = max(0, self.prompt_tokens_estimated
+                                                     - self.server['prompt_eval_count'])
+        return record
+
+def eval_rate(record, count_field='eval_count', duration_field='eval_duration'):
+    count = record.get(count_field)
+    duration = record.get(duration_field)
+    if not count or not duration:
+        return None
+    return count / (duration / NANOSECONDS)
+
+def format_summary(record):
+    parts = []
+    if record.get('cache_hit'):
+        parts.append("CACHED")
+    if record.get('load_duration'):
+        parts.append(f"LOAD {record['load_duration'] / NANOSECONDS:.2f}s")
+    prompt_rate = eval_rate(record, 'prompt_eval_count', 'prompt_eval_duration')
+    if record.get('prompt_eval_count') is not None:
+        rate = f" @ {prompt_rate:.0f} tok/s" if prompt_rate else ""
+        reused = f", ~{record['prompt_tokens_reused']} cached" if record.get('prompt_tokens_reused') else ""
+        parts.append(f"PROMPT {record['prompt_eval_count']} tok{rate}{reused}")
+    gen_rate = eval_rate(record)
+    if record.get('eval_count') is not None:
+        rate = f" @ {gen_rate:.1f} tok/s" if gen_rate else ""
+        parts.append(f"GEN {record['eval_count']} tok{rate}")
+    if record.get('ttft_ms') is not None:
+        parts.append(f"TTFT {record['ttft_ms']:.0f} ms")
+    if record.get('render_ms') is not None:
+        parts.append(f"UI {record['render_ms']:.1f} ms")
+    return " | ".join(parts)
+
+def write_jsonl(records, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record))
+            f.write("\n")
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def prometheus_text(records):
+    totals = {}
+    for record in records:
+        model = totals.setdefault(record.get('model', ''), {
+            'responses': 0, 'cache_hits': 0, 'load_seconds': 0.0, 'prompt_tokens': 0, 'prompt_seconds': 0.0,
+            'prompt_reused': 0, 'eval_tokens': 0, 'eval_seconds': 0.0, 'ttft_sum': 0.0, 'ttft_count': 0,
+            'render_sum': 0.0, 'render_count': 0
+        })
+        model['responses'] += 1
+        model['cache_hits'] += 1 if record.get('cache_hit') else 0
+        model['load_seconds'] += record.get('load_duration', 0) / NANOSECONDS
+        model['prompt_tokens'] += record.get('prompt_eval_count', 0)
+        model['prompt_seconds'] += record.get('prompt_eval_duration', 0) / NANOSECONDS
+        model['prompt_reused'] += record.get('prompt_tokens_reused', 0)
+        model['eval_tokens'] += record.get('eval_count', 0)
+        model['eval_seconds'] += record.get('eval_duration', 0) / NANOSECONDS
+        if record.get('ttft_ms') is not None:
+            model['ttft_sum'] += record['ttft_ms'] / 1000
+            model['ttft_count'] += 1
+        if record.get('render_ms') is not None:
+            model['render_sum'] += record['render_ms'] / 1000
+            model['render_count'] += 1
+
+    series = (
+        ('jgxaai_responses_total', 'counter', 'Completed responses.', 'responses'),
+        ('jgxaai_cache_hits_total', 'counter', 'Responses replayed from the response cache.', 'cache_hits'),
+        ('jgxaai_load_seconds_total', 'counter', 'Time Ollama spent loading the model.', 'load_seconds'),
+        ('jgxaai_prompt_tokens_total', 'counter', 'Prompt tokens evaluated by Ollama.', 'prompt_tokens'),
+        ('jgxaai_prompt_eval_seconds_total', 'counter', 'Time spent evaluating prompts.', 'prompt_seconds'),
+        ('jgxaai_prompt_tokens_reused_total', 'counter',
+         'Estimated prompt tokens served from the KV cache.', 'prompt_reused'),
+        ('jgxaai_eval_tokens_total', 'counter', 'Tokens generated.', 'eval_tokens'),
+        ('jgxaai_eval_seconds_total', 'counter', 'Time spent generating tokens.', 'eval_seconds'),
+    )
+    lines = []
+    for name, kind, help_text, key in series:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for model, values in sorted(totals.items()):
+            lines.append(f'{name}{{model="{_label(model)}"}} {values[key]}')
+
+    for name, help_text, prefix in (
+        ('jgxaai_ttft_seconds', 'Client-side time from request sent to first token.', 'ttft'),
+        ('jgxaai_render_seconds', 'UI time from last token to the reply being rendered.', 'render'),
+    ):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} summary")
+        for model, values in sorted(totals.items()):
+            lines.append(f'{name}_sum{{model="{_label(model)}"}} {values[prefix + "_sum"]}')
+            lines.append(f'{name}_count{{model="{_label(model)}"}} {values[prefix + "_count"]}')
+    return "\n".join(lines) + "\n"
+
+def write_prometheus(records, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(prometheus_text(records))
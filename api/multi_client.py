@@ -0,0 +1,215 @@
+import asyncio
+import time
+from api.endpoints import DEFAULT_RETRIES, backoff_delay, is_client_error
+from api.ollama_client import OllamaClient
+
+HEALTH_TIMEOUT_SECONDS = 3
+
+def _running(pool):
+    names = set()
+    for endpoint in pool.reachable():
+        names |= endpoint.resident
+    return [{"name": name, "model": name} for name in sorted(names)]
+
+async def _once(request):
+    # A single request as a one-item stream, so it can be routed like a chat
+    yield await request
+
+async def _last(events):
+    result = None
+    async for result in events:
+        pass
+    return result
+
+def _unreachable(pool):
+    errors = "; ".join(f"{e['url']}: {e['error']}" for e in pool.status() if e['error'])
+    return Exception(f"Failed to connect to Ollama: no endpoint reachable ({errors or 'no response'})")
+
+# OllamaClient over several Ollama hosts sharing an EndpointPool. Health (/api/version,
+# /api/tags, /api/ps) is re-checked at most every pool.health_seconds. A request that fails
+# is retried on another endpoint after a jittered backoff, but only until the first event
+# has been yielded: after that a retry would repeat output the caller already has, so the
+# error goes through. A request Ollama refuses (4xx) isn't retried and doesn't count
+# against the host's breaker.
+class MultiOllamaClient:
+    def __init__(self, pool, retries=DEFAULT_RETRIES, timeout=30):
+        self.pool = pool
+        self.retries = retries
+        self.clients = {endpoint.url: OllamaClient(endpoint.url, timeout) for endpoint in pool.endpoints}
+
+    @property
+    def base_url(self):
+        return ",".join(self.clients)
+
+    def check_health(self, force=False):
+        if not self.pool.claim_health_check(force):
+            return
+        for endpoint in self.pool.endpoints:
+            client = self.clients[endpoint.url]
+            started = time.perf_counter()
+            try:
+                version = client.version()
+                models = client.get_models()
+                running = client.running_models()
+            except Exception as e:
+                self.pool.record_health_failure(endpoint, str(e))
+                continue
+            self.pool.record_health(endpoint, version, models, running, (time.perf_counter() - started) * 1000)
+
+    def get_models(self):
+        self.check_health(force=True)
+        if not self.pool.reachable():
+            raise _unreachable(self.pool)
+        return self.pool.models()
+
+    def running_models(self):
+        self.check_health(force=True)
+        return _running(self.pool)
+
+    def _route(self, model, request, failure):
+        # request(client) streams from one endpoint; see the class comment for the retries
+        tried = []
+        last_error = None
+        for attempt in range(self.retries + 1):
+            endpoint = self.pool.acquire(model, tried) or self.pool.acquire(model)
+            if endpoint is None:
+                break
+            tried.append(endpoint)
+            started = False
+            ok, error = None, None
+            try:
+                for event in request(self.clients[endpoint.url]):
+                    started = True
+                    yield event
+                ok = True
+                return
+            except Exception as e:
+                if is_client_error(e):
+                    raise
+                ok, error, last_error = False, str(e), e
+                if started:
+                    raise
+            finally:
+                self.pool.release(endpoint, model, ok, error)
+            if attempt < self.retries:
+                self.pool.note_retry()
+                time.sleep(backoff_delay(attempt))
+        raise last_error or Exception(f"{failure}: no Ollama endpoint available")
+
+    def chat_stream(self, model, messages, metrics=None, keep_alive=None, options=None):
+        self.check_health()
+        yield from self._route(
+            model, lambda client: client.chat_stream(model, messages, metrics, keep_alive, options),
+            "Chat request failed")
+
+class AsyncMultiOllamaClient:
+    def __init__(self, pool, retries=DEFAULT_RETRIES, max_connections=8):
+        from api.async_client import AsyncOllamaClient
+        self.pool = pool
+        self.retries = retries
+        self.clients = {endpoint.url: AsyncOllamaClient(endpoint.url, max_connections)
+                        for endpoint in pool.endpoints}
+
+    @property
+    def base_url(self):
+        return ",".join(self.clients)
+
+    async def close(self):
+        await asyncio.gather(*(client.close() for client in self.clients.values()))
+
+    async def check_health(self, force=False):
+        if self.pool.claim_health_check(force):
+            await asyncio.gather(*(self._check(endpoint) for endpoint in self.pool.endpoints))
+
+    async def _probe(self, client):
+        return await client.version(), await client.get_models(), await client.running_models()
+
+    async def _check(self, endpoint):
+        client = self.clients[endpoint.url]
+        started = time.perf_counter()
+        try:
+            version, models, running = await asyncio.wait_for(self._probe(client), HEALTH_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            self.pool.record_health_failure(endpoint, f"no answer in {HEALTH_TIMEOUT_SECONDS}s")
+            return
+        except Exception as e:
+            self.pool.record_health_failure(endpoint, str(e))
+            return
+        self.pool.record_health(endpoint, version, models, running, (time.perf_counter() - started) * 1000)
+
+    async def get_models(self):
+        await self.check_health(force=True)
+        if not self.pool.reachable():
+            raise _unreachable(self.pool)
+        return self.pool.models()
+
+    async def running_models(self):
+        await self.check_health(force=True)
+        return _running(self.pool)
+
+    async def show(self, model):
+        # Any endpoint serving the model can describe it
+        await self.check_health()
+        last_error = None
+        for endpoint in sorted(self.pool.reachable(), key=lambda e: model not in e.models):
+            try:
+                return await self.clients[endpoint.url].show(model)
+            except Exception as e:
+                last_error = e
+        raise last_error or _unreachable(self.pool)
+
+    async def _route(self, model, request, failure):
+        # As MultiOllamaClient._route, with request(client) an async iterator
+        tried = []
+        last_error = None
+        for attempt in range(self.retries + 1):
+            endpoint = self.pool.acquire(model, tried) or self.pool.acquire(model)
+            if endpoint is None:
+                break
+            tried.append(endpoint)
+            started = False
+            ok, error = None, None
+            try:
+                async for event in request(self.clients[endpoint.url]):
+                    started = True
+                    yield event
+                ok = True
+                return
+            except Exception as e:
+                if is_client_error(e):
+                    raise
+                ok, error, last_error = False, str(e), e
+                if started:
+                    raise
+            finally:
+                self.pool.release(endpoint, model, ok, error)
+            if attempt < self.retries:
+                self.pool.note_retry()
+                await asyncio.sleep(backoff_delay(attempt))
+        raise last_error or Exception(f"{failure}: no Ollama endpoint available")
+
+    async def preload(self, model, keep_alive=None):
+        await self.check_health()
+        if keep_alive == 0:
+            # Unload wherever it is resident, not just where the next request would go
+            targets = [e for e in self.pool.reachable() if model in e.resident]
+            results = await asyncio.gather(*(self.clients[e.url].preload(model, 0) for e in targets),
+                                           return_exceptions=True)
+            for endpoint in targets:
+                self.pool.forget(endpoint, model)
+            return next((result for result in results if not isinstance(result, BaseException)), {})
+
+        return await _last(self._route(model, lambda client: _once(client.preload(model, keep_alive)),
+                                       "Preload request failed"))
+
+    async def embed(self, model, inputs):
+        await self.check_health()
+        return await _last(self._route(model, lambda client: _once(client.embed(model, inputs)),
+                                       "Embedding request failed"))
+
+    async def chat_stream(self, model, messages, metrics=None, keep_alive=None, options=None):
+        await self.check_health()
+        async for event in self._route(
+                model, lambda client: client.chat_stream(model, messages, metrics, keep_alive, options),
+                "Chat request failed"):
+            yield event
@@ -1,9 +1,11 @@
 import requests
 import json
+from api.tag_parser import ThinkTagParser
 
 class OllamaClient:
-    def __init__(self, base_url="http://localhost:11434"):
+    def __init__(self, base_url="http://localhost:11434", timeout=30):
         self.base_url = base_url
+        self.timeout = timeout
         self.session = requests.Session()
     
     def get_models(self):
@@ -13,107 +15,72 @@ class OllamaClient:
             data = response.json()
             return data.get('models', [])
         except requests.exceptions.RequestException as e:
-            raise Exception(f"Failed to connect to Ollama: {str(e)}")
+            raise Exception(f"Failed to connect to Ollama: {str(e)}") from e
     
-    def chat_stream(self, model, messages):
+    def running_models(self):
+        try:
+            response = self.session.get(f"{self.base_url}/api/ps", timeout=5)
+            response.raise_for_status()
+            return response.json().get('models', [])
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Failed to connect to Ollama: {str(e)}") from e
+    
+    def version(self):
+        try:
+            response = self.session.get(f"{self.base_url}/api/version", timeout=5)
+            response.raise_for_status()
+            return response.json().get('version', '')
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Failed to connect to Ollama: {str(e)}") from e
+    
+    def chat_stream(self, model, messages, metrics=None, keep_alive=None, options=None):
         payload = {
             "model": model,
             "messages": messages,
             "stream": True
         }
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        if options:
+            payload["options"] = options
+        
+        if metrics is not None:
+            metrics.mark('request_sent')
         
         try:
             response = self.session.post(
                 f"{self.base_url}/api/chat",
                 json=payload,
                 stream=True,
-                timeout=30
+                timeout=self.timeout
             )
             response.raise_for_status()
             
-            assistant_message = ""
-            thinking_content = ""
-            in_thinking = False
+            parser = ThinkTagParser()
             
             for line in response.iter_lines():
                 if line:
+                    if metrics is not None:
+                        metrics.mark('first_byte')
                     try:
                         data = json.loads(line.decode('utf-8'))
                         if 'message' in data and 'content' in data['message']:
                             content = data['message']['content']
-                            assistant_message += content
-                            
+                            if content and metrics is not None:
+                                metrics.on_token()
                             # Parse thinking tags (both <thinking> and <think>)
-                            remaining_content = content
-                            while remaining_content:
-                                thinking_start = None
-                                thinking_end = None
-                                thinking_tag = None
-                                
-                                # Check for both <thinking> and <think> tags
-                                if not in_thinking:
-                                    if '<thinking>' in remaining_content:
-                                        thinking_start = remaining_content.find('<thinking>')
-                                        thinking_tag = 'thinking'
-                                    if '<think>' in remaining_content:
-                                        think_start = remaining_content.find('<think>')
-                                        if thinking_start is None or think_start < thinking_start:
-                                            thinking_start = think_start
-                                            thinking_tag = 'think'
-                                
-                                if in_thinking:
-                                    if '</thinking>' in remaining_content:
-                                        thinking_end = remaining_content.find('</thinking>')
-                                        thinking_tag = 'thinking'
-                                    if '</think>' in remaining_content:
-                                        think_end = remaining_content.find('</think>')
-                                        if thinking_end is None or think_end < thinking_end:
-                                            thinking_end = think_end
-                                            thinking_tag = 'think'
-                                
-                                if not in_thinking and thinking_start is not None:
-                                    # Start of thinking section
-                                    before_thinking = remaining_content[:thinking_start]
-                                    if before_thinking:
-                                        yield ('message', before_thinking)
-                                    
-                                    tag_length = len(f'<{thinking_tag}>')
-                                    remaining_content = remaining_content[thinking_start + tag_length:]
-                                    in_thinking = True
-                                    
-                                elif in_thinking and thinking_end is not None:
-                                    # End of thinking section
-                                    thinking_part = remaining_content[:thinking_end]
-                                    thinking_content += thinking_part
-                                    yield ('thinking', thinking_content)
-                                    
-                                    tag_length = len(f'</{thinking_tag}>')
-                                    remaining_content = remaining_content[thinking_end + tag_length:]
-                                    in_thinking = False
-                                    thinking_content = ""
-                                    
-                                elif in_thinking:
-                                    # Inside thinking section
-                                    thinking_content += remaining_content
-                                    remaining_content = ""
-                                    
-                                else:
-                                    # Regular message content
-                                    yield ('message', remaining_content)
-                                    remaining_content = ""
+                            for event in parser.feed(content):
+                                yield event
                         
                         if data.get('done', False):
+                            if metrics is not None:
+                                metrics.record_server(data)
                             break
                     except json.JSONDecodeError:
                         continue
             
-            if assistant_message:
-                # Clean the message of thinking tags before storing
-                clean_message = assistant_message
-                import re
-                clean_message = re.sub(r'<thinking>.*?</thinking>', '', clean_message, flags=re.DOTALL)
-                clean_message = re.sub(r'<think>.*?</think>', '', clean_message, flags=re.DOTALL)
-                messages.append({"role": "assistant", "content": clean_message})
+            for event in parser.flush():
+                yield event
                 
         except requests.exceptions.RequestException as e:
-            raise Exception(f"Chat request failed: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Chat request failed: {str(e)}") from e
\ No newline at end of file
@@ -0,0 +1,152 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+DEFAULT_PROFILE_DIR = os.path.join(os.path.expanduser("~"), ".jgxaai", "profiles")
+SPAN_WINDOW = 512
+TOP_ALLOCATIONS = 40
+
+# Timings for named hot-path sections, kept per name as the last SPAN_WINDOW durations plus
+# running totals. Off until enable(); while off, start() returns None and end() returns at
+# once, so the hooks can stay in the stream and paint paths. Safe to use from any thread.
+class SpanRecorder:
+    def __init__(self, window=SPAN_WINDOW):
+        self.enabled = False
+        self.window = window
+        self._lock = threading.Lock()
+        self._spans = {}
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def start(self):
+        return time.perf_counter() if self.enabled else None
+
+    def end(self, name, started):
+        if started is not None:
+            self.record(name, time.perf_counter() - started)
+
+    def record(self, name, seconds):
+        with self._lock:
+            span = self._spans.get(name)
+            if span is None:
+                span = self._spans[name] = [deque(maxlen=self.window), 0, 0.0, 0.0]
+            span[0].append(seconds)
+            span[1] += 1
+            span[2] += seconds
+            span[3] = max(span[3], seconds)
+
+    def count(self, name):
+        with self._lock:
+            span = self._spans.get(name)
+            return span[1] if span is not None else 0
+
+    def snapshot(self):
+        # {name: stats}; the percentiles cover the last `window` calls, the rest all of them
+        with self._lock:
+            spans = {name: (list(recent), count, total, worst)
+                     for name, (recent, count, total, worst) in self._spans.items()}
+        stats = {}
+        for name, (recent, count, total, worst) in spans.items():
+            recent.sort()
+            stats[name] = {
+                "count": count,
+                "mean_ms": round(total / count * 1000, 4) if count else 0.0,
+                "p50_ms": round(recent[len(recent) // 2] * 1000, 4) if recent else 0.0,
+                "p95_ms": round(recent[min(len(recent) - 1, int(len(recent) * 0.95))] * 1000, 4) if recent else 0.0,
+                "max_ms": round(worst * 1000, 4)
+            }
+        return stats
+
+    def reset(self):
+        with self._lock:
+            self._spans = {}
+
+SPANS = SpanRecorder()
+
+# On-demand cProfile and tracemalloc. cProfile only sees the thread that started it (the UI
+# thread, where sluggishness shows up); tracemalloc covers the whole process. dump() writes
+# whatever is running, plus any extra records, into one timestamped directory.
+class Profiler:
+    def __init__(self, directory=DEFAULT_PROFILE_DIR):
+        self.directory = directory
+        self.cpu = None
+        self.cpu_started = None
+
+    @property
+    def cpu_running(self):
+        return self.cpu is not None
+
+    @property
+    def memory_running(self):
+        import tracemalloc
+        return tracemalloc.is_tracing()
+
+    def start_cpu(self):
+        if self.cpu is None:
+            import cProfile
+            self.cpu = cProfile.Profile()
+            self.cpu_started = time.time()
+            self.cpu.enable()
+
+    def stop_cpu(self):
+        # Returns the stopped profile (None if none was running)
+        profile = self.cpu
+        if profile is not None:
+            profile.disable()
+            self.cpu = None
+        return profile
+
+    def start_memory(self, frames=1):
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def stop_memory(self):
+        import tracemalloc
+        tracemalloc.stop()
+
+    def dump(self, samples=None):
+        # Writes cpu.prof (pstats format) and cpu.txt, memory.txt and samples.jsonl as applicable;
+        # a running CPU profile is stopped and started again so the dump covers up to now
+        import io
+        import pstats
+        import tracemalloc
+        directory = os.path.join(self.directory, time.strftime("%Y%m%d-%H%M%S"))
+        os.makedirs(directory, exist_ok=True)
+        written = []
+
+        if self.cpu is not None:
+            profile = self.stop_cpu()
+            path = os.path.join(directory, "cpu.prof")
+            profile.dump_stats(path)
+            text = io.StringIO()
+            pstats.Stats(profile, stream=text).sort_stats("cumulative").print_stats(60)
+            with open(os.path.join(directory, "cpu.txt"), 'w', encoding='utf-8') as f:
+                f.write(text.getvalue())
+            written.append(path)
+            self.start_cpu()
+
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            path = os.path.join(directory, "memory.txt")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(f"traced {current / 1e6:.1f} MB, peak {peak / 1e6:.1f} MB\n\n")
+                for stat in tracemalloc.take_snapshot().statistics("lineno")[:TOP_ALLOCATIONS]:
+                    f.write(f"{stat}\n")
+            written.append(path)
+
+        path = os.path.join(directory, "samples.jsonl")
+        with open(path, 'w', encoding='utf-8') as f:
+            for sample in samples or ():
+                f.write(json.dumps(sample))
+                f.write("\n")
+            f.write(json.dumps({"spans": SPANS.snapshot(), "dumped_at": time.time()}))
+            f.write("\n")
+        written.append(path)
+        return directory, written
@@ -0,0 +1,231 @@
+import asyncio
+import hashlib
+import os
+import time
+
+DEFAULT_EMBED_MODEL = "nomic-embed-text"
+CHUNK_CHARS = 1500
+CHUNK_OVERLAP_LINES = 2
+MAX_FILE_BYTES = 1 << 20
+EMBED_BATCH = 32
+EMBED_CONCURRENCY = 4
+CONTEXT_CHUNKS = 5
+CONTEXT_CHARS = 6000
+# An index this old is refreshed once the reply that used it has finished
+REFRESH_SECONDS = 30
+
+SKIP_DIRS = {'.git', '.hg', '.svn', 'node_modules', '__pycache__', '.venv', 'venv', '.tox', '.mypy_cache',
+             'dist', 'build', '.idea'}
+
+CONTEXT_PROMPT = (
+    "Excerpts from files the user attached to this chat follow. Use them when they are relevant "
+    "to the question and mention which file you used; ignore them otherwise."
+)
+
+def chunk_text(text, max_chars=CHUNK_CHARS, overlap_lines=CHUNK_OVERLAP_LINES):
+    # Line-aligned chunks of at most max_chars (a single longer line is cut). Chunks of many
+    # short lines start a few lines before the previous one ended, so a function cut in two
+    # keeps some context. Returns [(start_line, end_line, text)], 1-based.
+    lines = text.splitlines(keepends=True)
+    chunks = []
+    start = 0
+    while start < len(lines):
+        end = start
+        size = 0
+        while end < len(lines) and (end == start or size + len(lines[end]) <= max_chars):
+            size += len(lines[end])
+            end += 1
+        body = "".join(lines[start:end])[:max_chars]
+        if body.strip():
+            chunks.append((start + 1, end, body))
+        if end >= len(lines):
+            break
+        start = end - overlap_lines if end - start > 2 * overlap_lines else end
+    return chunks
+
+def scan_files(root):
+    # {path: (mtime, size)} for every candidate file under root (or root itself); stat only
+    if os.path.isfile(root):
+        stat = os.stat(root)
+        return {os.path.abspath(root): (stat.st_mtime, stat.st_size)}
+    found = {}
+    stack = [os.path.abspath(root)]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.name.startswith('.') and entry.name not in ('.github',):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in SKIP_DIRS:
+                            stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        stat = entry.stat()
+                        if 0 < stat.st_size <= MAX_FILE_BYTES:
+                            found[entry.path] = (stat.st_mtime, stat.st_size)
+                except OSError:
+                    continue
+    return found
+
+def read_text(path):
+    # (sha256, text), or (sha256, None) for binary and undecodable files
+    try:
+        with open(path, 'rb') as f:
+            data = f.read(MAX_FILE_BYTES + 1)
+    except OSError:
+        return None, None
+    sha = hashlib.sha256(data).hexdigest()
+    if b"\0" in data[:4096]:
+        return sha, None
+    try:
+        return sha, data.decode('utf-8')
+    except UnicodeDecodeError:
+        return sha, None
+
+def plan_refresh(root, known):
+    # Blocking part of a refresh, meant for a worker thread: which files are new or changed
+    # (hashing only those whose stat moved), which only need their stat updated, which are gone
+    current = scan_files(root)
+    changed = []
+    touched = []
+    for path, (mtime, size) in current.items():
+        previous = known.get(path)
+        if previous is not None and previous[0] == mtime and previous[1] == size:
+            continue
+        sha, text = read_text(path)
+        if sha is None:
+            continue
+        if previous is not None and previous[2] == sha:
+            touched.append((path, mtime, size))
+            continue
+        chunks = chunk_text(text) if text is not None else []
+        changed.append((path, mtime, size, sha, chunks))
+    removed = [path for path in known if path not in current]
+    return len(current), changed, touched, removed
+
+# Keeps one attached root's VectorIndex in step with the disk and embeds through Ollama's
+# /api/embed, EMBED_BATCH chunks per request with EMBED_CONCURRENCY requests in flight.
+# A refresh only re-reads files whose mtime or size changed, and only re-embeds those whose
+# content hash changed, so refreshing an unchanged tree is one stat per file.
+class DocumentIndexer:
+    def __init__(self, client, index, root, model=DEFAULT_EMBED_MODEL, batch_size=EMBED_BATCH,
+                 concurrency=EMBED_CONCURRENCY):
+        self.client = client
+        self.index = index
+        self.root = os.path.abspath(root)
+        self.model = model
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.refreshed_at = None
+
+    def stale(self, seconds=REFRESH_SECONDS):
+        return self.refreshed_at is None or time.monotonic() - self.refreshed_at > seconds
+
+    async def embed(self, texts):
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        limiter = asyncio.Semaphore(self.concurrency)
+
+        async def run(batch):
+            async with limiter:
+                return await self.client.embed(self.model, batch)
+
+        results = await asyncio.gather(*(run(batch) for batch in batches))
+        return [vector for result in results for vector in result]
+
+    async def refresh(self, progress=None):
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        known = await loop.run_in_executor(None, self.index.file_states)
+        total, changed, touched, removed = await loop.run_in_executor(None, plan_refresh, self.root, known)
+
+        if touched:
+            await loop.run_in_executor(None, self.index.touch_files, touched)
+        if removed:
+            await loop.run_in_executor(None, self.index.remove_files, removed)
+
+        # Embed across file boundaries so small files still fill whole batches
+        pending = []
+        chunk_count = 0
+        done = 0
+        for item in changed:
+            pending.append(item)
+            chunk_count += len(item[4])
+            if chunk_count >= self.batch_size * self.concurrency * 4 or item is changed[-1]:
+                texts = [text for entry in pending for _, _, text in entry[4]]
+                vectors = await self.embed(texts) if texts else []
+                files = []
+                offset = 0
+                for path, mtime, size, sha, chunks in pending:
+                    files.append((path, mtime, size, sha, chunks, vectors[offset:offset + len(chunks)]))
+                    offset += len(chunks)
+                await loop.run_in_executor(None, self.index.replace_files, files)
+                done += len(pending)
+                pending = []
+                chunk_count = 0
+                if progress is not None:
+                    progress(done, len(changed))
+        await loop.run_in_executor(None, self.index.flush)
+
+        self.refreshed_at = time.monotonic()
+        return {
+            "root": self.root,
+            "files": total,
+            "updated": len(changed),
+            "touched": len(touched),
+            "removed": len(removed),
+            "chunks": self.index.chunk_count(),
+            "seconds": round(time.perf_counter() - started, 3)
+        }
+
+# Turns a question into context from one or more indexed roots: one embedding for the query,
+# one dot product per index, best chunks overall up to CONTEXT_CHARS. It searches the indexes
+# as they are; refreshing them is left to the caller, between questions.
+class Retriever:
+    def __init__(self, client, indexers, model=DEFAULT_EMBED_MODEL, k=CONTEXT_CHUNKS, max_chars=CONTEXT_CHARS):
+        self.client = client
+        self.indexers = list(indexers)
+        self.model = model
+        self.k = k
+        self.max_chars = max_chars
+
+    async def search(self, query):
+        vector = (await self.client.embed(self.model, [query]))[0]
+        loop = asyncio.get_running_loop()
+        hits = []
+        for indexer in self.indexers:
+            hits.extend(await loop.run_in_executor(None, indexer.index.search, vector, self.k))
+        hits.sort(key=lambda hit: -hit[0])
+        return hits[:self.k]
+
+    def format_context(self, hits):
+        parts = []
+        used = 0
+        for score, path, start, end, text in hits:
+            block = f"--- {path} (lines {start}-{end})\n{text.rstrip()}\n"
+            if used + len(block) > self.max_chars and parts:
+                break
+            parts.append(block)
+            used += len(block)
+        return "\n".join(parts)
+
+    async def context_note(self, query):
+        # The system message carrying the excerpts for query, or None when nothing matched;
+        # fetched before the history is windowed so its size counts against the budget
+        if not query.strip():
+            return None
+        context = self.format_context(await self.search(query))
+        if not context:
+            return None
+        return {"role": "system", "content": f"{CONTEXT_PROMPT}\n\n{context}"}
+
+def insert_context(messages, note):
+    # The context goes in right before the latest user message, so the earlier history is
+    # still sent byte-for-byte as before and Ollama's prompt cache keeps working
+    if note is None or not any(m['role'] == 'user' for m in messages):
+        return messages
+    last_user = max(i for i, m in enumerate(messages) if m['role'] == 'user')
+    return messages[:last_user] + [note] + messages[last_user:]
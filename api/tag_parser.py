@@ -0,0 +1,73 @@
+OPEN_TAGS = ('<thinking>', '<think>')
+CLOSE_TAGS = ('</thinking>', '</think>')
+
+# Resumable parser that splits streamed output into message and thinking text.
+# Tags may be split across any number of chunks.
+class ThinkTagParser:
+    def __init__(self):
+        self.in_thinking = False
+        self.message_parts = []
+        self.thinking_parts = []
+        self._pending = ""
+
+    @property
+    def message(self):
+        return "".join(self.message_parts)
+
+    @property
+    def thinking(self):
+        return "".join(self.thinking_parts)
+
+    def feed(self, text):
+        events = []
+        if self._pending:
+            text = self._pending + text
+            self._pending = ""
+
+        pos = 0
+        length = len(text)
+        while pos < length:
+            tags = CLOSE_TAGS if self.in_thinking else OPEN_TAGS
+            lt = text.find('<', pos)
+            if lt == -1:
+                self._emit(events, text[pos:])
+                break
+            if lt > pos:
+                self._emit(events, text[pos:lt])
+
+            tag = None
+            for candidate in tags:
+                if text.startswith(candidate, lt):
+                    tag = candidate
+                    break
+
+            if tag is not None:
+                self.in_thinking = not self.in_thinking
+                pos = lt + len(tag)
+                continue
+
+            # Hold back a trailing partial tag until the next chunk arrives
+            rest = text[lt:]
+            if any(len(rest) < len(t) and t.startswith(rest) for t in tags):
+                self._pending = rest
+                break
+
+            self._emit(events, '<')
+            pos = lt + 1
+
+        return events
+
+    def flush(self):
+        events = []
+        if self._pending:
+            self._emit(events, self._pending)
+            self._pending = ""
+        return events
+
+    def _emit(self, events, text):
+        kind = 'thinking' if self.in_thinking else 'message'
+        (self.thinking_parts if self.in_thinking else self.message_parts).append(text)
+        if events and events[-1][0] == kind:
+            events[-1] = (kind, events[-1][1] + text)
+        else:
+            events.append((kind, text))
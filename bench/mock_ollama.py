@@ -0,0 +1,340 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import re
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from aiohttp import web
+
+SPLIT_MODES = ('clean', 'split', 'adversarial')
+EMBED_DIM = 64
+DEFAULT_KEEP_ALIVE = 300
+
+def parse_keep_alive(value):
+    # Ollama accepts seconds as a number or a duration string like "10m"; negative means forever
+    if value is None:
+        return DEFAULT_KEEP_ALIVE
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.fullmatch(r"(-?\d+(?:\.\d+)?)(ms|s|m|h)?", str(value).strip())
+    if not match:
+        return DEFAULT_KEEP_ALIVE
+    scale = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, None: 1}[match.group(2)]
+    return float(match.group(1)) * scale
+
+# Stand-in for Ollama's /api/tags, /api/ps, /api/chat and /api/embed. Responses are a think block followed
+# by an answer, cut into NDJSON chunks and paced at tokens_per_second (0 = as fast as possible).
+# A model that isn't resident takes load_seconds to load and then stays for its keep_alive;
+# a chat with no messages only loads (or, with keep_alive 0, unloads) it. Like Ollama's KV
+# cache, prompt_eval_count only counts the part of the prompt that differs from the model's
+# previous one (at roughly 4 characters per token). Setting fail_chats makes that many of
+# the next /api/chat requests answer 503, for exercising retries and failover; a model it
+# doesn't have gets Ollama's 404. Embeddings are hashed bags of words (EMBED_DIM wide), so
+# texts sharing words land close together.
+# parallel > 0 caps concurrent generations like OLLAMA_NUM_PARALLEL; the rest wait their turn.
+# /api/show reports context_length and, when set, num_ctx as a Modelfile parameter; the last
+# /api/chat request's messages are kept in last_messages.
+#   split='clean'        tags arrive as whole chunks
+#   split='split'        every tag is cut in half across two chunks
+#   split='adversarial'  tags arrive one character per chunk, and the answer contains
+#                        '<' characters and unfinished tag prefixes that must pass through
+class MockOllama:
+    def __init__(self, tokens_per_second=0, chunk_tokens=1, think_tokens=32, answer_tokens=256,
+                 split='clean', tag='think', models=("mock:latest",), host="127.0.0.1", port=0,
+                 load_seconds=0, parallel=0, context_length=32768, num_ctx=None):
+        if split not in SPLIT_MODES:
+            raise Exception(f"Unknown split mode: {split}")
+        self.tokens_per_second = tokens_per_second
+        self.chunk_tokens = max(1, chunk_tokens)
+        self.think_tokens = think_tokens
+        self.answer_tokens = answer_tokens
+        self.split = split
+        self.tag = tag
+        self.models = list(models)
+        self.host = host
+        self.port = port
+        self.load_seconds = load_seconds
+        self.parallel = parallel
+        self.context_length = context_length
+        self.num_ctx = num_ctx
+        self.last_messages = None
+        self._slots = None
+        self.fail_chats = 0
+        self.requests_failed = 0
+        self.requests_served = 0
+        self.requests_aborted = 0
+        self.embed_requests = 0
+        self.embedded_inputs = 0
+        self.loads = 0
+        # model -> expiry (monotonic seconds, None = never)
+        self.resident = {}
+        self._load_locks = {}
+        self._last_prompt = {}
+
+        self._loop = None
+        self._runner = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def chunks(self, think_tokens=None, answer_tokens=None):
+        think_tokens = self.think_tokens if think_tokens is None else think_tokens
+        answer_tokens = self.answer_tokens if answer_tokens is None else answer_tokens
+
+        pieces = []
+        if think_tokens:
+            pieces.extend(self._tag_pieces(f"<{self.tag}>"))
+            pieces.extend(self._group(f" step{i}" for i in range(think_tokens)))
+            pieces.extend(self._tag_pieces(f"</{self.tag}>"))
+            pieces.append("\n\n")
+        pieces.extend(self._group(self._answer_token(i) for i in range(answer_tokens)))
+        return pieces
+
+    def _answer_token(self, i):
+        if self.split == 'adversarial' and i % 16 == 15:
+            # Looks like the start of a tag but never becomes one
+            return " a<b" if i % 32 == 15 else f" <{self.tag[:3]}"
+        return f" tok{i}"
+
+    def _group(self, tokens):
+        group = []
+        for token in tokens:
+            group.append(token)
+            if len(group) == self.chunk_tokens:
+                yield "".join(group)
+                group = []
+        if group:
+            yield "".join(group)
+
+    def _tag_pieces(self, tag):
+        if self.split == 'adversarial':
+            return list(tag)
+        if self.split == 'split':
+            middle = len(tag) // 2
+            return [tag[:middle], tag[middle:]]
+        return [tag]
+
+    async def handle_tags(self, request):
+        return web.json_response({"models": [
+            {"name": name, "model": name, "digest": hashlib.sha256(name.encode()).hexdigest()}
+            for name in self.models
+        ]})
+
+    async def handle_version(self, request):
+        return web.json_response({"version": "0.0.0-mock"})
+
+    async def handle_show(self, request):
+        body = await request.json()
+        model = body.get('model') or body.get('name')
+        if model not in self.models:
+            return web.json_response({"error": f"model '{model}' not found"}, status=404)
+        return web.json_response({
+            "parameters": f"num_ctx                        {self.num_ctx}" if self.num_ctx else "",
+            "model_info": {"general.architecture": "mock", "mock.context_length": self.context_length}
+        })
+
+    async def handle_ps(self, request):
+        now = time.monotonic()
+        models = []
+        for name, expires in list(self.resident.items()):
+            if expires is not None and expires <= now:
+                del self.resident[name]
+                continue
+            expires_at = datetime.now(timezone.utc) + timedelta(seconds=expires - now if expires else 1e6)
+            models.append({"name": name, "model": name, "size": 1 << 32, "size_vram": 1 << 32,
+                           "expires_at": expires_at.isoformat()})
+        return web.json_response({"models": models})
+
+    async def handle_embed(self, request):
+        body = await request.json()
+        inputs = body.get('input', [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        self.embed_requests += 1
+        self.embedded_inputs += len(inputs)
+        return web.json_response({"model": body.get('model'), "embeddings": [self.embedding(text) for text in inputs]})
+
+    def embedding(self, text):
+        vector = [0.0] * EMBED_DIM
+        for word in re.findall(r"\w+", text.lower()):
+            vector[zlib.crc32(word.encode()) % EMBED_DIM] += 1.0
+        return vector
+
+    async def _load(self, model, keep_alive):
+        load_duration = 0
+        # Concurrent requests for a cold model share one load, as in Ollama
+        async with self._load_locks.setdefault(model, asyncio.Lock()):
+            expires = self.resident.get(model, 0)
+            if model not in self.resident or (expires is not None and expires <= time.monotonic()):
+                self.loads += 1
+                await asyncio.sleep(self.load_seconds)
+                load_duration = int(self.load_seconds * 1e9)
+        seconds = parse_keep_alive(keep_alive)
+        if seconds == 0:
+            self.resident.pop(model, None)
+        else:
+            self.resident[model] = None if seconds < 0 else time.monotonic() + seconds
+        return load_duration
+
+    async def handle_chat(self, request):
+        body = await request.json()
+        if self.fail_chats > 0:
+            self.fail_chats -= 1
+            self.requests_failed += 1
+            return web.json_response({"error": "mock failure"}, status=503)
+        model = body.get("model", "")
+        if model not in self.models:
+            return web.json_response({"error": f"model '{model}' not found"}, status=404)
+        streaming = body.get("stream", True)
+        started = time.perf_counter()
+        load_duration = await self._load(model, body.get("keep_alive"))
+        prompt_tokens = self._prompt_tokens(model, body.get("messages") or [])
+        if body.get("messages"):
+            self.last_messages = body["messages"]
+        if not body.get("messages"):
+            unloading = parse_keep_alive(body.get("keep_alive")) == 0
+            return web.json_response({
+                "model": model,
+                "message": {"role": "assistant", "content": ""},
+                "done_reason": "unload" if unloading else "load",
+                "done": True,
+                "load_duration": load_duration
+            })
+        # Per-request overrides, e.g. /api/chat?answer_tokens=10
+        think_tokens = int(request.query.get("think_tokens", self.think_tokens))
+        answer_tokens = int(request.query.get("answer_tokens", self.answer_tokens))
+        pieces = self.chunks(think_tokens, answer_tokens)
+        self.requests_served += 1
+
+        if not streaming:
+            return web.json_response(self._final(model, "".join(pieces), think_tokens + answer_tokens,
+                                                 started, load_duration, prompt_tokens))
+
+        response = web.StreamResponse()
+        response.content_type = "application/x-ndjson"
+        await response.prepare(request)
+
+        delay = self.chunk_tokens / self.tokens_per_second if self.tokens_per_second else 0
+        if self.parallel and self._slots is None:
+            self._slots = asyncio.Semaphore(self.parallel)
+        if self._slots is not None:
+            await self._slots.acquire()
+        try:
+            for piece in pieces:
+                line = {"model": model, "message": {"role": "assistant", "content": piece}, "done": False}
+                await response.write(json.dumps(line).encode() + b"\n")
+                if delay:
+                    await asyncio.sleep(delay)
+            final = self._final(model, "", think_tokens + answer_tokens, started, load_duration,
+                                prompt_tokens)
+            await response.write(json.dumps(final).encode() + b"\n")
+        except ConnectionResetError:
+            # The client hung up (stop, preemption); nothing left to send
+            self.requests_aborted += 1
+            return response
+        except asyncio.CancelledError:
+            self.requests_aborted += 1
+            raise
+        finally:
+            if self._slots is not None:
+                self._slots.release()
+        await response.write_eof()
+        return response
+
+    def _prompt_tokens(self, model, messages):
+        if not messages:
+            return 0
+        prompt = "".join(f"<{m.get('role')}>{m.get('content', '')}" for m in messages)
+        previous = self._last_prompt.get(model, "")
+        shared = 0
+        for a, b in zip(prompt, previous):
+            if a != b:
+                break
+            shared += 1
+        self._last_prompt[model] = prompt
+        return max(1, (len(prompt) - shared + 3) // 4)
+
+    def _final(self, model, content, eval_count, started, load_duration=0, prompt_tokens=0):
+        duration = int((time.perf_counter() - started) * 1e9)
+        return {
+            "model": model,
+            "message": {"role": "assistant", "content": content},
+            "done": True,
+            "total_duration": duration,
+            "load_duration": load_duration,
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": prompt_tokens * 100000,
+            "eval_count": eval_count,
+            "eval_duration": duration
+        }
+
+    def _make_app(self):
+        app = web.Application()
+        app.router.add_get("/api/tags", self.handle_tags)
+        app.router.add_get("/api/ps", self.handle_ps)
+        app.router.add_get("/api/version", self.handle_version)
+        app.router.add_post("/api/show", self.handle_show)
+        app.router.add_post("/api/chat", self.handle_chat)
+        app.router.add_post("/api/embed", self.handle_embed)
+        return app
+
+    async def _start(self):
+        self._runner = web.AppRunner(self._make_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    def start(self):
+        # Serves from a background thread so benchmarks can drive blocking clients
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="mock-ollama", daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result(10)
+        return self.base_url
+
+    def stop(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
+        self._loop.close()
+        self._loop = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Ollama server for benchmarks")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--rate", type=float, default=50, help="tokens per second, 0 for unthrottled")
+    parser.add_argument("--chunk-tokens", type=int, default=1)
+    parser.add_argument("--think-tokens", type=int, default=32)
+    parser.add_argument("--answer-tokens", type=int, default=256)
+    parser.add_argument("--split", choices=SPLIT_MODES, default='clean')
+    parser.add_argument("--tag", choices=('think', 'thinking'), default='think')
+    parser.add_argument("--load-seconds", type=float, default=0, help="simulated model load time")
+    args = parser.parse_args()
+
+    server = MockOllama(args.rate, args.chunk_tokens, args.think_tokens, args.answer_tokens,
+                        args.split, args.tag, port=args.port, load_seconds=args.load_seconds)
+    server.start()
+    print(f"Mock Ollama listening on {server.base_url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,685 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from api.tag_parser import ThinkTagParser
+from api.ollama_client import OllamaClient
+from bench.mock_ollama import MockOllama, SPLIT_MODES
+
+BENCHMARKS = ('parser', 'chat_stream', 'worker_ttft', 'chat_area', 'memory', 'startup', 'endpoints', 'rag', 'idle_jobs', 'archive')
+CHAT_AREA_SIZES = (10, 100, 1000, 3000)
+# Appending a message or flushing the streaming tail may cost at most this many times more at the
+# largest size than at 100 messages: both should lay out one row, not the whole history
+CHAT_AREA_MAX_GROWTH = 3.0
+MODEL = "mock:latest"
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 4),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 4),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 4),
+        "min_ms": round(ordered[0] * 1000, 4),
+        "max_ms": round(ordered[-1] * 1000, 4)
+    }
+
+def sample_text(i):
+    # Mix of short and long messages, roughly what a chat accumulates
+    words = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+             "incididunt ut labore et dolore magna aliqua").split()
+    length = 8 + (i * 37) % 120
+    return " ".join(words[(i + j) % len(words)] for j in range(length))
+
+def bench_parser(quick):
+    results = {}
+    repeats = 20 if quick else 200
+    for split in SPLIT_MODES:
+        chunks = MockOllama(think_tokens=256, answer_tokens=2048, split=split).chunks()
+        chars = sum(len(chunk) for chunk in chunks)
+        started = time.perf_counter()
+        for _ in range(repeats):
+            parser = ThinkTagParser()
+            for chunk in chunks:
+                parser.feed(chunk)
+            parser.flush()
+        elapsed = time.perf_counter() - started
+        results[split] = {
+            "chunks_per_s": round(len(chunks) * repeats / elapsed),
+            "mb_per_s": round(chars * repeats / elapsed / 1e6, 3),
+            "us_per_chunk": round(elapsed / (len(chunks) * repeats) * 1e6, 4)
+        }
+    return results
+
+def bench_chat_stream(quick):
+    results = {}
+    answer_tokens = 2000 if quick else 20000
+    for split in SPLIT_MODES:
+        with MockOllama(answer_tokens=answer_tokens, think_tokens=256, split=split) as server:
+            client = OllamaClient(server.base_url)
+            expected = "".join(server.chunks())
+            samples = []
+            for _ in range(2 if quick else 5):
+                started = time.perf_counter()
+                events = list(client.chat_stream(MODEL, [{"role": "user", "content": "bench"}]))
+                samples.append(time.perf_counter() - started)
+
+            # Sanity check: every character comes back, minus the tags
+            message = "".join(text for kind, text in events if kind == 'message')
+            thinking = "".join(text for kind, text in events if kind == 'thinking')
+            chunks = len(server.chunks())
+            best = min(samples)
+            results[split] = {
+                "chunks": chunks,
+                "chunks_per_s": round(chunks / best),
+                "mb_per_s": round(len(expected) / best / 1e6, 3),
+                "events": len(events),
+                "intact": len(message) + len(thinking) == len(expected) - len(f"<{server.tag}></{server.tag}>"),
+                "wall": summarize(samples)
+            }
+    return results
+
+def _qt_app():
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtWidgets import QApplication
+    return QApplication.instance() or QApplication(sys.argv[:1])
+
+def _worker_runs(bridge, client, runs):
+    from PySide6.QtCore import QEventLoop, QTimer
+    from api.conversation import ConversationManager
+    from ui.chat_worker import ChatWorker
+
+    ttft = []
+    total = []
+    signals = []
+    wakeups = []
+    for _ in range(runs):
+        conversation = ConversationManager()
+        conversation.add_message("user", "bench")
+        worker = ChatWorker(bridge, client, MODEL, conversation)
+        stamps = {"count": 0}
+
+        def on_content(text, stamps=stamps):
+            stamps.setdefault("first", time.perf_counter())
+            stamps["count"] += 1
+
+        loop = QEventLoop()
+        worker.thinking_received.connect(on_content)
+        worker.message_received.connect(on_content)
+        worker.finished.connect(loop.quit)
+        QTimer.singleShot(10000, loop.quit)
+
+        started = time.perf_counter()
+        worker.start()
+        loop.exec()
+        finished = time.perf_counter()
+        if "first" in stamps:
+            ttft.append(stamps["first"] - started)
+        total.append(finished - started)
+        signals.append(stamps["count"])
+        # Queued signals that crossed from the asyncio thread; before the delta buffer every
+        # content chunk was one
+        buffer = getattr(worker, "buffer", None)
+        wakeups.append(buffer.wakeups if buffer is not None else stamps["count"])
+    return {
+        "ttft": summarize(ttft),
+        "total": summarize(total),
+        "signals_per_response": statistics.fmean(signals),
+        "queued_signals_per_response": statistics.fmean(wakeups)
+    }
+
+def bench_worker_ttft(quick):
+    from api.async_client import AsyncOllamaClient
+    from ui.async_bridge import AsyncBridge
+
+    _qt_app()
+    runs = 5 if quick else 30
+    with MockOllama(tokens_per_second=500, think_tokens=16, answer_tokens=64) as server:
+        bridge = AsyncBridge()
+        client = AsyncOllamaClient(server.base_url)
+        results = _worker_runs(bridge, client, runs)
+        bridge.shutdown(client.close())
+    # The mock's own first chunk goes out immediately, so TTFT here is pure app overhead
+    results["server_chunks_per_response"] = len(MockOllama(think_tokens=16, answer_tokens=64).chunks())
+
+    # Unthrottled: chunks arrive far faster than the UI could take one signal each
+    with MockOllama(tokens_per_second=0, think_tokens=512, answer_tokens=4096) as server:
+        bridge = AsyncBridge()
+        client = AsyncOllamaClient(server.base_url)
+        flood = _worker_runs(bridge, client, max(2, runs // 5))
+        bridge.shutdown(client.close())
+    flood["server_chunks_per_response"] = len(MockOllama(think_tokens=512, answer_tokens=4096).chunks())
+    results["flood"] = flood
+    return results
+
+def _settle(app, area):
+    # Let the view's own delayed layout run, then paint synchronously
+    app.processEvents()
+    area.viewport().repaint()
+    app.processEvents()
+
+def bench_chat_area(quick):
+    from ui.chat_model import KIND_USER, KIND_ASSISTANT
+    from ui.chat_widgets import ChatArea
+
+    app = _qt_app()
+    results = {}
+    for size in CHAT_AREA_SIZES:
+        area = ChatArea()
+        area.resize(800, 600)
+        area.show()
+        _settle(app, area)
+
+        messages = [(KIND_USER if i % 2 == 0 else KIND_ASSISTANT, sample_text(i)) for i in range(size)]
+        started = time.perf_counter()
+        area.append_messages(messages)
+        area.scroll_to_bottom()
+        _settle(app, area)
+        populate = time.perf_counter() - started
+
+        appends = []
+        for i in range(5 if quick else 20):
+            started = time.perf_counter()
+            area.add_message(sample_text(size + i), i % 2 == 0)
+            _settle(app, area)
+            appends.append(time.perf_counter() - started)
+
+        relayouts = []
+        for width in (640, 960, 720, 800) * (1 if quick else 3):
+            started = time.perf_counter()
+            area.resize(width, 600)
+            _settle(app, area)
+            relayouts.append(time.perf_counter() - started)
+
+        streaming = []
+        bubble = area.add_streaming_message()
+        for i in range(20 if quick else 100):
+            started = time.perf_counter()
+            bubble.append_text(f" tok{i}")
+            bubble.flush()
+            _settle(app, area)
+            streaming.append(time.perf_counter() - started)
+        area.finish_streaming_message(bubble)
+
+        results[str(size)] = {
+            "populate_ms": round(populate * 1000, 3),
+            "append_one": summarize(appends),
+            "relayout": summarize(relayouts),
+            "stream_flush": summarize(streaming)
+        }
+        area.close()
+        area.deleteLater()
+        app.processEvents()
+
+    for metric in ("append_one", "stream_flush"):
+        base = results["100"][metric]["p50_ms"]
+        largest = results[str(CHAT_AREA_SIZES[-1])][metric]["p50_ms"]
+        if largest > base * CHAT_AREA_MAX_GROWTH:
+            raise Exception(f"chat_area {metric} grows with history: {base} ms at 100 messages, "
+                            f"{largest} ms at {CHAT_AREA_SIZES[-1]}")
+    return results
+
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def bench_memory(quick):
+    from ui.chat_model import KIND_USER, KIND_ASSISTANT
+    from ui.chat_widgets import ChatArea
+
+    app = _qt_app()
+    count = 1000 if quick else 5000
+    messages = [(KIND_USER if i % 2 == 0 else KIND_ASSISTANT, sample_text(i)) for i in range(count)]
+    text_bytes = sum(len(text.encode('utf-8')) for kind, text in messages)
+
+    area = ChatArea()
+    area.resize(800, 600)
+    area.show()
+    _settle(app, area)
+
+    rss_before = _rss_bytes()
+    tracemalloc.start()
+    snapshot_before = tracemalloc.take_snapshot()
+    area.append_messages(messages)
+    area.scroll_to_bottom()
+    _settle(app, area)
+    snapshot_after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    rss_after = _rss_bytes()
+
+    python_bytes = sum(stat.size_diff for stat in snapshot_after.compare_to(snapshot_before, 'filename'))
+    result = {
+        "messages": count,
+        "text_bytes_per_message": round(text_bytes / count, 1),
+        # Python-side only: model entries, parts lists, delegate height cache
+        "python_bytes_per_message": round(python_bytes / count, 1),
+        "rss_bytes_per_message": round((rss_after - rss_before) / count, 1) if rss_before is not None else None
+    }
+    area.close()
+    area.deleteLater()
+    app.processEvents()
+    result["thinking"] = _thinking_memory(app, 10 if quick else 40)
+    return result
+
+def _thinking_text(i, chars):
+    lines = []
+    size = 0
+    j = 0
+    while size < chars:
+        line = f"step {j}: consider case {(i * 7919 + j * 104729) % 100003}, " + sample_text(i + j)
+        lines.append(line)
+        size += len(line) + 1
+        j += 1
+    return "\n".join(lines)
+
+def _thinking_memory(app, count, chars=60000):
+    # count collapsed 60 KB think blocks, then one expanded and collapsed again
+    from PySide6.QtCore import QEventLoop, QTimer
+    from ui.chat_model import KIND_USER, KIND_THINKING, KIND_ASSISTANT
+    from ui.chat_widgets import ChatArea
+
+    messages = []
+    for i in range(count):
+        messages += [(KIND_USER, sample_text(i)), (KIND_THINKING, _thinking_text(i, chars)),
+                     (KIND_ASSISTANT, sample_text(i + 1))]
+    text_bytes = sum(len(text) for kind, text in messages if kind == KIND_THINKING)
+
+    area = ChatArea()
+    area.resize(800, 600)
+    area.show()
+    _settle(app, area)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    area.append_messages(messages)
+    _settle(app, area)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    model = area.message_model
+    rows = [row for row in range(model.rowCount()) if model.index(row).data(model.KindRole) == KIND_THINKING]
+
+    index = model.index(rows[0])
+    started = time.perf_counter()
+    area._set_thinking_expanded(index, True)
+    # What the user sees first: the section with its first slice, before any more event-loop passes
+    area.viewport().repaint()
+    first_screen = time.perf_counter() - started
+    section = area.thinking_widgets[index.data(model.KeyRole)]
+    loop = QEventLoop()
+    poll = QTimer()
+    poll.timeout.connect(lambda: section._remaining or loop.quit())
+    poll.start(1)
+    loop.exec()
+    fully_loaded = time.perf_counter() - started
+    loaded_ok = section.content_area.toPlainText() == model.text(rows[0])
+    area._set_thinking_expanded(index, False)
+    _settle(app, area)
+
+    result = {
+        "sections": count,
+        "text_bytes": text_bytes,
+        "stored_bytes": sum(model.stored_size(row) for row in rows),
+        "python_bytes": sum(stat.size_diff for stat in after.compare_to(before, 'filename')),
+        "expand_first_screen_ms": round(first_screen * 1000, 2),
+        "expand_fully_loaded_ms": round(fully_loaded * 1000, 2),
+        "expanded_text_matches": loaded_ok,
+        "widgets_after_collapse": len(area.thinking_widgets)
+    }
+    area.close()
+    area.deleteLater()
+    app.processEvents()
+    return result
+
+def _startup_ms(url, home):
+    main_py = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+    env = dict(os.environ, HOME=home, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    output = subprocess.run([sys.executable, main_py, "--startup-check", "--url", url],
+                            capture_output=True, text=True, env=env, timeout=60).stdout
+    match = re.search(r"startup (\d+) ms", output)
+    return int(match.group(1)) if match else None
+
+def bench_startup(quick):
+    from main import STARTUP_BUDGET_MS
+
+    # A socket that accepts connections but never answers stands in for a hung Ollama
+    hung = socket.socket()
+    hung.bind(("127.0.0.1", 0))
+    hung.listen(16)
+    results = {"budget_ms": STARTUP_BUDGET_MS}
+    with MockOllama() as server:
+        targets = {
+            "ollama_up": server.base_url,
+            "ollama_down": "http://127.0.0.1:1",
+            "ollama_hung": f"http://127.0.0.1:{hung.getsockname()[1]}"
+        }
+        for name, url in targets.items():
+            with tempfile.TemporaryDirectory() as home:
+                # First run has no cached model list; later runs start from the cache
+                cold = _startup_ms(url, home)
+                warm = [_startup_ms(url, home) for _ in range(1 if quick else 3)]
+            warm = [value for value in warm if value is not None]
+            results[name] = {
+                "cold_ms": cold,
+                "warm_ms": min(warm) if warm else None,
+                "within_budget": cold is not None and cold <= STARTUP_BUDGET_MS
+            }
+    hung.close()
+    return results
+
+async def _routed_chats(client, model, count):
+    # Runs count concurrent chats; TTFT in seconds for each, None for the ones that failed
+    async def one():
+        started = time.perf_counter()
+        ttft = None
+        try:
+            async for _ in client.chat_stream(model, [{"role": "user", "content": "bench"}]):
+                if ttft is None:
+                    ttft = time.perf_counter() - started
+        except Exception:
+            return None
+        return ttft
+    return await asyncio.gather(*(one() for _ in range(count)))
+
+async def _endpoint_scenarios(servers, quick):
+    from api.endpoints import EndpointPool
+    from api.multi_client import AsyncMultiOllamaClient
+
+    count = 6 if quick else 24
+    pool = EndpointPool([server.base_url for server in servers], reset_seconds=60)
+    client = AsyncMultiOllamaClient(pool)
+    results = {}
+
+    def requests_by_endpoint(before):
+        return {e["url"]: e["requests"] - before.get(e["url"], 0) for e in pool.status()}
+
+    def snapshot():
+        return {e["url"]: e["requests"] for e in pool.status()}
+
+    await client.get_models()
+    # Resident on one host: everything should follow the model there
+    await client.preload("resident:latest", "5m")
+    before = snapshot()
+    ttfts = await _routed_chats(client, "resident:latest", count)
+    results["resident"] = {"requests": requests_by_endpoint(before),
+                           "ok": sum(t is not None for t in ttfts)}
+
+    # Resident nowhere: spread by load
+    before = snapshot()
+    ttfts = await _routed_chats(client, "cold:latest", count)
+    results["least_loaded"] = {"requests": requests_by_endpoint(before),
+                               "ok": sum(t is not None for t in ttfts)}
+
+    # The host holding the model starts failing: retries fail over and its breaker opens
+    await client.clients[servers[0].base_url].preload("flaky:latest", "5m")
+    await client.check_health(force=True)
+    servers[0].fail_chats = 1000
+    retries = pool.retries
+    ttfts = []
+    for _ in range(count):
+        ttfts.extend(await _routed_chats(client, "flaky:latest", 1))
+    ok = [t for t in ttfts if t is not None]
+    results["failover"] = {"ok": len(ok), "total": count, "retries": pool.retries - retries,
+                           "ttft": summarize(ok) if ok else None,
+                           "breakers": {e["url"]: e["breaker"] for e in pool.status()}}
+    servers[0].fail_chats = 0
+
+    # A host goes away entirely: the next health check takes it out of rotation
+    servers[-1].stop()
+    await client.check_health(force=True)
+    ttfts = await _routed_chats(client, "cold:latest", count)
+    results["host_down"] = {"ok": sum(t is not None for t in ttfts), "total": count,
+                            "healthy": {e["url"]: e["healthy"] for e in pool.status()}}
+    await client.close()
+    return results
+
+def bench_endpoints(quick):
+    models = ("resident:latest", "cold:latest", "flaky:latest")
+    servers = [MockOllama(tokens_per_second=2000, think_tokens=0, answer_tokens=32, models=models)
+               for _ in range(3)]
+    for server in servers:
+        server.start()
+    try:
+        return asyncio.run(_endpoint_scenarios(servers, quick))
+    finally:
+        for server in servers:
+            server.stop()
+
+def _write_tree(root, count):
+    # count small source-like files spread over 100 directories
+    for i in range(count):
+        directory = os.path.join(root, f"pkg{i % 100}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"module{i}.py"), 'w', encoding='utf-8') as f:
+            f.write(f"# module {i}\n" + "\n".join(sample_text(i + j) for j in range(12)) + "\n")
+
+async def _rag_scenarios(server, root, index_dir, count, quick):
+    from api.async_client import AsyncOllamaClient
+    from api.rag import DocumentIndexer, Retriever
+    from storage.vector_index import VectorIndex
+
+    client = AsyncOllamaClient(server.base_url)
+    loop = asyncio.get_running_loop()
+    results = {"files": count}
+
+    index = VectorIndex(index_dir, MODEL)
+    indexer = DocumentIndexer(client, index, root, MODEL)
+    requests = server.embed_requests
+    results["initial"] = await indexer.refresh()
+    results["initial"]["embed_requests"] = server.embed_requests - requests
+
+    requests = server.embed_requests
+    results["unchanged"] = await indexer.refresh()
+    results["unchanged"]["embed_requests"] = server.embed_requests - requests
+
+    # Touch 1% (same content, new mtime) and edit 1%: only the edits are re-embedded
+    for i in range(0, count, 100):
+        path = os.path.join(root, f"pkg{i % 100}", f"module{i}.py")
+        os.utime(path, (time.time() + 10, time.time() + 10))
+        edited = os.path.join(root, f"pkg{(i + 1) % 100}", f"module{i + 1}.py")
+        with open(edited, 'a', encoding='utf-8') as f:
+            f.write("edited\n")
+    requests = server.embed_requests
+    results["changed"] = await indexer.refresh()
+    results["changed"]["embed_requests"] = server.embed_requests - requests
+    index.close()
+
+    # Reopening maps the saved matrix instead of re-embedding
+    started = time.perf_counter()
+    index = await loop.run_in_executor(None, VectorIndex, index_dir, MODEL)
+    results["reopen_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+    retriever = Retriever(client, [DocumentIndexer(client, index, root, MODEL)], MODEL)
+    query = (await client.embed(MODEL, [sample_text(7)]))[0]
+    samples = []
+    for _ in range(20 if quick else 200):
+        started = time.perf_counter()
+        index.search(query, retriever.k)
+        samples.append(time.perf_counter() - started)
+    results["search"] = summarize(samples)
+    results["chunks"] = index.chunk_count()
+    index.close()
+    await client.close()
+    return results
+
+def bench_rag(quick):
+    count = 1000 if quick else 10000
+    with tempfile.TemporaryDirectory() as temp, MockOllama(models=(MODEL,)) as server:
+        root = os.path.join(temp, "tree")
+        _write_tree(root, count)
+        return asyncio.run(_rag_scenarios(server, root, os.path.join(temp, "index"), count, quick))
+
+def _foreground_ttft(app, bridge, client, jobs, store, preempt):
+    # One background title job mid-generation, then a foreground reply; seconds to its first token
+    from PySide6.QtCore import QEventLoop, QTimer
+    from api.conversation import ConversationManager
+    from ui.chat_worker import ChatWorker
+    from ui.idle_jobs import JOB_TITLE
+
+    if jobs is not None:
+        conversation_id = store.create_conversation(MODEL)
+        store.add_message(conversation_id, 0, "user", sample_text(1))
+        store.add_message(conversation_id, 1, "assistant", sample_text(2))
+        store.flush()
+        jobs.enqueue(JOB_TITLE, conversation_id)
+        deadline = time.perf_counter() + 5
+        while not jobs.busy() and time.perf_counter() < deadline:
+            app.processEvents()
+            time.sleep(0.002)
+        # Let it get a few tokens into its generation
+        time.sleep(0.1)
+
+    conversation = ConversationManager()
+    conversation.add_message("user", "bench")
+    worker = ChatWorker(bridge, client, MODEL, conversation)
+    stamps = {}
+    loop = QEventLoop()
+    worker.message_received.connect(lambda text: stamps.setdefault("first", time.perf_counter()))
+    worker.thinking_received.connect(lambda text: stamps.setdefault("first", time.perf_counter()))
+    worker.finished.connect(loop.quit)
+    QTimer.singleShot(20000, loop.quit)
+    if jobs is not None and preempt:
+        jobs.track(worker)
+    started = time.perf_counter()
+    worker.start()
+    loop.exec()
+    if jobs is not None:
+        # Drain whatever the job has left before the next run
+        if not preempt:
+            jobs.hold()
+            jobs.release()
+        deadline = time.perf_counter() + 20
+        while jobs.busy() and time.perf_counter() < deadline:
+            app.processEvents()
+            time.sleep(0.002)
+        jobs.jobs.clear()
+    return stamps.get("first", time.perf_counter()) - started
+
+def bench_idle_jobs(quick):
+    # Ollama-like single generation slot: whatever is generating delays everything else
+    from api.async_client import AsyncOllamaClient
+    from storage.conversation_store import ConversationStore
+    from ui.async_bridge import AsyncBridge
+    from ui.idle_jobs import IdleJobQueue
+
+    app = _qt_app()
+    runs = 3 if quick else 10
+    results = {}
+    with tempfile.TemporaryDirectory() as temp, \
+            MockOllama(tokens_per_second=200, think_tokens=0, answer_tokens=300, parallel=1) as server:
+        bridge = AsyncBridge()
+        client = AsyncOllamaClient(server.base_url)
+        store = ConversationStore(os.path.join(temp, "history.db"))
+        jobs = IdleJobQueue(bridge, lambda: client, store, lambda: MODEL, idle_seconds=0)
+        results["idle"] = summarize([_foreground_ttft(app, bridge, client, None, store, True)
+                                     for _ in range(runs)])
+        results["busy_preempted"] = summarize([_foreground_ttft(app, bridge, client, jobs, store, True)
+                                               for _ in range(runs)])
+        results["busy_not_preempted"] = summarize([_foreground_ttft(app, bridge, client, jobs, store, False)
+                                                   for _ in range(runs)])
+        results["jobs"] = {"completed": jobs.completed, "preempted": jobs.preempted, "failed": jobs.failed}
+        jobs.stop()
+        bridge.shutdown(client.close())
+        store.close()
+    return results
+
+def _fill_store(store, conversations, per_conversation):
+    for c in range(conversations):
+        conversation_id = store.create_conversation(MODEL, f"bench {c}")
+        for start in range(0, per_conversation, 1000):
+            store.add_messages(conversation_id, [
+                (seq, "user" if seq % 2 == 0 else "assistant", sample_text(seq),
+                 "" if seq % 2 == 0 else sample_text(seq + 1) * 4, time.time(),
+                 None if seq % 2 == 0 else {"eval_count": 100, "eval_duration": 2e9, "ttft_ms": 80.0})
+                for seq in range(start, min(start + 1000, per_conversation))])
+            store.flush()
+
+def _traced(fn, *args):
+    # (result, seconds, peak traced MB) for one call
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn(*args)
+    seconds = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, round(seconds, 3), round(peak / 1e6, 2)
+
+def bench_archive(quick):
+    # Peak Python allocations during export and import should stay flat as the archive grows
+    from storage.archive import export_archive, import_archive
+    from storage.conversation_store import ConversationStore
+
+    results = {}
+    sizes = (1000, 10000) if quick else (1000, 10000, 100000)
+    with tempfile.TemporaryDirectory() as temp:
+        for size in sizes:
+            source = ConversationStore(os.path.join(temp, f"source{size}.db"))
+            _fill_store(source, 4, size // 4)
+            entry = {}
+            for extension in ("jsonl", "md"):
+                path = os.path.join(temp, f"archive{size}.{extension}")
+                exported, seconds, peak = _traced(export_archive, source, path)
+                target = ConversationStore(os.path.join(temp, f"target{size}{extension}.db"))
+                imported, import_seconds, import_peak = _traced(import_archive, target, path)
+                entry[extension] = {"archive_mb": round(exported["bytes"] / 1e6, 2),
+                                    "export_s": seconds, "export_peak_mb": peak,
+                                    "import_s": import_seconds, "import_peak_mb": import_peak,
+                                    "imported": imported["messages"]}
+                target.close()
+            source.close()
+            results[f"messages_{size}"] = entry
+    return results
+
+def environment():
+    info = {
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "commit": None
+    }
+    try:
+        info["commit"] = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                        text=True, cwd=os.path.dirname(__file__), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        pass
+    return info
+
+def main():
+    parser = argparse.ArgumentParser(description="JGxAAI hot-path benchmarks")
+    parser.add_argument("--only", help=f"comma-separated subset of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--quick", action="store_true", help="fewer iterations, for smoke runs")
+    parser.add_argument("--output", "-o", help="write JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    selected = args.only.split(",") if args.only else list(BENCHMARKS)
+    for name in selected:
+        if name not in BENCHMARKS:
+            parser.error(f"unknown benchmark: {name}")
+
+    report = {"environment": environment(), "quick": args.quick, "results": {}}
+    for name in selected:
+        sys.stderr.write(f"running {name}...\n")
+        report["results"][name] = globals()[f"bench_{name}"](args.quick)
+    if "PySide6" in sys.modules:
+        import PySide6
+        report["environment"]["pyside6"] = PySide6.__version__
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
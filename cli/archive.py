@@ -0,0 +1,27 @@
+import sys
+from storage.archive import export_archive, import_archive
+from storage.conversation_store import ConversationStore
+
+def run_archive(args):
+    # --export / --import against the same history the window uses, without starting Qt
+    store = ConversationStore()
+    progress = None
+    if not args.quiet:
+        progress = lambda messages: sys.stderr.write(f"\r{messages} messages")
+    try:
+        if args.export_path:
+            result = export_archive(store, args.export_path, args.conversation, progress)
+            summary = (f"exported {result['conversations']} conversations, {result['messages']} messages "
+                       f"({result['bytes'] / 1e6:.1f} MB) to {result['path']}")
+        else:
+            result = import_archive(store, args.import_path, progress)
+            summary = (f"imported {result['conversations']} conversations, {result['messages']} messages "
+                       f"from {result['path']}")
+    except Exception as e:
+        sys.stderr.write(f"\n{str(e)}\n" if progress else f"{str(e)}\n")
+        return 1
+    finally:
+        store.close()
+    if not args.quiet:
+        sys.stderr.write(f"\r{summary}\n")
+    return 0
@@ -0,0 +1,181 @@
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from api.ollama_client import OllamaClient
+from api.cached_client import CachedOllamaClient
+from api.endpoints import EndpointPool, parse_endpoints
+from api.multi_client import MultiOllamaClient
+from api.conversation import ConversationManager, context_window
+from api.metrics import ResponseMetrics, eval_rate
+
+DEFAULT_BASE_URL = "http://localhost:11434"
+
+def load_prompts(path):
+    # One prompt per line: either a JSON string or an object with "prompt" and
+    # optional "id", "model", "system" and "options" keys. "-" reads stdin.
+    stream = sys.stdin if path == "-" else open(path, encoding='utf-8')
+    prompts = []
+    try:
+        for line_number, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise Exception(f"{path}:{line_number}: invalid JSON: {str(e)}")
+            if isinstance(item, str):
+                item = {"prompt": item}
+            if not isinstance(item, dict) or not item.get("prompt"):
+                raise Exception(f"{path}:{line_number}: expected a string or an object with a \"prompt\"")
+            item.setdefault("id", line_number)
+            prompts.append(item)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    return prompts
+
+class BatchRunner:
+    def __init__(self, base_url=DEFAULT_BASE_URL, model=None, concurrency=4, system_prompt=None,
+                 output=None, progress=None, options=None, cache=None, replay=None):
+        self.base_url = base_url
+        self.model = model
+        self.concurrency = max(1, concurrency)
+        self.system_prompt = system_prompt
+        self.output = output or sys.stdout
+        self.progress = progress
+        self.options = options
+        self.cache = cache
+        self.replay = replay
+        self.completed = 0
+        self.failed = 0
+        # Several comma-separated URLs share one routing pool across all worker threads
+        urls = parse_endpoints(base_url)
+        self.pool = EndpointPool(urls) if len(urls) > 1 else None
+        # requests.Session isn't safe to share across threads, so each worker keeps its own
+        self._local = threading.local()
+        self._output_lock = threading.Lock()
+
+    def _client(self):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = MultiOllamaClient(self.pool) if self.pool is not None else OllamaClient(self.base_url)
+            if self.cache is not None:
+                client = CachedOllamaClient(client, self.cache, self.replay)
+            self._local.client = client
+        return client
+
+    def run_one(self, item):
+        model = item.get("model") or self.model
+        options = item.get("options", self.options)
+        # The budget follows num_ctx when the options set it
+        conversation = ConversationManager(system_prompt=item.get("system", self.system_prompt),
+                                           default_budget=context_window({}, options))
+        conversation.add_message("user", item["prompt"])
+
+        metrics = ResponseMetrics(model)
+        message_parts = []
+        thinking_parts = []
+        error = None
+        try:
+            if not model:
+                raise Exception("No model given (use --model or a per-prompt \"model\")")
+            messages = conversation.build_messages(model)
+            for kind, text in self._client().chat_stream(model, messages, metrics, options=options):
+                if kind == 'thinking':
+                    thinking_parts.append(text)
+                else:
+                    message_parts.append(text)
+        except Exception as e:
+            error = str(e)
+
+        return {
+            "id": item["id"],
+            "model": model,
+            "prompt": item["prompt"],
+            "response": "".join(message_parts).strip(),
+            "thinking": "".join(thinking_parts).strip(),
+            "error": error,
+            "metrics": metrics.to_dict()
+        }
+
+    def _write(self, record):
+        with self._output_lock:
+            self.output.write(json.dumps(record, ensure_ascii=False))
+            self.output.write("\n")
+            self.output.flush()
+
+    def run(self, prompts):
+        total = len(prompts)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="batch") as executor:
+            futures = {executor.submit(self.run_one, item): item for item in prompts}
+            for future in as_completed(futures):
+                record = future.result()
+                self.completed += 1
+                if record["error"]:
+                    self.failed += 1
+                self._write(record)
+                if self.progress is not None:
+                    self.progress.write(progress_line(self.completed, total, record) + "\n")
+                    self.progress.flush()
+
+        if self.progress is not None:
+            elapsed = time.perf_counter() - started
+            self.progress.write(f"DONE {self.completed - self.failed}/{total} ok, "
+                                f"{self.failed} failed in {elapsed:.1f}s\n")
+            if self.pool is not None:
+                for endpoint in self.pool.status():
+                    self.progress.write(f"ENDPOINT {endpoint['url']} {endpoint['requests']} requests, "
+                                        f"{endpoint['failures']} failed, breaker {endpoint['breaker']}\n")
+            self.progress.flush()
+        return self.failed == 0
+
+def progress_line(done, total, record):
+    status = f"ERROR {record['error']}" if record["error"] else "OK"
+    metrics = record["metrics"]
+    details = []
+    if metrics.get("last_token_ms") is not None:
+        details.append(f"{metrics['last_token_ms'] / 1000:.1f}s")
+    rate = eval_rate(metrics)
+    if rate:
+        details.append(f"{rate:.1f} tok/s")
+    suffix = f" ({', '.join(details)})" if details else ""
+    return f"[{done}/{total}] {record['id']} {record['model']} {status}{suffix}"
+
+def run_batch(args):
+    try:
+        prompts = load_prompts(args.batch)
+    except Exception as e:
+        sys.stderr.write(f"{str(e)}\n")
+        return 2
+
+    try:
+        options = json.loads(args.options) if args.options else None
+    except json.JSONDecodeError as e:
+        sys.stderr.write(f"--options: invalid JSON: {str(e)}\n")
+        return 2
+
+    cache = None
+    if args.cache:
+        from storage.response_cache import ResponseCache
+        cache = ResponseCache(max_bytes=args.cache_mb << 20)
+
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        runner = BatchRunner(args.url, args.model, args.concurrency, args.system,
+                             output=output, progress=None if args.quiet else sys.stderr,
+                             options=options, cache=cache, replay=args.replay)
+        ok = runner.run(prompts)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if cache is not None:
+            if not args.quiet:
+                stats = cache.stats()
+                sys.stderr.write(f"CACHE {stats['hits']} hits, {stats['misses']} misses, "
+                                 f"{stats['entries']} entries ({stats['bytes'] / 1e6:.1f} MB)\n")
+            cache.close()
+    return 0 if ok else 1
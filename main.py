@@ -1,14 +1,72 @@
 #!/usr/bin/env python3
 
+import time
+STARTED = time.perf_counter()
+
+import argparse
 import sys
-from PySide6.QtWidgets import QApplication
-from ui.main_window import MainWindow
+
+# Cold start to an interactive window, whatever state Ollama is in
+STARTUP_BUDGET_MS = 300
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="JGxAAI Terminal")
+    parser.add_argument("--batch", metavar="PROMPTS",
+                        help="run prompts from a JSONL file (or - for stdin) without the GUI")
+    parser.add_argument("--model", help="model for prompts that don't name one")
+    parser.add_argument("--concurrency", type=int, default=4, help="requests in flight at once")
+    parser.add_argument("--system", help="system prompt for every batch prompt")
+    parser.add_argument("--output", "-o", help="write JSONL results here instead of stdout")
+    parser.add_argument("--url", default="http://localhost:11434", help="Ollama base URL, or several comma-separated to load balance across hosts")
+    parser.add_argument("--quiet", "-q", action="store_true", help="no progress on stderr")
+    parser.add_argument("--options", help="Ollama generation options as JSON, e.g. '{\"seed\": 1, \"temperature\": 0}'")
+    parser.add_argument("--cache", action="store_true", help="replay identical requests from the response cache")
+    parser.add_argument("--cache-mb", type=int, default=64, help="response cache size limit")
+    parser.add_argument("--replay", choices=("instant", "paced"), default="instant",
+                        help="how cache hits are streamed back")
+    parser.add_argument("--export", dest="export_path", metavar="PATH",
+                        help="export saved conversations to JSONL (or Markdown for .md) without the GUI")
+    parser.add_argument("--conversation", action="append",
+                        help="with --export, only this conversation id (repeatable)")
+    parser.add_argument("--import", dest="import_path", metavar="PATH",
+                        help="import conversations from a JSONL or Markdown archive without the GUI")
+    parser.add_argument("--startup-check", action="store_true",
+                        help="print the time to an interactive window and exit")
+    # Qt consumes its own options (-style, -platform, ...), so leave unknown ones to it
+    args, qt_args = parser.parse_known_args(argv)
+    if args.batch or args.export_path or args.import_path:
+        # No Qt in the headless modes, so an unknown option is a mistake, not Qt's
+        args = parser.parse_args(argv)
+    return args, qt_args
 
 def main():
-    app = QApplication(sys.argv)
-    window = MainWindow()
+    args, qt_args = parse_args(sys.argv[1:])
+    if args.batch:
+        # Headless path: keep PySide6 out of the import graph entirely
+        from cli.batch import run_batch
+        sys.exit(run_batch(args))
+    if args.export_path or args.import_path:
+        from cli.archive import run_archive
+        sys.exit(run_archive(args))
+
+    from PySide6.QtCore import QTimer
+    from PySide6.QtWidgets import QApplication
+    from ui.main_window import MainWindow
+
+    app = QApplication(sys.argv[:1] + qt_args)
+    window = MainWindow(args.url)
     window.show()
+    if args.startup_check:
+        # Fires once the first frame is painted and the event loop is taking input
+        QTimer.singleShot(0, lambda: report_startup(window))
     sys.exit(app.exec())
 
+def report_startup(window):
+    elapsed_ms = (time.perf_counter() - STARTED) * 1000
+    status = "OK" if elapsed_ms <= STARTUP_BUDGET_MS else "OVER BUDGET"
+    print(f"startup {elapsed_ms:.0f} ms (budget {STARTUP_BUDGET_MS} ms) {status}")
+    sys.stdout.flush()
+    window.close()
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,278 @@
+import io
+import json
+import os
+import time
+from api.metrics import format_summary
+
+ARCHIVE_VERSION = 1
+FORMAT_JSONL = 'jsonl'
+FORMAT_MARKDOWN = 'markdown'
+# Messages per store write during an import, and how many such writes may be queued at once
+IMPORT_BATCH = 500
+IMPORT_IN_FLIGHT = 2
+PROGRESS_EVERY = 1000
+
+MARKER = "<!-- jgxaai:"
+MARKER_END = " -->"
+CONTENT_END = "<!-- jgxaai:end -->"
+
+def archive_format(path):
+    return FORMAT_MARKDOWN if path.lower().endswith(('.md', '.markdown')) else FORMAT_JSONL
+
+def archive_records(store, conversation_ids=None):
+    # Store rows as archive records, one at a time; metrics become objects again
+    for kind, row in store.iter_archive(conversation_ids):
+        if kind == 'conversation':
+            yield {"type": "conversation", "id": row['id'], "title": row['title'], "model": row['model'],
+                   "created_at": row['created_at'], "updated_at": row['updated_at'],
+                   "titled": bool(row['titled']), "summary": row['summary'],
+                   "summarized_upto": row['summarized_upto']}
+            conversation_id = row['id']
+        else:
+            yield {"type": "message", "conversation": conversation_id, "seq": row['seq'], "role": row['role'],
+                   "content": row['content'], "thinking": row['thinking'], "created_at": row['created_at'],
+                   "metrics": json.loads(row['metrics']) if row['metrics'] else None}
+
+# One JSON object per line: an "archive" header, then each conversation followed by its
+# messages. Records are encoded one at a time as they are written.
+class JsonlArchiveWriter:
+    def __init__(self, f):
+        self.f = f
+        self.write({"type": "archive", "version": ARCHIVE_VERSION, "exported_at": time.time()})
+
+    def write(self, record):
+        self.f.write(json.dumps(record, ensure_ascii=False))
+        self.f.write("\n")
+
+def read_jsonl_archive(f, name="archive"):
+    for line_number, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise Exception(f"{name}:{line_number}: invalid JSON: {str(e)}")
+        if not isinstance(record, dict):
+            raise Exception(f"{name}:{line_number}: expected an object")
+        if record.get('type') == 'archive':
+            if record.get('version', 0) > ARCHIVE_VERSION:
+                raise Exception(f"{name}: archive version {record['version']} is newer than this app")
+            continue
+        yield record
+
+def _marker(kind, data=None):
+    if data is None:
+        return f"{MARKER}{kind}{MARKER_END}\n"
+    # "-->" would end the HTML comment early; the escape is still the same JSON string
+    encoded = json.dumps(data, ensure_ascii=False).replace("-->", "--\\u003e")
+    return f"{MARKER}{kind} {encoded}{MARKER_END}\n"
+
+def _escape_lines(text):
+    # Text lines that look like markers get one more leading backslash (removed on read); in
+    # rendered Markdown "\<" is just "<". Split the way the reader's file object splits.
+    for line in io.StringIO(text, newline=''):
+        if line.lstrip('\\').startswith(MARKER):
+            line = "\\" + line
+        yield line
+
+# Readable Markdown that still round-trips: headings, a collapsed <details> per reasoning block
+# and a metrics line are for people; the HTML comments carry the exact fields and fence the
+# exact text, and are what read_markdown_archive goes by.
+class MarkdownArchiveWriter:
+    def __init__(self, f):
+        self.f = f
+        self.f.write(_marker("archive", {"version": ARCHIVE_VERSION, "exported_at": time.time()}))
+
+    def write(self, record):
+        if record['type'] == 'conversation':
+            fields = {key: value for key, value in record.items() if key != 'type'}
+            title = record['title'].replace("\n", " ") or "Untitled"
+            self.f.write(f"\n# {title}\n\n")
+            self.f.write(_marker("conversation", fields))
+            if record['summary']:
+                self.f.write("\n> " + record['summary'].replace("\n", "\n> ") + "\n")
+            return
+
+        fields = {key: record[key] for key in ('seq', 'role', 'created_at', 'metrics')}
+        self.f.write(f"\n## {record['role'].upper()}\n\n")
+        self.f.write(_marker("message", fields))
+        summary = format_summary(record['metrics']) if record['metrics'] else ""
+        if summary:
+            self.f.write(f"\n`{summary}`\n")
+        if record['thinking']:
+            self.f.write("\n<details>\n<summary>Reasoning</summary>\n\n")
+            self._write_text("thinking", record['thinking'])
+            self.f.write("\n</details>\n")
+        self.f.write("\n")
+        self._write_text("content", record['content'])
+
+    def _write_text(self, kind, text):
+        self.f.write(_marker(kind))
+        self.f.writelines(_escape_lines(text))
+        # Always ends in exactly one newline more than the text, which the reader strips
+        self.f.write("\n")
+        self.f.write(CONTENT_END + "\n")
+
+def _parse_marker(line, name, line_number):
+    body = line.rstrip("\r\n")
+    if not body.endswith(MARKER_END):
+        raise Exception(f"{name}:{line_number}: unterminated marker")
+    kind, _, data = body[len(MARKER):-len(MARKER_END)].partition(" ")
+    if not data:
+        return kind, None
+    try:
+        return kind, json.loads(data)
+    except json.JSONDecodeError as e:
+        raise Exception(f"{name}:{line_number}: invalid marker data: {str(e)}")
+
+def read_markdown_archive(f, name="archive"):
+    # f should be opened with newline="" so the text keeps its own line endings
+    conversation = None
+    message = None
+    field = None
+    lines = []
+    started = False
+    for line_number, line in enumerate(f, 1):
+        if field is not None:
+            if line.rstrip("\r\n") == CONTENT_END:
+                message[field] = "".join(lines)[:-1]
+                field = None
+                lines = []
+            elif line.lstrip('\\').startswith(MARKER):
+                lines.append(line[1:])
+            else:
+                lines.append(line)
+            continue
+        if not line.startswith(MARKER):
+            if not started and line.strip():
+                raise Exception(f"{name}: not a JGxAAI Markdown archive")
+            continue
+
+        kind, data = _parse_marker(line, name, line_number)
+        if kind == 'archive':
+            if (data or {}).get('version', 0) > ARCHIVE_VERSION:
+                raise Exception(f"{name}: archive version {data['version']} is newer than this app")
+            started = True
+        elif not started:
+            raise Exception(f"{name}: not a JGxAAI Markdown archive")
+        elif kind in ('conversation', 'message'):
+            if message is not None:
+                yield message
+                message = None
+            if kind == 'conversation':
+                conversation = dict(data, type='conversation')
+                yield conversation
+            elif conversation is None:
+                raise Exception(f"{name}:{line_number}: message outside a conversation")
+            else:
+                message = dict(data, type='message', conversation=conversation['id'], content="", thinking="")
+        elif kind in ('thinking', 'content') and message is not None:
+            field = kind
+        else:
+            raise Exception(f"{name}:{line_number}: unexpected {kind} marker")
+    if field is not None:
+        raise Exception(f"{name}: archive ends inside a message")
+    if message is not None:
+        yield message
+
+def _check_stop(stop):
+    if stop is not None and stop.is_set():
+        raise Exception("Cancelled")
+
+def export_archive(store, path, conversation_ids=None, progress=None, stop=None):
+    # Streams straight from SQLite cursors to the file, so memory stays flat however long the
+    # history is. Written next to path and renamed over it only once complete. Blocking;
+    # setting the stop event (a threading.Event) abandons it.
+    store.flush()
+    markdown = archive_format(path) == FORMAT_MARKDOWN
+    partial = path + ".part"
+    conversations = 0
+    messages = 0
+    try:
+        with open(partial, 'w', encoding='utf-8', newline='') as f:
+            writer = MarkdownArchiveWriter(f) if markdown else JsonlArchiveWriter(f)
+            for record in archive_records(store, conversation_ids):
+                _check_stop(stop)
+                writer.write(record)
+                if record['type'] == 'conversation':
+                    conversations += 1
+                else:
+                    messages += 1
+                    if progress is not None and messages % PROGRESS_EVERY == 0:
+                        progress(messages)
+        os.replace(partial, path)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    return {"path": path, "conversations": conversations, "messages": messages,
+            "bytes": os.path.getsize(path)}
+
+def import_archive(store, path, progress=None, stop=None, batch_size=IMPORT_BATCH):
+    # Reads the archive line by line and writes it through the store in batches. Parsing only
+    # runs IMPORT_IN_FLIGHT batches ahead of the writer thread, so memory stays bounded
+    # without the two taking turns. Messages are renumbered 0..n-1 per conversation, which is what
+    # paging and the summaries expect. On failure whatever was already imported is removed
+    # again, including when stop is set. Blocking; "ids" are the new conversation ids in
+    # archive order.
+    errors_before = store.error_count
+    imported = []
+    ids = {}
+    counts = {}
+    batch = []
+    batch_conversation = None
+    in_flight = []
+    messages = 0
+
+    def write_batch():
+        if batch:
+            store.add_messages(batch_conversation, list(batch))
+            batch.clear()
+            in_flight.append(store.checkpoint())
+            if len(in_flight) > IMPORT_IN_FLIGHT:
+                in_flight.pop(0).wait()
+
+    try:
+        with open(path, encoding='utf-8', newline='') as f:
+            if archive_format(path) == FORMAT_MARKDOWN:
+                records = read_markdown_archive(f, os.path.basename(path))
+            else:
+                records = read_jsonl_archive(f, os.path.basename(path))
+            for record in records:
+                _check_stop(stop)
+                kind = record.get('type')
+                if kind == 'conversation':
+                    write_batch()
+                    conversation_id = store.restore_conversation(record)
+                    ids[record.get('id')] = conversation_id
+                    counts[conversation_id] = 0
+                    imported.append(conversation_id)
+                elif kind == 'message':
+                    conversation_id = ids.get(record.get('conversation'))
+                    if conversation_id is None:
+                        raise Exception(f"Message for unknown conversation {record.get('conversation')}")
+                    if record.get('role') not in ('user', 'assistant', 'system'):
+                        raise Exception(f"Message with unknown role {record.get('role')}")
+                    if conversation_id != batch_conversation:
+                        write_batch()
+                        batch_conversation = conversation_id
+                    batch.append((counts[conversation_id], record['role'], record.get('content') or "",
+                                  record.get('thinking') or "", record.get('created_at') or time.time(),
+                                  record.get('metrics')))
+                    counts[conversation_id] += 1
+                    messages += 1
+                    if len(batch) >= batch_size:
+                        write_batch()
+                    if progress is not None and messages % PROGRESS_EVERY == 0:
+                        progress(messages)
+        write_batch()
+        store.flush()
+        if store.error_count != errors_before:
+            raise Exception(f"Import failed: {store.last_error}")
+    except BaseException:
+        for conversation_id in imported:
+            store.delete_conversation(conversation_id)
+        store.flush()
+        raise
+    return {"path": path, "conversations": len(imported), "messages": messages, "ids": imported}
@@ -0,0 +1,353 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+
+DEFAULT_DB_PATH = os.path.join(os.path.expanduser("~"), ".jgxaai", "history.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL DEFAULT '',
+    model TEXT NOT NULL DEFAULT '',
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    titled INTEGER NOT NULL DEFAULT 0,
+    summary TEXT NOT NULL DEFAULT '',
+    summarized_upto INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    conversation_id TEXT NOT NULL REFERENCES conversations(id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    metrics TEXT,
+    UNIQUE (conversation_id, seq)
+);
+CREATE TABLE IF NOT EXISTS thinking (
+    message_id INTEGER PRIMARY KEY REFERENCES messages(id) ON DELETE CASCADE,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS conversations_updated ON conversations(updated_at);
+"""
+
+# Full-text index over message and reasoning text, keyed by messages.id
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE message_search USING fts5(
+    content, thinking, conversation_id UNINDEXED, tokenize = 'unicode61'
+);
+INSERT INTO message_search (rowid, content, thinking, conversation_id)
+    SELECT m.id, m.content, COALESCE(t.content, ''), m.conversation_id
+    FROM messages m LEFT JOIN thinking t ON t.message_id = m.id;
+"""
+
+_STOP = object()
+
+def _write_message(c, conversation_id, seq, role, content, thinking, created_at, metrics_json):
+    replaced = c.execute("SELECT id FROM messages WHERE conversation_id = ? AND seq = ?",
+                         (conversation_id, seq)).fetchone()
+    if replaced is not None:
+        c.execute("DELETE FROM message_search WHERE rowid = ?", (replaced[0],))
+    cursor = c.execute(
+        "INSERT OR REPLACE INTO messages (conversation_id, seq, role, content, created_at, metrics) "
+        "VALUES (?, ?, ?, ?, ?, ?)", (conversation_id, seq, role, content, created_at, metrics_json))
+    message_id = cursor.lastrowid
+    if thinking:
+        c.execute("INSERT OR REPLACE INTO thinking (message_id, content) VALUES (?, ?)",
+                  (message_id, thinking))
+    c.execute("INSERT INTO message_search (rowid, content, thinking, conversation_id) "
+              "VALUES (?, ?, ?, ?)", (message_id, content, thinking, conversation_id))
+
+# SQLite (WAL) history. Reads run on the caller's connection; writes are queued and
+# committed in batches by a background thread so they never block the UI. A write that fails
+# bumps error_count, sets last_error and is passed to on_error (called on the writer thread).
+class ConversationStore:
+    def __init__(self, path=DEFAULT_DB_PATH, batch_size=256, batch_window=0.05, on_error=None):
+        self.path = path
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.on_error = on_error
+        self.last_error = None
+        self.error_count = 0
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self.connection = self._connect()
+        self.connection.executescript(SCHEMA)
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(messages)")]
+        if 'metrics' not in columns:
+            self.connection.execute("ALTER TABLE messages ADD COLUMN metrics TEXT")
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(conversations)")]
+        if 'titled' not in columns:
+            # Background titling and running summaries (ui/idle_jobs.py)
+            self.connection.execute("ALTER TABLE conversations ADD COLUMN titled INTEGER NOT NULL DEFAULT 0")
+            self.connection.execute("ALTER TABLE conversations ADD COLUMN summary TEXT NOT NULL DEFAULT ''")
+            self.connection.execute(
+                "ALTER TABLE conversations ADD COLUMN summarized_upto INTEGER NOT NULL DEFAULT 0")
+        has_search = self.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'message_search'").fetchone()
+        if not has_search:
+            self.connection.executescript(SEARCH_SCHEMA)
+        self.connection.commit()
+
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="conversation-store", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA busy_timeout=5000")
+        connection.execute("PRAGMA foreign_keys=ON")
+        return connection
+
+    def _write_loop(self):
+        connection = self._connect()
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.batch_size and batch[-1] is not _STOP:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            try:
+                operations = [item for item in batch if item is not _STOP]
+                running = len(operations) == len(batch)
+                self._apply(connection, operations)
+            finally:
+                # Whatever happened, flush() and checkpoint() waiters must not hang
+                for _ in batch:
+                    self._queue.task_done()
+        connection.close()
+
+    def _apply(self, connection, operations):
+        try:
+            with connection:
+                for operation in operations:
+                    operation(connection)
+            return
+        except Exception as e:
+            if len(operations) == 1:
+                self._failed(e)
+                return
+        # The batch was rolled back as a whole; redo its writes one at a time so only the
+        # failing one is lost
+        for operation in operations:
+            try:
+                with connection:
+                    operation(connection)
+            except Exception as e:
+                self._failed(e)
+
+    def _failed(self, error):
+        self.last_error = str(error)
+        self.error_count += 1
+        if self.on_error is not None:
+            try:
+                self.on_error(self.last_error)
+            except Exception:
+                pass
+
+    def _submit(self, operation):
+        self._queue.put(operation)
+
+    def flush(self):
+        self._queue.join()
+
+    def checkpoint(self):
+        # An Event set once the writer has applied everything queued before it; lets a bulk
+        # writer keep a bounded number of writes in flight without draining the queue each time
+        reached = threading.Event()
+        self._submit(lambda c: reached.set())
+        return reached
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._writer.join()
+        self.connection.close()
+
+    def create_conversation(self, model, title=""):
+        conversation_id = uuid.uuid4().hex
+        now = time.time()
+        self._submit(lambda c: c.execute(
+            "INSERT INTO conversations (id, title, model, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (conversation_id, title, model, now, now)))
+        return conversation_id
+
+    def set_title(self, conversation_id, title, generated=False):
+        self._submit(lambda c: c.execute(
+            "UPDATE conversations SET title = ?, titled = ? WHERE id = ?",
+            (title, 1 if generated else 0, conversation_id)))
+
+    def set_summary(self, conversation_id, summary, summarized_upto):
+        # summarized_upto is the seq of the first message the summary doesn't cover yet
+        self._submit(lambda c: c.execute(
+            "UPDATE conversations SET summary = ?, summarized_upto = ? WHERE id = ?",
+            (summary, summarized_upto, conversation_id)))
+
+    def delete_conversation(self, conversation_id):
+        def write(c):
+            c.execute("DELETE FROM message_search WHERE rowid IN "
+                      "(SELECT id FROM messages WHERE conversation_id = ?)", (conversation_id,))
+            c.execute("DELETE FROM conversations WHERE id = ?", (conversation_id,))
+        self._submit(write)
+
+    def add_message(self, conversation_id, seq, role, content, thinking="", model=None, metrics=None):
+        now = time.time()
+        metrics_json = json.dumps(metrics) if metrics else None
+
+        def write(c):
+            _write_message(c, conversation_id, seq, role, content, thinking, now, metrics_json)
+            if model:
+                c.execute("UPDATE conversations SET updated_at = ?, model = ? WHERE id = ?",
+                          (now, model, conversation_id))
+            else:
+                c.execute("UPDATE conversations SET updated_at = ? WHERE id = ?", (now, conversation_id))
+        self._submit(write)
+
+    def restore_conversation(self, conversation):
+        # A conversation read back from an archive (storage/archive.py). It always gets a new id,
+        # so importing the same archive twice can't overwrite anything.
+        conversation_id = uuid.uuid4().hex
+        now = time.time()
+        self._submit(lambda c: c.execute(
+            "INSERT INTO conversations (id, title, model, created_at, updated_at, titled, summary, summarized_upto) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (conversation_id, conversation.get('title') or "", conversation.get('model') or "",
+             conversation.get('created_at') or now, conversation.get('updated_at') or now,
+             1 if conversation.get('titled') else 0, conversation.get('summary') or "",
+             int(conversation.get('summarized_upto') or 0))))
+        return conversation_id
+
+    def add_messages(self, conversation_id, messages):
+        # [(seq, role, content, thinking, created_at, metrics)] in one write; unlike add_message
+        # this leaves the conversation's updated_at alone
+        rows = [(seq, role, content, thinking, created_at, json.dumps(metrics) if metrics else None)
+                for seq, role, content, thinking, created_at, metrics in messages]
+
+        def write(c):
+            for seq, role, content, thinking, created_at, metrics_json in rows:
+                _write_message(c, conversation_id, seq, role, content, thinking, created_at, metrics_json)
+        self._submit(write)
+
+    def list_conversations(self, limit=200):
+        rows = self.connection.execute(
+            "SELECT id, title, model, created_at, updated_at, summary FROM conversations "
+            "ORDER BY updated_at DESC LIMIT ?", (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_conversation(self, conversation_id):
+        row = self.connection.execute(
+            "SELECT id, title, model, created_at, updated_at, titled, summary, summarized_upto "
+            "FROM conversations WHERE id = ?",
+            (conversation_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def background_candidates(self, min_new_messages, limit=200):
+        # Conversations still carrying their placeholder title, or with min_new_messages or
+        # more messages past their running summary; most recently used first
+        rows = self.connection.execute(
+            "SELECT c.id, c.titled, c.summary, c.summarized_upto, COUNT(m.id) AS messages "
+            "FROM conversations c JOIN messages m ON m.conversation_id = c.id "
+            "GROUP BY c.id "
+            "HAVING (c.titled = 0 AND COUNT(m.id) >= 2) OR MAX(m.seq) + 1 - c.summarized_upto >= ? "
+            "ORDER BY c.updated_at DESC LIMIT ?", (min_new_messages, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def message_count(self, conversation_id):
+        return self.connection.execute(
+            "SELECT COUNT(*) FROM messages WHERE conversation_id = ?", (conversation_id,)).fetchone()[0]
+
+    def load_page(self, conversation_id, before_seq=None, limit=50):
+        if before_seq is None:
+            before_seq = 1 << 62
+        rows = self.connection.execute(
+            "SELECT m.seq, m.role, m.content, COALESCE(t.content, '') AS thinking, m.metrics "
+            "FROM messages m LEFT JOIN thinking t ON t.message_id = m.id "
+            "WHERE m.conversation_id = ? AND m.seq < ? ORDER BY m.seq DESC LIMIT ?",
+            (conversation_id, before_seq, limit)).fetchall()
+        return [dict(row) for row in reversed(rows)]
+
+    def load_page_after(self, conversation_id, after_seq, limit=50):
+        rows = self.connection.execute(
+            "SELECT m.seq, m.role, m.content, COALESCE(t.content, '') AS thinking, m.metrics "
+            "FROM messages m LEFT JOIN thinking t ON t.message_id = m.id "
+            "WHERE m.conversation_id = ? AND m.seq > ? ORDER BY m.seq LIMIT ?",
+            (conversation_id, after_seq, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def search(self, query, limit=50):
+        # Each word becomes a quoted prefix term, so user input can't break FTS5 syntax
+        terms = [word.replace('"', '""') for word in query.split()]
+        if not terms:
+            return []
+        match = " ".join(f'"{term}"*' for term in terms)
+        try:
+            rows = self.connection.execute(
+                "SELECT m.conversation_id, m.seq, m.role, c.title, "
+                "snippet(message_search, -1, '[', ']', '...', 10) AS snippet "
+                "FROM message_search s "
+                "JOIN messages m ON m.id = s.rowid "
+                "JOIN conversations c ON c.id = m.conversation_id "
+                "WHERE message_search MATCH ? "
+                "ORDER BY bm25(message_search, 1.0, 0.5) LIMIT ?",
+                (match, limit)).fetchall()
+        except sqlite3.OperationalError:
+            return []
+        return [dict(row) for row in rows]
+
+    def load_metrics(self, conversation_id=None):
+        if conversation_id is None:
+            rows = self.connection.execute(
+                "SELECT metrics FROM messages WHERE metrics IS NOT NULL ORDER BY created_at").fetchall()
+        else:
+            rows = self.connection.execute(
+                "SELECT metrics FROM messages WHERE conversation_id = ? AND metrics IS NOT NULL "
+                "ORDER BY seq", (conversation_id,)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def load_history(self, conversation_id, from_seq=0):
+        rows = self.connection.execute(
+            "SELECT role, content FROM messages WHERE conversation_id = ? AND seq >= ? ORDER BY seq",
+            (conversation_id, from_seq)).fetchall()
+        return [(row[0], row[1]) for row in rows]
+
+    def iter_archive(self, conversation_ids=None):
+        # Yields ('conversation', row) followed by that conversation's ('message', row)s, oldest
+        # first, straight off SQLite cursors. Runs on a connection of its own inside one read
+        # transaction, so it is meant for a worker thread and a reply saved meanwhile can't tear
+        # the output. All conversations, oldest first, when conversation_ids is None.
+        connection = self._connect()
+        try:
+            connection.execute("BEGIN")
+            if conversation_ids is None:
+                conversation_ids = [row[0] for row in connection.execute(
+                    "SELECT id FROM conversations ORDER BY created_at")]
+            for conversation_id in conversation_ids:
+                row = connection.execute(
+                    "SELECT id, title, model, created_at, updated_at, titled, summary, summarized_upto "
+                    "FROM conversations WHERE id = ?", (conversation_id,)).fetchone()
+                if row is None:
+                    continue
+                yield 'conversation', dict(row)
+                for message in connection.execute(
+                        "SELECT m.seq, m.role, m.content, COALESCE(t.content, '') AS thinking, m.created_at, "
+                        "m.metrics FROM messages m LEFT JOIN thinking t ON t.message_id = m.id "
+                        "WHERE m.conversation_id = ? ORDER BY m.seq", (conversation_id,)):
+                    yield 'message', dict(message)
+        finally:
+            connection.close()
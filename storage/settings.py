@@ -0,0 +1,37 @@
+import json
+import os
+
+DEFAULT_SETTINGS_PATH = os.path.join(os.path.expanduser("~"), ".jgxaai", "settings.json")
+
+# Small JSON file for state the window needs before Ollama answers, such as the
+# last known model list and the last model used.
+class Settings:
+    def __init__(self, path=DEFAULT_SETTINGS_PATH):
+        self.path = path
+        try:
+            with open(path, encoding='utf-8') as f:
+                self.values = json.load(f)
+        except (OSError, ValueError):
+            self.values = {}
+        if not isinstance(self.values, dict):
+            self.values = {}
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+    def set(self, key, value):
+        if self.values.get(key) == value:
+            return
+        self.values[key] = value
+        self.save()
+
+    def save(self):
+        # Write to a temporary file and swap it in, so a crash never leaves half a file
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temp_path = self.path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.values, f, indent=2)
+            os.replace(temp_path, self.path)
+        except OSError:
+            pass
@@ -0,0 +1,199 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import numpy as np
+
+DEFAULT_INDEX_DIR = os.path.join(os.path.expanduser("~"), ".jgxaai", "rag")
+INITIAL_ROWS = 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    row INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    start_line INTEGER NOT NULL,
+    end_line INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chunks_path ON chunks(path);
+"""
+
+def index_dir_for(root, base=DEFAULT_INDEX_DIR):
+    # One index per attached file or folder
+    digest = hashlib.sha1(os.path.abspath(root).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(base, digest)
+
+# Chunk embeddings for one attached root. Vectors are L2-normalised float32 rows in a
+# memory-mapped matrix (vectors.f32); SQLite holds which file each row came from, the chunk
+# text, and each file's mtime/size/hash so a refresh can skip what hasn't changed. Rows of
+# removed chunks are recycled. A different embedding model (or dimension) starts the index
+# over. Safe to share between threads.
+class VectorIndex:
+    def __init__(self, directory, model):
+        self.directory = directory
+        self.model = model
+        self.dim = None
+        self.vectors = None
+        self.live = np.zeros(0, dtype=bool)
+        self.rows = 0
+        self._free = []
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.connection = sqlite3.connect(os.path.join(directory, "index.db"), check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+
+        meta = dict(self.connection.execute("SELECT key, value FROM meta"))
+        if meta.get('model') != model:
+            self._reset()
+        elif meta.get('dim'):
+            self.dim = int(meta['dim'])
+            self._load()
+
+    def _reset(self):
+        with self.connection:
+            self.connection.execute("DELETE FROM files")
+            self.connection.execute("DELETE FROM chunks")
+            self.connection.execute("DELETE FROM meta")
+            self.connection.execute("INSERT INTO meta (key, value) VALUES ('model', ?)", (self.model,))
+        if os.path.exists(self.vectors_path):
+            os.remove(self.vectors_path)
+
+    def _load(self):
+        capacity = os.path.getsize(self.vectors_path) // (4 * self.dim) if os.path.exists(self.vectors_path) else 0
+        used = [row for (row,) in self.connection.execute("SELECT row FROM chunks")]
+        self.rows = max(used) + 1 if used else 0
+        if capacity < self.rows:
+            # Vectors file lost or truncated; nothing in it can be trusted
+            self._reset()
+            self.dim = None
+            self.rows = 0
+            return
+        self._map(capacity)
+        self.live[used] = True
+        self._free = [row for row in range(self.rows) if not self.live[row]]
+
+    def _map(self, capacity):
+        if self.vectors is not None:
+            self.vectors.flush()
+            self.vectors = None
+        with open(self.vectors_path, 'ab') as f:
+            f.truncate(capacity * 4 * self.dim)
+        self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode='r+', shape=(capacity, self.dim))
+        live = np.zeros(capacity, dtype=bool)
+        live[:len(self.live)] = self.live[:capacity]
+        self.live = live
+
+    def _allocate(self, count):
+        rows = self._free[:count]
+        del self._free[:count]
+        while len(rows) < count:
+            rows.append(self.rows)
+            self.rows += 1
+        if self.rows > len(self.live):
+            capacity = max(INITIAL_ROWS, len(self.live))
+            while capacity < self.rows:
+                capacity *= 2
+            self._map(capacity)
+        return rows
+
+    def file_states(self):
+        with self._lock:
+            return {path: (mtime, size, sha) for path, mtime, size, sha
+                    in self.connection.execute("SELECT path, mtime, size, sha256 FROM files")}
+
+    def touch_files(self, files):
+        # [(path, mtime, size)] whose content is unchanged (same hash); only the stat moved
+        with self._lock, self.connection:
+            self.connection.executemany("UPDATE files SET mtime = ?, size = ? WHERE path = ?",
+                                        [(mtime, size, path) for path, mtime, size in files])
+
+    def replace_files(self, files):
+        # [(path, mtime, size, sha256, chunks, vectors)] with chunks as [(start_line, end_line, text)]
+        # and vectors the matching (len(chunks), dim) embeddings; one transaction for the lot
+        with self._lock, self.connection:
+            for path, mtime, size, sha, chunks, vectors in files:
+                self._replace(path, mtime, size, sha, chunks, vectors)
+
+    def _replace(self, path, mtime, size, sha, chunks, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(chunks), -1)
+        if len(chunks) and self.dim is None:
+            self.dim = vectors.shape[1]
+            self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('dim', ?)", (str(self.dim),))
+        if len(chunks) and vectors.shape[1] != self.dim:
+            raise Exception(f"Embedding size changed from {self.dim} to {vectors.shape[1]}; re-create the index")
+        self._drop_rows(path)
+        rows = self._allocate(len(chunks)) if len(chunks) else []
+        if rows:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            self.vectors[rows] = vectors / np.maximum(norms, 1e-12)
+            self.live[rows] = True
+        self.connection.executemany(
+            "INSERT INTO chunks (row, path, start_line, end_line, text) VALUES (?, ?, ?, ?, ?)",
+            [(row, path, start, end, text) for row, (start, end, text) in zip(rows, chunks)])
+        self.connection.execute("INSERT OR REPLACE INTO files (path, mtime, size, sha256) VALUES (?, ?, ?, ?)",
+                                (path, mtime, size, sha))
+
+    def remove_files(self, paths):
+        with self._lock, self.connection:
+            for path in paths:
+                self._drop_rows(path)
+                self.connection.execute("DELETE FROM files WHERE path = ?", (path,))
+
+    def _drop_rows(self, path):
+        rows = [row for (row,) in self.connection.execute("SELECT row FROM chunks WHERE path = ?", (path,))]
+        if not rows:
+            return
+        self.live[rows] = False
+        self._free.extend(rows)
+        self.connection.execute("DELETE FROM chunks WHERE path = ?", (path,))
+
+    def flush(self):
+        with self._lock:
+            if self.vectors is not None:
+                self.vectors.flush()
+
+    def chunk_count(self):
+        with self._lock:
+            return int(self.live[:self.rows].sum())
+
+    def search(self, query, k=5):
+        # Cosine similarity against every chunk as one matrix-vector product
+        with self._lock:
+            if self.vectors is None or not self.rows:
+                return []
+            query = np.asarray(query, dtype=np.float32)
+            if query.shape != (self.dim,):
+                raise Exception(f"Query embedding has size {query.size}, index expects {self.dim}")
+            scores = self.vectors[:self.rows] @ (query / max(float(np.linalg.norm(query)), 1e-12))
+            scores[~self.live[:self.rows]] = -np.inf
+            k = min(k, int(self.live[:self.rows].sum()))
+            if k <= 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            found = {row: (path, start, end, text) for row, path, start, end, text in self.connection.execute(
+                f"SELECT row, path, start_line, end_line, text FROM chunks WHERE row IN ({','.join('?' * len(top))})",
+                [int(row) for row in top])}
+        return [(float(scores[row]),) + found[int(row)] for row in top if int(row) in found]
+
+    def close(self):
+        with self._lock:
+            if self.vectors is not None:
+                self.vectors.flush()
+                self.vectors = None
+            self.connection.close()
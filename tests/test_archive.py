@@ -0,0 +1,98 @@
+import io
+import pytest
+from storage.archive import (export_archive, import_archive, archive_records, read_markdown_archive,
+                             MarkdownArchiveWriter, MARKER, CONTENT_END)
+from storage.conversation_store import ConversationStore
+
+# Text that looks like the Markdown archive's own markers, escapes and comment ends
+TRICKY = [
+    "plain",
+    "",
+    "two\nlines\n",
+    "windows\r\nline endings\r\n",
+    f"{MARKER}content{' -->'}\nstill content",
+    f"{CONTENT_END}\nafter the end marker",
+    f"\\{MARKER}end -->\n\\\\{MARKER}message {{}} -->",
+    "a comment end --> inside",
+    "trailing newlines\n\n\n",
+]
+
+@pytest.fixture
+def store(tmp_path):
+    store = ConversationStore(str(tmp_path / "history.db"))
+    yield store
+    store.close()
+
+def fill(store):
+    conversation_id = store.create_conversation("llama3", "title --> with \"quotes\"\nand a newline")
+    store.set_summary(conversation_id, "summary\n> quoted -->", 2)
+    for seq, content in enumerate(TRICKY):
+        role = "user" if seq % 2 == 0 else "assistant"
+        thinking = TRICKY[-1 - seq] if role == "assistant" else ""
+        metrics = {"eval_count": seq, "ttft_ms": 12.5} if role == "assistant" else None
+        store.add_message(conversation_id, seq, role, content, thinking, metrics=metrics)
+    store.create_conversation("qwen", "empty")
+    store.flush()
+
+def comparable(records):
+    # Imports get new ids and timestamps
+    result = []
+    for record in records:
+        record = dict(record)
+        for field in ('id', 'conversation', 'updated_at'):
+            record.pop(field, None)
+        result.append(record)
+    return result
+
+@pytest.mark.parametrize("name", ["archive.jsonl", "archive.md"])
+def test_round_trip(store, tmp_path, name):
+    fill(store)
+    path = str(tmp_path / name)
+    exported = export_archive(store, path)
+    assert (exported["conversations"], exported["messages"]) == (2, len(TRICKY))
+
+    target = ConversationStore(str(tmp_path / "imported.db"))
+    try:
+        imported = import_archive(target, path, batch_size=4)
+        assert (imported["conversations"], imported["messages"]) == (2, len(TRICKY))
+        assert comparable(archive_records(target, imported["ids"])) == comparable(archive_records(store))
+    finally:
+        target.close()
+
+def test_markdown_escapes_markers_in_text():
+    f = io.StringIO(newline="")
+    writer = MarkdownArchiveWriter(f)
+    writer.write({"type": "conversation", "id": "c", "title": "t", "model": "m", "created_at": 1,
+                  "updated_at": 1, "titled": False, "summary": "", "summarized_upto": 0})
+    for seq, content in enumerate(TRICKY):
+        writer.write({"type": "message", "conversation": "c", "seq": seq, "role": "user", "content": content,
+                      "thinking": content, "created_at": 1, "metrics": None})
+
+    # No line of message text can pass for a marker: archive and conversation, then per message
+    # its own marker, content and end, and thinking and end unless the thinking is empty
+    lines = f.getvalue().splitlines()
+    markers = [line for line in lines if line.startswith(MARKER)]
+    assert len(markers) == 2 + 3 * len(TRICKY) + 2 * len([text for text in TRICKY if text])
+
+    f.seek(0)
+    records = list(read_markdown_archive(f))
+    assert [record['content'] for record in records[1:]] == TRICKY
+    assert [record['thinking'] for record in records[1:]] == TRICKY
+
+def test_not_an_archive(tmp_path, store):
+    path = tmp_path / "notes.md"
+    path.write_text("# just notes\n")
+    with pytest.raises(Exception, match="not a JGxAAI Markdown archive"):
+        import_archive(store, str(path))
+
+def test_failed_import_leaves_nothing_behind(store, tmp_path):
+    fill(store)
+    path = str(tmp_path / "archive.jsonl")
+    export_archive(store, path)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"type": "message", "conversation": "missing", "role": "user", "content": "x"}\n')
+    before = len(store.list_conversations())
+    with pytest.raises(Exception, match="unknown conversation"):
+        import_archive(store, path)
+    store.flush()
+    assert len(store.list_conversations()) == before
@@ -0,0 +1,75 @@
+import asyncio
+import time
+import pytest
+from api.async_client import AsyncOllamaClient
+from api.metrics import ResponseMetrics
+from api.ollama_client import OllamaClient
+from bench.mock_ollama import MockOllama
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+def joined(events):
+    return {kind: "".join(text for k, text in events if k == kind) for kind in ('thinking', 'message')}
+
+@pytest.mark.parametrize("split", ["clean", "adversarial"])
+def test_stream_matches_the_blocking_client(split):
+    async def stream(base_url, metrics):
+        client = AsyncOllamaClient(base_url)
+        try:
+            return [event async for event in client.chat_stream("mock:latest", MESSAGES, metrics)]
+        finally:
+            await client.close()
+
+    with MockOllama(think_tokens=16, answer_tokens=64, split=split) as server:
+        metrics = ResponseMetrics("mock:latest")
+        events = asyncio.run(stream(server.base_url, metrics))
+        expected = list(OllamaClient(server.base_url).chat_stream("mock:latest", MESSAGES))
+    assert joined(events) == joined(expected)
+    assert joined(events)['thinking'] and joined(events)['message']
+    assert metrics.first_token is not None
+    assert metrics.to_dict()["eval_count"] == 80
+
+def test_cancelling_a_stream_hangs_up():
+    async def run(server):
+        client = AsyncOllamaClient(server.base_url)
+        received = []
+
+        async def consume():
+            async for event in client.chat_stream("mock:latest", MESSAGES):
+                received.append(event)
+
+        try:
+            task = asyncio.ensure_future(consume())
+            while len(received) < 3:
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            # The same session serves the next request
+            server.tokens_per_second = 0
+            return [event async for event in client.chat_stream("mock:latest", MESSAGES)]
+        finally:
+            await client.close()
+
+    with MockOllama(tokens_per_second=200, think_tokens=0, answer_tokens=2000) as server:
+        events = asyncio.run(run(server))
+        # Closing the connection is what makes Ollama stop generating
+        deadline = time.monotonic() + 5
+        while server.requests_aborted == 0:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+    assert len(joined(events)['message']) > 2000
+
+def test_http_errors_keep_their_status():
+    async def run(base_url):
+        client = AsyncOllamaClient(base_url)
+        try:
+            with pytest.raises(Exception, match="not found|404") as info:
+                await client.show("missing")
+            return info.value
+        finally:
+            await client.close()
+
+    with MockOllama() as server:
+        error = asyncio.run(run(server.base_url))
+    assert error.__cause__.status == 404
@@ -0,0 +1,51 @@
+import io
+import json
+import pytest
+from bench.mock_ollama import MockOllama
+from cli.batch import BatchRunner, load_prompts
+from main import parse_args
+
+def test_load_prompts(tmp_path):
+    path = tmp_path / "prompts.jsonl"
+    path.write_text('"plain"\n\n# a comment\n{"prompt": "object", "id": "x", "model": "m"}\n')
+    assert load_prompts(str(path)) == [{"prompt": "plain", "id": 1},
+                                       {"prompt": "object", "id": "x", "model": "m"}]
+
+@pytest.mark.parametrize("line, error", [("{not json", "invalid JSON"), ('{"id": 1}', "expected a string"),
+                                         ("3", "expected a string")])
+def test_load_prompts_rejects_bad_lines(tmp_path, line, error):
+    path = tmp_path / "prompts.jsonl"
+    path.write_text(f'"fine"\n{line}\n')
+    with pytest.raises(Exception, match=f"prompts.jsonl:2: {error}"):
+        load_prompts(str(path))
+
+def test_run_writes_a_record_per_prompt():
+    prompts = [{"prompt": f"question {i}", "id": i} for i in range(6)]
+    prompts.append({"prompt": "no such model", "id": "bad", "model": "missing"})
+    output = io.StringIO()
+    progress = io.StringIO()
+    with MockOllama(models=("mock:latest",), think_tokens=4, answer_tokens=8) as server:
+        runner = BatchRunner(server.base_url, "mock:latest", concurrency=3, output=output, progress=progress)
+        assert not runner.run(prompts)
+
+    records = {record["id"]: record for record in map(json.loads, output.getvalue().splitlines())}
+    assert set(records) == {0, 1, 2, 3, 4, 5, "bad"}
+    assert (runner.completed, runner.failed) == (7, 1)
+    assert all(records[i]["response"] and records[i]["thinking"] and records[i]["error"] is None
+               for i in range(6))
+    assert records[0]["metrics"]["eval_count"] == 12
+    assert "404" in records["bad"]["error"]
+    assert "DONE 6/7 ok, 1 failed" in progress.getvalue()
+
+def test_prompt_without_a_model_fails_alone():
+    record = BatchRunner(concurrency=1).run_one({"prompt": "hi", "id": 1})
+    assert record["error"].startswith("No model given")
+
+def test_unknown_options_only_pass_to_qt_in_gui_mode(capsys):
+    args, qt_args = parse_args(["-style", "fusion", "--model", "m"])
+    assert qt_args == ["-style", "fusion"]
+    assert args.model == "m"
+    for headless in (["--batch", "p.jsonl"], ["--export", "a.jsonl"], ["--import", "a.jsonl"]):
+        with pytest.raises(SystemExit):
+            parse_args(headless + ["--modle", "m"])
+        assert "unrecognized arguments: --modle" in capsys.readouterr().err
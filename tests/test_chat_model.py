@@ -0,0 +1,48 @@
+import os
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from ui.chat_model import ChatMessageModel, COMPACT_MIN_CHARS, KIND_ASSISTANT, KIND_THINKING, KIND_USER
+
+LONG = "".join(f"step {i}: check the next branch\n" for i in range(400))
+
+def test_streamed_reasoning_is_compacted_once_finished():
+    model = ChatMessageModel()
+    row = model.append_message(KIND_THINKING)
+    for line in LONG.splitlines(keepends=True):
+        model.append_text(row, line)
+    assert model.stored_size(row) == len(LONG)
+    model.compact(row)
+    assert model.stored_size(row) < len(LONG) / 4
+    assert model.text(row) == LONG
+    assert model.data(model.index(row)) == LONG
+
+    # More text unpacks it again
+    model.append_text(row, "done")
+    assert model.text(row) == LONG + "done"
+    assert model.stored_size(row) == len(LONG) + 4
+
+def test_only_long_reasoning_is_compacted():
+    model = ChatMessageModel()
+    model.extend_messages([(KIND_THINKING, "x" * (COMPACT_MIN_CHARS - 1)), (KIND_THINKING, LONG),
+                           (KIND_ASSISTANT, LONG)])
+    assert model.stored_size(0) == COMPACT_MIN_CHARS - 1
+    assert model.stored_size(1) < len(LONG)
+    assert model.stored_size(2) == len(LONG)
+    model.compact(0)
+    assert model.stored_size(0) == COMPACT_MIN_CHARS - 1
+
+def test_set_text_replaces_packed_text():
+    model = ChatMessageModel()
+    row = model.append_message(KIND_THINKING, LONG)
+    model.set_text(row, "short")
+    assert model.text(row) == "short"
+    assert model.stored_size(row) == 5
+
+def test_keys_survive_prepending():
+    model = ChatMessageModel()
+    model.append_message(KIND_USER, "newest")
+    key = model.key(0)
+    model.prepend_messages([(KIND_USER, "older"), (KIND_ASSISTANT, "reply")])
+    assert model.key(2) == key
+    assert len({model.key(row) for row in range(3)}) == 3
+    assert [model.text(row) for row in range(3)] == ["older", "reply", "newest"]
@@ -0,0 +1,61 @@
+import os
+import types
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtWidgets import QApplication
+from ui.chat_tab import ChatTab
+
+class FakeIndex:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+class FakeWorker(QObject):
+    message_received = Signal(str)
+    thinking_received = Signal(str)
+    error_occurred = Signal(str)
+    response_started = Signal()
+    metrics_ready = Signal(object)
+    finished = Signal()
+
+    model = "m"
+    stopped = False
+
+    def stop(self):
+        self.stopped = True
+
+def tab_with_attachment():
+    app = QApplication.instance() or QApplication([])
+    tab = ChatTab(store=None)
+    index = FakeIndex()
+    tab.attachments = [types.SimpleNamespace(root="/docs", index=index)]
+    return tab, index
+
+def test_shutdown_closes_attachments_after_the_reply():
+    tab, index = tab_with_attachment()
+    worker = FakeWorker()
+    tab.start_reply(worker)
+    tab.shutdown()
+    # The stopped reply's retriever may still be reading the index
+    assert worker.stopped
+    assert not index.closed
+    worker.finished.emit()
+    assert index.closed
+    assert tab.attachments == []
+
+def test_shutdown_without_a_reply_closes_at_once():
+    tab, index = tab_with_attachment()
+    tab.shutdown()
+    assert index.closed
+
+def test_refresh_in_flight_keeps_attachments_open():
+    tab, index = tab_with_attachment()
+    tab.refreshing += 1
+    assert not tab.detach_all()
+    tab.shutdown()
+    assert not index.closed
+    tab.refresh_finished()
+    assert index.closed
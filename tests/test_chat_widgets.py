@@ -0,0 +1,99 @@
+import os
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PySide6.QtWidgets import QApplication
+from ui.chat_widgets import StreamingMessageBubble
+
+def bubble(is_user=False):
+    app = QApplication.instance() or QApplication([])
+    return StreamingMessageBubble(is_user)
+
+def test_tokens_are_batched_until_the_flush():
+    widget = bubble()
+    document = widget.document().toPlainText()
+    for token in ["Hello", ", ", "world"]:
+        widget.append_text(token)
+    assert widget.document().toPlainText() == document
+    assert widget.first_flush_at is None
+
+    widget.flush()
+    assert widget.text() == "Hello, world"
+    assert widget.document().toPlainText() == "[ASSISTANT] Hello, world"
+    assert widget.first_flush_at is not None
+
+def test_streamed_text_keeps_no_undo_history():
+    widget = bubble(is_user=True)
+    assert not widget.isUndoRedoEnabled()
+    for i in range(3):
+        widget.append_text(f"line {i}\n")
+        widget.flush()
+    assert widget.document().availableUndoSteps() == 0
+    assert widget.text() == "line 0\nline 1\nline 2\n"
+
+def test_long_reasoning_loads_a_slice_per_frame():
+    from ui.chat_widgets import ThinkingSection, THINKING_FIRST_CHARS
+    app = QApplication.instance() or QApplication([])
+    section = ThinkingSection()
+    content = "".join(f"line {i} of the reasoning\n" for i in range(5000))
+    section.set_thinking_content(content)
+    first = section.content_area.toPlainText()
+    assert len(first) <= THINKING_FIRST_CHARS and first.endswith("\n")
+    # Streamed text queues behind what hasn't been laid out yet
+    section.add_thinking_content("more")
+    section.flush()
+    assert section.thinking_content == content + "more"
+    # The load timer lays the rest out one slice per frame
+    deadline = time.monotonic() + 5
+    while section.content_area.toPlainText() != content + "more":
+        assert time.monotonic() < deadline
+        QApplication.processEvents()
+        time.sleep(0.005)
+
+def chat_area(count):
+    from ui.chat_widgets import ChatArea
+    from ui.chat_model import KIND_ASSISTANT, KIND_USER
+    app = QApplication.instance() or QApplication([])
+    area = ChatArea()
+    area.resize(800, 600)
+    area.show()
+    area.append_messages([(KIND_USER if i % 2 == 0 else KIND_ASSISTANT, f"message {i} " + "words " * (i % 40))
+                          for i in range(count)])
+    QApplication.processEvents()
+    return area
+
+def test_rows_are_stacked_and_hit_tested():
+    from ui.chat_widgets import ROW_SPACING
+    area = chat_area(300)
+    model = area.message_model
+    for row in (0, 150, 299):
+        area.scroll_to_row(row, highlight=False)
+        rect = area.visualRect(model.index(row))
+        assert area.indexAt(rect.center()).row() == row
+    rects = [area.visualRect(model.index(row)) for row in range(300)]
+    assert all(b.top() - (a.top() + a.height()) == ROW_SPACING for a, b in zip(rects, rects[1:]))
+    scrollbar = area.verticalScrollBar()
+    content = rects[-1].top() + rects[-1].height() + ROW_SPACING + scrollbar.value()
+    assert scrollbar.maximum() == content - area.viewport().height()
+    area.close()
+
+def test_appending_measures_only_the_new_row():
+    area = chat_area(300)
+    measured = []
+    size_hint = area.delegate.sizeHint
+    area.delegate.sizeHint = lambda option, index: measured.append(index.row()) or size_hint(option, index)
+    area.add_message("one more")
+    assert measured == [300]
+    area.close()
+
+def test_prepending_history_keeps_the_reader_in_place():
+    from ui.chat_model import KIND_USER
+    area = chat_area(100)
+    area.scroll_to_row(50, highlight=False)
+    key = area.message_model.key(50)
+    top = area.visualRect(area.message_model.index(50)).top()
+    area.prepend_messages([(KIND_USER, f"older {i}") for i in range(40)])
+    QApplication.processEvents()
+    assert area.message_model.key(90) == key
+    assert area.visualRect(area.message_model.index(90)).top() == top
+    area.close()
@@ -0,0 +1,83 @@
+import asyncio
+import os
+import time
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QApplication
+from api.async_client import AsyncOllamaClient
+from bench.mock_ollama import MockOllama
+from ui.async_bridge import AsyncBridge
+from ui.compare_view import CompareWindow, StackedLimiter
+
+def test_window_cap_stays_under_the_shared_limit():
+    async def run():
+        shared = asyncio.Semaphore(2)
+        limiter = StackedLimiter(asyncio.Semaphore(3), shared)
+        running = []
+        peak = 0
+
+        async def stream():
+            nonlocal peak
+            async with limiter:
+                running.append(1)
+                peak = max(peak, len(running))
+                await asyncio.sleep(0.01)
+                running.pop()
+
+        # A main-window chat holds one of the two shared slots throughout
+        async with shared:
+            await asyncio.gather(*(stream() for _ in range(6)))
+        return peak, shared
+
+    peak, shared = asyncio.run(run())
+    assert peak == 1
+    assert not shared.locked()
+
+def test_cancelled_while_queued_gives_back_the_window_slot():
+    async def run():
+        window, shared = asyncio.Semaphore(1), asyncio.Semaphore(1)
+        limiter = StackedLimiter(window, shared)
+        async with shared:
+            async def enter():
+                async with limiter:
+                    pass
+            task = asyncio.ensure_future(enter())
+            await asyncio.sleep(0.01)
+            assert window.locked()
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        return window, shared
+
+    window, shared = asyncio.run(run())
+    assert not window.locked()
+    assert not shared.locked()
+
+def test_one_prompt_streams_to_every_selected_model():
+    app = QApplication.instance() or QApplication([])
+    models = ["a:latest", "b:latest", "c:latest"]
+    with MockOllama(models=models, tokens_per_second=2000, think_tokens=8, answer_tokens=32) as server:
+        bridge = AsyncBridge()
+        client = AsyncOllamaClient(server.base_url)
+        window = CompareWindow(bridge, client, models, "a:latest", limiter=asyncio.Semaphore(2))
+        try:
+            window.model_list.item(2).setCheckState(Qt.CheckState.Checked)
+            assert window.selected_models() == ["a:latest", "c:latest"]
+            window.prompt_input.setText("compare this")
+            window.run()
+            assert not window.run_button.isEnabled()
+            deadline = time.monotonic() + 10
+            while window.workers:
+                assert time.monotonic() < deadline
+                app.processEvents()
+                time.sleep(0.005)
+            assert [pane.model for pane in window.panes] == ["a:latest", "c:latest"]
+            for pane in window.panes:
+                assert pane.output.toPlainText().strip()
+                assert "tok/s" in pane.stats_label.text()
+            assert window.run_button.isEnabled()
+        finally:
+            window.close()
+            bridge.shutdown(client.close())
@@ -0,0 +1,104 @@
+from api.conversation import ConversationManager, context_window, estimate_tokens
+
+# 4 + 396 / 4 = 103 estimated tokens per message
+CONTENT = "x" * 396
+
+def manager(budget=1000, **kwargs):
+    return ConversationManager(default_budget=budget, reserve_tokens=0, **kwargs)
+
+def add_turns(conversation, turns):
+    for _ in range(turns):
+        conversation.add_message("user", CONTENT)
+        conversation.add_message("assistant", CONTENT)
+
+def test_everything_is_sent_while_it_fits():
+    conversation = manager(system_prompt="be brief")
+    add_turns(conversation, 2)
+    messages = conversation.build_messages("m")
+    assert messages[0] == {"role": "system", "content": "be brief"}
+    assert messages[1:] == conversation.messages
+
+def test_window_slides_to_a_user_message_and_fits_the_budget():
+    conversation = manager(keep_recent=4)
+    add_turns(conversation, 10)
+    assert estimate_tokens(CONTENT) == 103
+    messages = conversation.build_messages("m")
+    assert messages[0]['role'] == "user"
+    assert len(messages) >= 4
+    assert sum(estimate_tokens(m['content']) for m in messages) <= 1000
+    assert messages == conversation.messages[conversation.window_start:]
+
+def test_keep_recent_wins_over_the_budget():
+    conversation = manager(budget=300, keep_recent=4)
+    add_turns(conversation, 5)
+    assert len(conversation.build_messages("m")) == 4
+
+def test_window_start_is_sticky_until_it_overflows():
+    conversation = manager()
+    add_turns(conversation, 10)
+    first = conversation.build_messages("m")
+    start = conversation.window_start
+
+    # Later requests extend the previous one, so the server can reuse its prompt cache
+    add_turns(conversation, 1)
+    second = conversation.build_messages("m")
+    assert conversation.window_start == start
+    assert second[:len(first)] == first
+
+    for _ in range(10):
+        add_turns(conversation, 1)
+        conversation.build_messages("m")
+        if conversation.window_start != start:
+            break
+    assert conversation.window_start > start
+    assert conversation.messages[conversation.window_start]['role'] == "user"
+
+def test_budget_for_prefers_model_then_family_then_window():
+    conversation = ConversationManager(context_budgets={"llama3:8b": 8000, "qwen": 6000},
+                                       default_budget=2000, reserve_tokens=500)
+    assert conversation.budget_for("llama3:8b", 32768) == 7500
+    assert conversation.budget_for("qwen:14b", 32768) == 5500
+    assert conversation.budget_for("mistral", 16384) == 15884
+    assert conversation.budget_for("mistral") == 1500
+
+def test_retrieved_context_shrinks_the_window():
+    conversation = manager()
+    add_turns(conversation, 4)
+    assert conversation.build_messages("m", extra_tokens=0) == conversation.messages
+    assert len(conversation.build_messages("m", extra_tokens=400)) < len(conversation.messages)
+
+def test_summary_due_covers_only_the_turns_that_left_the_window():
+    conversation = manager(strategy='summarize')
+    add_turns(conversation, 10)
+    previous, messages, upto = conversation.summary_due("m")
+    assert previous == ""
+    assert messages == conversation.messages[:upto]
+
+    conversation.set_summary("SUMMARY", upto)
+    assert conversation.summary_due("m") is None
+    sent = conversation.build_messages("m")
+    assert sent[0] == {"role": "system", "content": "Summary of the earlier conversation:\nSUMMARY"}
+    assert sent[1:] == conversation.messages[upto:]
+
+def test_truncate_ignores_a_summary_it_does_not_need():
+    conversation = manager()
+    add_turns(conversation, 2)
+    conversation.set_summary("SUMMARY", 2)
+    assert conversation.build_messages("m") == conversation.messages
+
+def test_context_window_sources():
+    show = {"parameters": "stop \"<|end|>\"\nnum_ctx 8192", "model_info": {"llama.context_length": 4096}}
+    assert context_window(show) == 4096
+    assert context_window({"parameters": "num_ctx 8192"}) == 8192
+    assert context_window({"parameters": "num_ctx 8192"}, {"num_ctx": 2048}) == 2048
+    assert context_window({}, default=1234) == 1234
+
+def test_turns_in_the_summary_are_not_sent_twice():
+    conversation = manager(budget=2000, strategy='summarize')
+    add_turns(conversation, 10)
+    # A summary reaching past where this (larger) budget's window starts
+    conversation.set_summary("SUMMARY", 16)
+    sent = conversation.build_messages("m")
+    assert conversation.window_start < 16
+    assert sent[0]['content'].endswith("SUMMARY")
+    assert sent[1:] == conversation.messages[16:]
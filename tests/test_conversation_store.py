@@ -0,0 +1,140 @@
+import sqlite3
+import pytest
+from storage.conversation_store import ConversationStore
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "history.db")
+
+@pytest.fixture
+def store(path):
+    store = ConversationStore(path)
+    yield store
+    store.close()
+
+def fill(store, count=120):
+    conversation_id = store.create_conversation("llama3", "first")
+    for seq in range(count):
+        role = "user" if seq % 2 == 0 else "assistant"
+        store.add_message(conversation_id, seq, role, f"message {seq}",
+                          thinking=f"reasoning {seq}" if role == "assistant" else "")
+    store.flush()
+    return conversation_id
+
+def test_pages_load_backwards_and_forwards(store):
+    conversation_id = fill(store)
+    assert store.message_count(conversation_id) == 120
+    newest = store.load_page(conversation_id, limit=50)
+    assert [m['seq'] for m in newest] == list(range(70, 120))
+    older = store.load_page(conversation_id, before_seq=newest[0]['seq'], limit=50)
+    assert [m['seq'] for m in older] == list(range(20, 70))
+    assert store.load_page_after(conversation_id, 9, limit=3) == [
+        {"seq": 10, "role": "user", "content": "message 10", "thinking": "", "metrics": None},
+        {"seq": 11, "role": "assistant", "content": "message 11", "thinking": "reasoning 11", "metrics": None},
+        {"seq": 12, "role": "user", "content": "message 12", "thinking": "", "metrics": None},
+    ]
+
+def test_writes_survive_reopening(path):
+    store = ConversationStore(path)
+    conversation_id = fill(store, 4)
+    store.set_title(conversation_id, "generated", generated=True)
+    store.set_summary(conversation_id, "so far", 2)
+    store.add_message(conversation_id, 4, "assistant", "answer", metrics={"eval_count": 3})
+    store.close()
+
+    store = ConversationStore(path)
+    try:
+        conversation = store.get_conversation(conversation_id)
+        assert (conversation['title'], conversation['titled']) == ("generated", 1)
+        assert (conversation['summary'], conversation['summarized_upto']) == ("so far", 2)
+        assert store.load_history(conversation_id, from_seq=3) == [("assistant", "message 3"), ("assistant", "answer")]
+        assert store.load_metrics(conversation_id) == [{"eval_count": 3}]
+    finally:
+        store.close()
+
+def test_delete_removes_the_messages(store):
+    conversation_id = fill(store, 4)
+    other = fill(store, 2)
+    store.delete_conversation(conversation_id)
+    store.flush()
+    assert [c['id'] for c in store.list_conversations()] == [other]
+    assert store.load_page(conversation_id) == []
+    assert store.connection.execute("SELECT COUNT(*) FROM thinking").fetchone()[0] == 1
+
+def test_failed_write_is_reported_not_raised(path):
+    errors = []
+    store = ConversationStore(path, on_error=errors.append)
+    try:
+        store.add_message("no such conversation", 0, "user", "orphan")
+        store.flush()
+        assert store.error_count == 1
+        assert errors and store.last_error is not None
+        # The writer carries on with later writes
+        conversation_id = fill(store, 2)
+        assert store.message_count(conversation_id) == 2
+    finally:
+        store.close()
+
+def test_opening_an_old_database_adds_the_new_columns(path):
+    connection = sqlite3.connect(path)
+    connection.executescript("""
+        CREATE TABLE conversations (id TEXT PRIMARY KEY, title TEXT NOT NULL DEFAULT '',
+            model TEXT NOT NULL DEFAULT '', created_at REAL NOT NULL, updated_at REAL NOT NULL);
+        CREATE TABLE messages (id INTEGER PRIMARY KEY, conversation_id TEXT NOT NULL, seq INTEGER NOT NULL,
+            role TEXT NOT NULL, content TEXT NOT NULL, created_at REAL NOT NULL, UNIQUE (conversation_id, seq));
+        CREATE TABLE thinking (message_id INTEGER PRIMARY KEY, content TEXT NOT NULL);
+        INSERT INTO conversations VALUES ('old', 'from before', 'llama3', 1, 1);
+        INSERT INTO messages VALUES (1, 'old', 0, 'user', 'hello there', 1);
+    """)
+    connection.close()
+
+    store = ConversationStore(path)
+    try:
+        conversation = store.get_conversation("old")
+        assert (conversation['titled'], conversation['summary'], conversation['summarized_upto']) == (0, "", 0)
+        store.add_message("old", 1, "assistant", "hi", metrics={"eval_count": 1})
+        store.flush()
+        assert store.error_count == 0
+        assert store.load_metrics("old") == [{"eval_count": 1}]
+    finally:
+        store.close()
+
+def test_search_matches_prefixes_in_content_and_thinking(store):
+    conversation_id = fill(store, 4)
+    store.add_message(conversation_id, 4, "assistant", "The tokenizer splits words", thinking="consider unicode")
+    store.flush()
+    assert [(r['seq'], r['title']) for r in store.search("tokeni")] == [(4, "first")]
+    hit = store.search("unicode")[0]
+    assert (hit['seq'], hit['role']) == (4, "assistant")
+    assert "[unicode]" in hit['snippet']
+    assert [r['seq'] for r in store.search("reasoning 3")] == [3]
+
+@pytest.mark.parametrize("query", ['"', 'a" OR "b', "NEAR(", "*", "-x", "   "])
+def test_search_input_cannot_break_the_query(store, query):
+    fill(store, 2)
+    assert isinstance(store.search(query), list)
+
+def test_replaced_and_deleted_messages_leave_the_index(store):
+    conversation_id = fill(store, 2)
+    store.add_message(conversation_id, 1, "assistant", "rewritten answer")
+    store.flush()
+    assert store.search("reasoning") == []
+    assert [r['seq'] for r in store.search("rewritten")] == [1]
+    store.delete_conversation(conversation_id)
+    store.flush()
+    assert store.search("rewritten") == []
+    assert store.connection.execute("SELECT COUNT(*) FROM message_search").fetchone()[0] == 0
+
+def test_search_index_is_built_for_existing_messages(path):
+    store = ConversationStore(path)
+    conversation_id = fill(store, 4)
+    store.connection.execute("DROP TABLE message_search")
+    store.connection.commit()
+    store.close()
+
+    store = ConversationStore(path)
+    try:
+        assert sorted(r['seq'] for r in store.search("message")) == [0, 1, 2, 3]
+        assert [r['conversation_id'] for r in store.search("reasoning 1")] == [conversation_id]
+    finally:
+        store.close()
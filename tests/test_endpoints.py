@@ -0,0 +1,153 @@
+import pytest
+from api.endpoints import (CircuitBreaker, EndpointPool, parse_endpoints, BREAKER_CLOSED, BREAKER_OPEN,
+                           BREAKER_HALF_OPEN)
+
+def test_parse_endpoints():
+    assert parse_endpoints("http://a:11434/, http://b:11434,,") == ["http://a:11434", "http://b:11434"]
+    assert parse_endpoints(["http://a:11434", " "]) == ["http://a:11434"]
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == BREAKER_CLOSED
+    breaker.record_failure()
+    assert breaker.state == BREAKER_OPEN
+    assert not breaker.available(breaker.opened_at + 29)
+    assert breaker.available(breaker.opened_at + 30)
+
+def test_half_open_breaker_lets_one_trial_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30)
+    breaker.record_failure()
+    breaker.acquire()
+    assert breaker.state == BREAKER_HALF_OPEN
+    assert not breaker.available()
+
+    # A stopped trial frees the slot; a failed one re-opens, a successful one closes
+    breaker.release()
+    assert breaker.available()
+    breaker.acquire()
+    breaker.record_failure()
+    assert breaker.state == BREAKER_OPEN
+    breaker.acquire()
+    breaker.record_success()
+    assert breaker.state == BREAKER_CLOSED
+    assert breaker.available()
+
+def pool(urls=("http://a", "http://b", "http://c"), **kwargs):
+    pool = EndpointPool(list(urls), **kwargs)
+    for endpoint in pool.endpoints:
+        pool.record_health(endpoint, "0.6", [{"name": "small"}], [], 1.0)
+    return pool
+
+def test_pool_needs_an_endpoint():
+    with pytest.raises(Exception):
+        EndpointPool("")
+
+def test_resident_model_wins_over_load():
+    endpoints = pool()
+    a, b, c = endpoints.endpoints
+    b.resident.add("small")
+    b.in_flight = 5
+    assert endpoints.acquire("small") is b
+
+def test_installed_model_wins_then_least_loaded():
+    endpoints = pool()
+    a, b, c = endpoints.endpoints
+    c.models["large"] = {"name": "large"}
+    assert endpoints.acquire("large") is c
+    first = endpoints.acquire("small")
+    second = endpoints.acquire("small")
+    assert first is a and second is b
+    endpoints.release(first, "small", ok=True)
+    assert "small" in first.resident
+    assert endpoints.acquire("small") is first
+
+def test_unhealthy_and_open_endpoints_are_skipped():
+    endpoints = pool(failure_threshold=1)
+    a, b, c = endpoints.endpoints
+    endpoints.record_health_failure(a, "refused")
+    endpoint = endpoints.acquire("small")
+    endpoints.release(endpoint, "small", ok=False, error="reset")
+    assert endpoint is b and b.breaker.state == BREAKER_OPEN
+    assert endpoints.acquire("small", exclude=(c,)) is None
+    assert endpoints.reachable() == [c]
+
+def test_release_without_verdict_keeps_breaker_state():
+    endpoints = pool(urls=("http://a",))
+    endpoint = endpoints.acquire("small")
+    endpoints.release(endpoint, "small")
+    assert endpoint.in_flight == 0
+    assert endpoint.failures == 0
+    assert endpoint.breaker.state == BREAKER_CLOSED
+
+def test_client_errors():
+    import requests
+    from aiohttp import ClientResponseError
+    from api.endpoints import is_client_error
+
+    def wrapped(cause):
+        try:
+            raise Exception("Chat request failed") from cause
+        except Exception as e:
+            return e
+
+    def http_error(status):
+        response = requests.Response()
+        response.status_code = status
+        return requests.HTTPError(response=response)
+
+    assert is_client_error(wrapped(ClientResponseError(None, (), status=404)))
+    assert is_client_error(wrapped(http_error(400)))
+    assert not is_client_error(wrapped(ClientResponseError(None, (), status=503)))
+    assert not is_client_error(wrapped(http_error(429)))
+    assert not is_client_error(wrapped(requests.ConnectionError("refused")))
+    assert not is_client_error(Exception("Chat request failed: timed out"))
+
+@pytest.fixture
+def hosts():
+    from bench.mock_ollama import MockOllama
+    with MockOllama(models=("small",), answer_tokens=4) as a, MockOllama(models=("small",), answer_tokens=4) as b:
+        yield a, b
+
+def routed_pool(hosts):
+    endpoints = EndpointPool([server.base_url for server in hosts])
+    for endpoint in endpoints.endpoints:
+        endpoints.record_health(endpoint, "0.6", [{"name": "small"}], [], 1.0)
+    endpoints.claim_health_check(force=True)
+    return endpoints
+
+def test_unknown_model_is_not_retried_or_held_against_the_host(hosts):
+    from api.multi_client import MultiOllamaClient
+    endpoints = routed_pool(hosts)
+    client = MultiOllamaClient(endpoints, retries=2)
+    with pytest.raises(Exception, match="404"):
+        list(client.chat_stream("missing", [{"role": "user", "content": "hi"}]))
+    assert endpoints.retries == 0
+    assert [e.requests for e in endpoints.endpoints] in ([1, 0], [0, 1])
+    assert all(e.failures == 0 and e.in_flight == 0 for e in endpoints.endpoints)
+
+def test_server_error_fails_over_and_counts(hosts):
+    import asyncio
+    from api.multi_client import AsyncMultiOllamaClient
+    endpoints = routed_pool(hosts)
+    for server in hosts:
+        server.fail_chats = 1
+
+    async def run():
+        client = AsyncMultiOllamaClient(endpoints, retries=2)
+        try:
+            events = [event async for event in client.chat_stream("small", [{"role": "user", "content": "hi"}])]
+            with pytest.raises(Exception, match="404"):
+                await client.preload("missing")
+            return events
+        finally:
+            await client.close()
+
+    assert asyncio.run(run())
+    assert endpoints.retries == 2
+    assert sum(e.failures for e in endpoints.endpoints) == 2
+    assert all(e.in_flight == 0 for e in endpoints.endpoints)
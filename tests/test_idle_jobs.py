@@ -0,0 +1,108 @@
+import os
+import time
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PySide6.QtCore import QCoreApplication
+from api.async_client import AsyncOllamaClient
+from bench.mock_ollama import MockOllama
+from storage.conversation_store import ConversationStore
+from ui.async_bridge import AsyncBridge
+from ui.idle_jobs import (IdleJobQueue, JOB_SUMMARY, JOB_TITLE, SUMMARY_MIN_NEW_MESSAGES, clean_title,
+                          summary_batch)
+
+MODEL = "mock:latest"
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        QCoreApplication.processEvents()
+        time.sleep(0.005)
+
+def test_clean_title():
+    assert clean_title('\n  Title: "Fixing the *parser*"\nmore text') == "Fixing the *parser"
+    assert clean_title("# Heading") == "Heading"
+    assert clean_title("") == ""
+    assert len(clean_title("x" * 100)) == 60
+
+def test_summary_batch_stops_at_the_limit():
+    messages = [{"role": "user", "content": "a" * 40}, {"role": "assistant", "content": "b" * 40},
+                {"role": "user", "content": "c" * 40}]
+    assert [m['content'][0] for m in summary_batch(messages, max_chars=100)] == ["a", "b"]
+    # A single message longer than the limit is cut rather than skipped
+    assert summary_batch(messages, max_chars=10) == [{"role": "user", "content": "a" * 10}]
+
+@pytest.fixture
+def setup(tmp_path):
+    app = QCoreApplication.instance() or QCoreApplication([])
+    store = ConversationStore(str(tmp_path / "history.db"))
+    bridge = AsyncBridge()
+    servers = []
+    clients = []
+
+    def make(**kwargs):
+        server = MockOllama(models=(MODEL,), think_tokens=2, **kwargs)
+        server.start()
+        servers.append(server)
+        client = AsyncOllamaClient(server.base_url)
+        clients.append(client)
+        return IdleJobQueue(bridge, lambda: client, store, lambda: MODEL, idle_seconds=0)
+
+    yield store, make
+    bridge.shutdown(*(client.close() for client in clients))
+    for server in servers:
+        server.stop()
+    store.close()
+
+def conversation(store, count):
+    conversation_id = store.create_conversation(MODEL, "placeholder")
+    for seq in range(count):
+        store.add_message(conversation_id, seq, "user" if seq % 2 == 0 else "assistant", f"message {seq}")
+    store.flush()
+    return conversation_id
+
+def test_titles_go_before_summaries(setup):
+    store, make = setup
+    jobs = make()
+    jobs.stop()
+    jobs.enqueue(JOB_SUMMARY, "a")
+    jobs.enqueue(JOB_TITLE, "b")
+    jobs.enqueue(JOB_SUMMARY, "a")
+    jobs.enqueue(JOB_TITLE, "c")
+    jobs.enqueue(JOB_SUMMARY, "d", front=True)
+    assert jobs.jobs == [(JOB_SUMMARY, "d"), (JOB_TITLE, "b"), (JOB_TITLE, "c"), (JOB_SUMMARY, "a")]
+
+def test_idle_queue_titles_and_summarizes(setup):
+    store, make = setup
+    jobs = make(answer_tokens=8)
+    titles = []
+    jobs.title_ready.connect(lambda conversation_id, title: titles.append(conversation_id))
+    short = conversation(store, 2)
+    long = conversation(store, SUMMARY_MIN_NEW_MESSAGES + 1)
+    jobs.enqueue_pending()
+    wait_until(lambda: not jobs.jobs and not jobs.busy())
+    store.flush()
+
+    assert sorted(titles) == sorted([short, long])
+    assert store.get_conversation(short)['titled'] == 1
+    assert store.get_conversation(short)['summarized_upto'] == 0
+    summarized = store.get_conversation(long)
+    assert summarized['summary'] and summarized['summarized_upto'] == SUMMARY_MIN_NEW_MESSAGES + 1
+    assert (jobs.completed, jobs.failed) == (3, 0)
+    jobs.stop()
+
+def test_foreground_work_preempts_a_running_job(setup):
+    store, make = setup
+    jobs = make(answer_tokens=400, tokens_per_second=200)
+    conversation_id = conversation(store, 2)
+    jobs.enqueue(JOB_TITLE, conversation_id)
+    wait_until(jobs.busy)
+    jobs.hold()
+    wait_until(lambda: jobs.preempted == 1)
+    assert jobs.jobs == [(JOB_TITLE, conversation_id)]
+    assert not jobs.busy()
+    store.flush()
+    assert store.get_conversation(conversation_id)['titled'] == 0
+    jobs.stop()
@@ -0,0 +1,34 @@
+import pytest
+from ui.markdown_render import BlockSplitter, highlight_runs, split_blocks, BLOCK_CODE, BLOCK_PROSE
+
+TEXT = ("Intro paragraph\nstill intro\n\n```python\ndef f():\n\n    return '```'\n```\n"
+        "after the code\n\n~~~\nplain ~~~ inside\n~~~\n  \n")
+
+def test_split_blocks():
+    assert split_blocks(TEXT) == [
+        (BLOCK_PROSE, "", "Intro paragraph\nstill intro\n", True),
+        (BLOCK_CODE, "python", "def f():\n\n    return '```'", True),
+        (BLOCK_PROSE, "", "after the code\n", True),
+        (BLOCK_CODE, "", "plain ~~~ inside", True),
+    ]
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 16])
+def test_feeding_in_pieces_gives_the_same_blocks(size):
+    splitter = BlockSplitter()
+    blocks = []
+    for start in range(0, len(TEXT), size):
+        blocks.extend(splitter.feed(TEXT[start:start + size]))
+    assert blocks + splitter.flush() == split_blocks(TEXT)
+
+def test_unfinished_blocks_are_the_tail():
+    splitter = BlockSplitter()
+    assert splitter.feed("done\n\n```js\nlet x") == [(BLOCK_PROSE, "", "done\n", True)]
+    assert splitter.tail() == (BLOCK_CODE, "js", "let x", False)
+    assert splitter.flush() == [(BLOCK_CODE, "js", "let x", False)]
+
+def test_highlight_runs_keep_the_code():
+    code = "def f(x):\n    return x + 1  # one\n"
+    runs = highlight_runs("python", code)
+    assert "".join(text for _, text in runs) == code
+    assert highlight_runs("", code) == [(None, code)]
+    assert highlight_runs("no-such-language", code) == [(None, code)]
@@ -0,0 +1,84 @@
+import json
+from api.metrics import (ResponseMetrics, eval_rate, format_summary, prometheus_text, write_jsonl,
+                         write_prometheus)
+
+def finished(model="llama3:8b"):
+    metrics = ResponseMetrics(model)
+    metrics.request_sent = 10.0
+    metrics.first_byte = 10.05
+    metrics.first_token = 10.1
+    metrics.first_visible = 10.11
+    metrics.last_token = 11.0
+    metrics.render_done = 11.002
+    metrics.chunk_count = 40
+    metrics.record_server({"model": model, "done": True, "total_duration": 2_000_000_000,
+                           "load_duration": 500_000_000, "prompt_eval_count": 20,
+                           "prompt_eval_duration": 100_000_000, "eval_count": 40,
+                           "eval_duration": 800_000_000})
+    return metrics
+
+def test_to_dict_measures_from_request_sent():
+    record = finished().to_dict()
+    assert record["first_byte_ms"] == 50.0
+    assert record["ttft_ms"] == 100.0
+    assert record["last_token_ms"] == 1000.0
+    assert record["render_ms"] == 2.0
+    assert record["chunk_count"] == 40
+    assert record["eval_count"] == 40
+    # Only Ollama's timing fields are copied
+    assert "done" not in record
+    assert "cache_hit" not in record
+    assert json.loads(json.dumps(record)) == record
+
+def test_missing_stamps_serialise_as_none():
+    record = ResponseMetrics("m").to_dict()
+    assert record["ttft_ms"] is None
+    assert record["render_ms"] is None
+    assert record["chunk_count"] == 0
+
+def test_on_token_and_mark_keep_the_first_stamp():
+    metrics = ResponseMetrics("m")
+    metrics.mark('request_sent')
+    sent = metrics.request_sent
+    metrics.mark('request_sent')
+    metrics.on_token()
+    first = metrics.first_token
+    metrics.on_token()
+    assert metrics.request_sent == sent
+    assert metrics.first_token == first
+    assert metrics.last_token >= first
+    assert metrics.chunk_count == 2
+
+def test_format_summary():
+    record = finished().to_dict()
+    assert eval_rate(record) == 50.0
+    assert format_summary(record) == ("LOAD 0.50s | PROMPT 20 tok @ 200 tok/s | GEN 40 tok @ 50.0 tok/s | "
+                                      "TTFT 100 ms | UI 2.0 ms")
+    assert format_summary({"cache_hit": True, "ttft_ms": 3}) == "CACHED | TTFT 3 ms"
+
+def test_prometheus_text_sums_per_model():
+    records = [finished("a").to_dict(), finished("a").to_dict(), finished('b"\n').to_dict()]
+    text = prometheus_text(records)
+    assert 'jgxaai_responses_total{model="a"} 2' in text
+    assert 'jgxaai_eval_tokens_total{model="a"} 80' in text
+    assert 'jgxaai_load_seconds_total{model="a"} 1.0' in text
+    assert 'jgxaai_ttft_seconds_count{model="a"} 2' in text
+    assert 'jgxaai_responses_total{model="b\\"\\n"} 1' in text
+    assert text.count("# TYPE jgxaai_responses_total counter") == 1
+
+def test_export_files(tmp_path):
+    records = [finished().to_dict()]
+    write_jsonl(records, tmp_path / "metrics.jsonl")
+    lines = (tmp_path / "metrics.jsonl").read_text().splitlines()
+    assert [json.loads(line) for line in lines] == records
+    write_prometheus(records, tmp_path / "metrics.prom")
+    assert (tmp_path / "metrics.prom").read_text() == prometheus_text(records)
+
+def test_prompt_tokens_reused_from_the_estimate():
+    metrics = finished()
+    metrics.prompt_tokens_estimated = 500
+    record = metrics.to_dict()
+    assert record["prompt_tokens_reused"] == 480
+    assert "~480 cached" in format_summary(record)
+    metrics.prompt_tokens_estimated = 10
+    assert metrics.to_dict()["prompt_tokens_reused"] == 0
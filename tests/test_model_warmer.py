@@ -0,0 +1,105 @@
+import os
+import time
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PySide6.QtCore import QCoreApplication
+from api.async_client import AsyncOllamaClient
+from bench.mock_ollama import MockOllama
+from ui.async_bridge import AsyncBridge
+from ui.model_warmer import ModelWarmer, POLICY_KEEP, POLICY_EXCLUSIVE, STATE_COLD, STATE_LOADING, STATE_HOT
+
+LOAD_SECONDS = 0.2
+
+def wait_until(condition, timeout=5):
+    # Results come back as queued signals, so the Qt event loop has to run
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        QCoreApplication.processEvents()
+        time.sleep(0.005)
+
+@pytest.fixture
+def server():
+    with MockOllama(models=("a:latest", "b:latest"), load_seconds=LOAD_SECONDS) as server:
+        yield server
+
+@pytest.fixture
+def make_warmer(server):
+    app = QCoreApplication.instance() or QCoreApplication([])
+    bridge = AsyncBridge()
+    client = AsyncOllamaClient(server.base_url)
+    warmers = []
+
+    def make(policy=POLICY_KEEP):
+        warmer = ModelWarmer(bridge, lambda: client, policy=policy)
+        warmer.changes = []
+        warmer.state_changed.connect(lambda model, state: warmer.changes.append((model, state)))
+        warmers.append(warmer)
+        return warmer
+
+    yield make
+    for warmer in warmers:
+        warmer.stop()
+    bridge.shutdown(client.close())
+    app.processEvents()
+
+def test_cold_loading_hot(server, make_warmer):
+    warmer = make_warmer()
+    assert warmer.state("a:latest") == STATE_COLD
+    warmer.set_model("a:latest")
+    assert warmer.state("a:latest") == STATE_LOADING
+    wait_until(lambda: warmer.state("a:latest") == STATE_HOT)
+    assert warmer.changes == [("a:latest", STATE_LOADING), ("a:latest", STATE_HOT)]
+    assert "a:latest" in server.resident
+    assert warmer.last_load_ms["a:latest"] == pytest.approx(LOAD_SECONDS * 1000)
+
+    # Activity on a model that was warmed recently sends nothing
+    warmer.note_activity()
+    warmer.warm("a:latest")
+    assert warmer.state("a:latest") == STATE_HOT
+    assert server.loads == 1
+
+def test_keep_policy_leaves_the_previous_model_loaded(server, make_warmer):
+    warmer = make_warmer(POLICY_KEEP)
+    warmer.set_model("a:latest")
+    wait_until(lambda: warmer.state("a:latest") == STATE_HOT)
+    warmer.set_model("b:latest")
+    wait_until(lambda: warmer.state("b:latest") == STATE_HOT)
+    assert warmer.state("a:latest") == STATE_HOT
+    assert set(server.resident) == {"a:latest", "b:latest"}
+
+def test_exclusive_policy_unloads_the_previous_model(server, make_warmer):
+    warmer = make_warmer(POLICY_EXCLUSIVE)
+    warmer.set_model("a:latest")
+    wait_until(lambda: warmer.state("a:latest") == STATE_HOT)
+    warmer.set_model("b:latest")
+    assert warmer.state("a:latest") == STATE_COLD
+    wait_until(lambda: warmer.state("b:latest") == STATE_HOT and "a:latest" not in server.resident)
+    assert set(server.resident) == {"b:latest"}
+    assert warmer.state("a:latest") == STATE_COLD
+
+def test_running_models_reconcile_states(server, make_warmer):
+    warmer = make_warmer()
+    warmer.set_model("a:latest")
+    wait_until(lambda: warmer.state("a:latest") == STATE_HOT)
+
+    # Evicted behind our back, and loaded by another client
+    server.resident.pop("a:latest")
+    server.resident["b:latest"] = None
+    warmer.refresh()
+    wait_until(lambda: warmer.state("a:latest") == STATE_COLD)
+    wait_until(lambda: warmer.state("b:latest") == STATE_HOT)
+    assert ("a:latest", STATE_COLD) in warmer.changes
+
+def test_failed_preload_goes_back_to_cold(server, make_warmer):
+    warmer = make_warmer()
+    server.fail_chats = 1
+    warmer.set_model("a:latest")
+    assert warmer.state("a:latest") == STATE_LOADING
+    wait_until(lambda: warmer.state("a:latest") == STATE_COLD)
+    assert "a:latest" not in warmer.warmed_at
+
+    warmer.note_activity()
+    wait_until(lambda: warmer.state("a:latest") == STATE_HOT)
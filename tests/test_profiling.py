@@ -0,0 +1,42 @@
+import json
+import os
+from api.profiling import Profiler, SpanRecorder
+
+def test_disabled_recorder_records_nothing():
+    spans = SpanRecorder()
+    spans.end("paint", spans.start())
+    assert spans.start() is None
+    assert spans.snapshot() == {}
+
+def test_snapshot_stats():
+    spans = SpanRecorder(window=10)
+    spans.enable()
+    for ms in range(1, 21):
+        spans.record("flush", ms / 1000)
+    started = spans.start()
+    spans.end("parse", started)
+    stats = spans.snapshot()
+    # Percentiles over the last 10 calls (11..20 ms), count, mean and max over all 20
+    assert stats["flush"] == {"count": 20, "mean_ms": 10.5, "p50_ms": 16.0, "p95_ms": 20.0, "max_ms": 20.0}
+    assert spans.count("parse") == 1
+    spans.reset()
+    assert spans.count("flush") == 0
+
+def test_dump_writes_what_is_running(tmp_path):
+    profiler = Profiler(str(tmp_path))
+    profiler.start_cpu()
+    profiler.start_memory()
+    try:
+        sum(i * i for i in range(10000))
+        directory, written = profiler.dump([{"fps": 60}])
+        assert profiler.cpu_running
+    finally:
+        profiler.stop_cpu()
+        profiler.stop_memory()
+    assert sorted(os.path.basename(path) for path in written) == ["cpu.prof", "memory.txt", "samples.jsonl"]
+    assert os.path.exists(os.path.join(directory, "cpu.txt"))
+    with open(os.path.join(directory, "samples.jsonl"), encoding='utf-8') as f:
+        lines = [json.loads(line) for line in f]
+    assert lines[0] == {"fps": 60}
+    assert "spans" in lines[1]
+    assert not profiler.memory_running
@@ -0,0 +1,84 @@
+import os
+from api.rag import chunk_text, plan_refresh
+
+def test_short_text_is_one_chunk():
+    assert chunk_text("a\nb\n") == [(1, 2, "a\nb\n")]
+    assert chunk_text("") == []
+    assert chunk_text("\n  \n") == []
+
+def test_chunks_are_bounded_line_aligned_and_overlap():
+    lines = [f"line {i:03d}\n" for i in range(100)]
+    chunks = chunk_text("".join(lines), max_chars=100, overlap_lines=2)
+    assert all(len(body) <= 100 for _, _, body in chunks)
+    for start, end, body in chunks:
+        assert body == "".join(lines[start - 1:end])
+    for (_, previous_end, _), (start, _, _) in zip(chunks, chunks[1:]):
+        assert start == previous_end - 1
+    assert chunks[0][0] == 1 and chunks[-1][1] == 100
+
+def test_long_line_is_cut():
+    chunks = chunk_text("x" * 250 + "\nshort\n", max_chars=100)
+    assert chunks[0] == (1, 1, "x" * 100)
+    assert chunks[-1][2] == "short\n"
+
+def test_refresh_reads_only_what_changed(tmp_path):
+    (tmp_path / "a.py").write_text("print('a')\n")
+    (tmp_path / "b.md").write_text("# b\n")
+    (tmp_path / "blob.bin").write_bytes(b"\0\1\2")
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".git" / "config").write_text("ignored\n")
+
+    total, changed, touched, removed = plan_refresh(str(tmp_path), {})
+    assert total == 3
+    assert sorted(os.path.basename(entry[0]) for entry in changed) == ["a.py", "b.md", "blob.bin"]
+    chunks = {os.path.basename(entry[0]): entry[4] for entry in changed}
+    assert chunks["a.py"] == [(1, 1, "print('a')\n")]
+    assert chunks["blob.bin"] == []
+    known = {path: (mtime, size, sha) for path, mtime, size, sha, _ in changed}
+
+    assert plan_refresh(str(tmp_path), known) == (3, [], [], [])
+
+    a = str(tmp_path / "a.py")
+    b = str(tmp_path / "b.md")
+    (tmp_path / "a.py").write_text("print('changed')\n")
+    # Same content, new mtime: only the stat needs updating
+    os.utime(b, (known[b][0] + 10, known[b][0] + 10))
+    os.remove(tmp_path / "blob.bin")
+    total, changed, touched, removed = plan_refresh(str(tmp_path), known)
+    assert total == 2
+    assert [entry[0] for entry in changed] == [a]
+    assert changed[0][4] == [(1, 1, "print('changed')\n")]
+    assert [entry[0] for entry in touched] == [b]
+    assert removed == [str(tmp_path / "blob.bin")]
+
+def test_search_leaves_a_stale_index_alone(tmp_path):
+    import asyncio
+    from api.async_client import AsyncOllamaClient
+    from api.rag import DocumentIndexer, Retriever
+    from bench.mock_ollama import MockOllama
+    from storage.vector_index import VectorIndex
+
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "notes.md").write_text("the parser splits think tags\n")
+
+    async def run(base_url):
+        client = AsyncOllamaClient(base_url)
+        index = VectorIndex(str(tmp_path / "index"), "embed")
+        try:
+            indexer = DocumentIndexer(client, index, str(docs), "embed")
+            await indexer.refresh()
+            assert not indexer.stale()
+            indexer.refreshed_at -= 3600
+            (docs / "notes.md").write_text("something else entirely\n")
+            hits = await Retriever(client, [indexer], "embed").search("think tags")
+            return indexer, hits
+        finally:
+            await client.close()
+            index.close()
+
+    with MockOllama() as server:
+        indexer, hits = asyncio.run(run(server.base_url))
+    # Answered from the index as it was; the refresh is the caller's to schedule
+    assert indexer.stale()
+    assert [text for _, _, _, _, text in hits] == ["the parser splits think tags\n"]
@@ -0,0 +1,74 @@
+import itertools
+import types
+import storage.response_cache as response_cache
+from storage.response_cache import ResponseCache, cache_key
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+def test_cache_key_is_canonical():
+    key = cache_key("m", "sha256:1", {"temperature": 0, "seed": 1}, MESSAGES)
+    assert key == cache_key("m", "sha256:1", {"seed": 1, "temperature": 0},
+                            [{"content": "hi", "role": "user", "images": None}])
+    assert cache_key("m", "sha256:1", None, MESSAGES) == cache_key("m", "sha256:1", {}, MESSAGES)
+
+def test_cache_key_changes_with_every_input():
+    key = cache_key("m", "sha256:1", {}, MESSAGES)
+    assert key != cache_key("n", "sha256:1", {}, MESSAGES)
+    assert key != cache_key("m", "sha256:2", {}, MESSAGES)
+    assert key != cache_key("m", "sha256:1", {"seed": 2}, MESSAGES)
+    assert key != cache_key("m", "sha256:1", {}, [{"role": "user", "content": "hi!"}])
+
+def test_round_trip_and_stats():
+    cache = ResponseCache(":memory:")
+    assert cache.get("k") is None
+    cache.put("k", "m", [('thinking', "t"), ('message', "answer")], 1.5)
+    assert cache.get("k") == ([('thinking', "t"), ('message', "answer")], 1.5)
+    assert cache.stats() == {"entries": 1, "bytes": cache.stats()["bytes"], "hits": 1, "misses": 1}
+    cache.close()
+
+def test_least_recently_used_is_evicted_first(monkeypatch):
+    # A strictly increasing clock, so last_used never ties
+    clock = itertools.count(1)
+    monkeypatch.setattr(response_cache, "time", types.SimpleNamespace(time=lambda: next(clock)))
+    events = [('message', "x" * 20)]
+    size = len('[["message", "' + "x" * 20 + '"]]')
+    cache = ResponseCache(":memory:", max_bytes=2 * size)
+    cache.put("a", "m", events, 0)
+    cache.put("b", "m", events, 0)
+    assert cache.get("a") is not None
+    cache.put("c", "m", events, 0)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.stats()["entries"] == 2
+    cache.close()
+
+def test_entry_larger_than_the_cache_is_not_stored():
+    cache = ResponseCache(":memory:", max_bytes=10)
+    cache.put("k", "m", [('message', "x" * 20)], 0)
+    assert cache.get("k") is None
+    cache.close()
+
+class FakeClient:
+    def __init__(self):
+        self.tags_read = 0
+        self.chats = 0
+
+    def get_models(self):
+        self.tags_read += 1
+        return [{"name": "llama3:latest", "model": "llama3:latest", "digest": "sha256:1"}]
+
+    def chat_stream(self, model, messages, metrics=None, keep_alive=None, options=None):
+        self.chats += 1
+        yield ('message', "answer")
+
+def test_untagged_model_name_is_cached():
+    from api.cached_client import CachedOllamaClient
+    client = FakeClient()
+    cached = CachedOllamaClient(client, ResponseCache(":memory:"))
+    assert list(cached.chat_stream("llama3", MESSAGES)) == [('message', "answer")]
+    assert list(cached.chat_stream("llama3", MESSAGES)) == [('message', "answer")]
+    assert list(cached.chat_stream("llama3:latest", MESSAGES)) == [('message', "answer")]
+    assert client.chats == 1
+    assert client.tags_read == 1
+    cached.cache.close()
@@ -0,0 +1,52 @@
+import json
+import os
+import subprocess
+import sys
+from storage.settings import Settings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run_python(code, home):
+    env = dict(os.environ, HOME=str(home), QT_QPA_PLATFORM="offscreen")
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True,
+                            timeout=60)
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+def test_settings_round_trip(tmp_path):
+    path = str(tmp_path / "sub" / "settings.json")
+    settings = Settings(path)
+    assert settings.get("models", []) == []
+    settings.set("models", ["a", "b"])
+    assert Settings(path).get("models") == ["a", "b"]
+    assert os.listdir(tmp_path / "sub") == ["settings.json"]
+
+    # Setting the same value again doesn't rewrite the file
+    os.remove(path)
+    settings.set("models", ["a", "b"])
+    assert not os.path.exists(path)
+
+def test_unreadable_settings_start_empty(tmp_path):
+    path = tmp_path / "settings.json"
+    for content in ["{not json", "[1, 2]", ""]:
+        path.write_text(content)
+        assert Settings(str(path)).values == {}
+
+def test_headless_modes_import_no_gui(tmp_path):
+    out = run_python("import sys, main, cli.batch, cli.archive; "
+                     "print(sorted(m for m in ('PySide6', 'aiohttp') if m in sys.modules))", tmp_path)
+    assert out.strip() == "[]"
+
+def test_window_opens_with_the_cached_model_list(tmp_path):
+    # Ollama isn't reachable; the list from the last session is there at once anyway
+    os.makedirs(tmp_path / ".jgxaai")
+    (tmp_path / ".jgxaai" / "settings.json").write_text(
+        json.dumps({"models": ["a:latest", "b:latest"], "last_model": "b:latest", "background_jobs": False}))
+    out = run_python("from PySide6.QtWidgets import QApplication\n"
+                     "app = QApplication([])\n"
+                     "from ui.main_window import MainWindow\n"
+                     "window = MainWindow('http://127.0.0.1:1')\n"
+                     "combo = window.model_combo\n"
+                     "print([combo.itemText(i) for i in range(combo.count())], combo.currentText())\n"
+                     "window.close()\n", tmp_path)
+    assert out.strip() == "['a:latest', 'b:latest'] b:latest"
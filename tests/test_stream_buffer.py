@@ -0,0 +1,45 @@
+import asyncio
+import threading
+from ui.stream_buffer import DeltaBuffer
+
+def test_same_kind_deltas_are_coalesced_in_order():
+    buffer = DeltaBuffer()
+    for kind, text in [('thinking', "a"), ('thinking', "b"), ('message', "c"), ('message', "d"),
+                       ('thinking', "e")]:
+        buffer.put(kind, text)
+    assert buffer.drain() == [('thinking', "ab"), ('message', "cd"), ('thinking', "e")]
+    assert buffer.drain() == []
+    assert buffer.drains == 1
+
+def test_consumer_is_woken_once_per_drain():
+    buffer = DeltaBuffer()
+    assert buffer.put('message', "a")
+    assert not buffer.put('message', "b")
+    assert not buffer.put('thinking', "c")
+    buffer.drain()
+    assert buffer.put('message', "d")
+    assert (buffer.puts, buffer.wakeups) == (4, 2)
+
+def test_wait_for_space_returns_at_once_below_the_limit():
+    buffer = DeltaBuffer(max_chars=8)
+    buffer.put('message', "x" * 7)
+    assert not buffer.full()
+    asyncio.run(asyncio.wait_for(buffer.wait_for_space(), 1))
+    assert buffer.waits == 0
+
+def test_producer_waits_until_the_consumer_drains():
+    buffer = DeltaBuffer(max_chars=8)
+    buffer.put('message', "x" * 8)
+    assert buffer.full()
+
+    async def produce():
+        waiter = asyncio.ensure_future(buffer.wait_for_space())
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+        # The UI drains from its own thread
+        threading.Thread(target=buffer.drain).start()
+        await asyncio.wait_for(waiter, 1)
+
+    asyncio.run(produce())
+    assert buffer.waits == 1
+    assert not buffer.full()
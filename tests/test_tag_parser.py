@@ -0,0 +1,74 @@
+import random
+import pytest
+from api.tag_parser import ThinkTagParser
+
+SAMPLES = [
+    "plain answer",
+    "<think>short</think>answer",
+    "before<think>one</think>middle<thinking>two</thinking>after",
+    "<thinking>a < b and <thin</thinking>x <thinkers> y",
+    "a <b> c </think> d <",
+    "<think>never closed",
+    "ends on a partial tag <thi",
+]
+
+def parse(chunks):
+    parser = ThinkTagParser()
+    events = []
+    for chunk in chunks:
+        events.extend(parser.feed(chunk))
+    events.extend(parser.flush())
+    return parser, events
+
+def merged(events):
+    # Chunking may split a run of text into several events of the same kind
+    result = []
+    for kind, text in events:
+        if result and result[-1][0] == kind:
+            result[-1] = (kind, result[-1][1] + text)
+        else:
+            result.append((kind, text))
+    return result
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_every_two_way_split_parses_the_same(text):
+    whole, expected = parse([text])
+    for cut in range(len(text) + 1):
+        parser, events = parse([text[:cut], text[cut:]])
+        assert merged(events) == merged(expected)
+        assert (parser.message, parser.thinking) == (whole.message, whole.thinking)
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_random_chunking_parses_the_same(text):
+    whole, expected = parse([text])
+    rng = random.Random(text)
+    for _ in range(50):
+        cuts = sorted(rng.sample(range(len(text) + 1), rng.randint(0, min(8, len(text)))))
+        chunks = [text[start:end] for start, end in zip([0] + cuts, cuts + [len(text)])]
+        parser, events = parse(chunks)
+        assert merged(events) == merged(expected)
+        assert parser.in_thinking == whole.in_thinking
+
+def test_one_character_at_a_time():
+    text = SAMPLES[2]
+    parser, events = parse(list(text))
+    assert merged(events) == [('message', "before"), ('thinking', "one"), ('message', "middle"),
+                              ('thinking', "two"), ('message', "after")]
+    assert parser.message == "beforemiddleafter"
+    assert parser.thinking == "onetwo"
+
+def test_text_that_only_looks_like_a_tag_is_kept():
+    parser, _ = parse([SAMPLES[3]])
+    assert parser.thinking == "a < b and <thin"
+    assert parser.message == "x <thinkers> y"
+
+def test_partial_tag_is_held_back_until_flush():
+    parser = ThinkTagParser()
+    assert parser.feed("answer <thi") == [('message', "answer ")]
+    assert parser.flush() == [('message', "<thi")]
+    assert parser.message == "answer <thi"
+
+def test_unclosed_thinking_stays_thinking():
+    parser, events = parse(["<think>never", " closed"])
+    assert parser.in_thinking
+    assert merged(events) == [('thinking', "never closed")]
@@ -0,0 +1,41 @@
+import asyncio
+import threading
+
+# Runs one asyncio loop beside the Qt event loop. Coroutines are scheduled from the
+# GUI thread and report back through Qt signals, which queue across threads.
+class AsyncBridge:
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name="asyncio-bridge", daemon=True)
+        self._thread.start()
+    
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+    
+    def call_soon(self, callback, *args):
+        self.loop.call_soon_threadsafe(callback, *args)
+    
+    def submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+    
+    def shutdown(self, *cleanup, timeout=2):
+        try:
+            self.submit(self._cancel_pending()).result(timeout)
+        except Exception:
+            pass
+        for coro in cleanup:
+            try:
+                self.submit(coro).result(timeout)
+            except Exception:
+                pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+    
+    async def _cancel_pending(self):
+        # Whatever is still in flight (a model refresh, a stream) must not outlive the loop
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
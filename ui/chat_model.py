@@ -0,0 +1,127 @@
+import itertools
+import zlib
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex
+
+KIND_USER = 'user'
+KIND_ASSISTANT = 'assistant'
+KIND_THINKING = 'thinking'
+KIND_METRICS = 'metrics'
+
+# Finished reasoning at least this long is kept zlib-compressed; it is only read back when a
+# section is expanded. Level 1: a page of long think blocks loads in a few milliseconds.
+COMPACT_MIN_CHARS = 4096
+COMPACT_LEVEL = 1
+
+class ChatMessageModel(QAbstractListModel):
+    KindRole = Qt.ItemDataRole.UserRole + 1
+    ExpandedRole = Qt.ItemDataRole.UserRole + 2
+    KeyRole = Qt.ItemDataRole.UserRole + 3
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._messages = []
+        # Stable per-message keys, so caches survive rows being prepended
+        self._keys = itertools.count()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._messages)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._messages):
+            return None
+        message = self._messages[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.text(index.row())
+        if role == self.KindRole:
+            return message['kind']
+        if role == self.ExpandedRole:
+            return message['expanded']
+        if role == self.KeyRole:
+            return message['key']
+        return None
+
+    def key(self, row):
+        return self._messages[row]['key']
+
+    def text(self, row):
+        message = self._messages[row]
+        if message['packed'] is not None:
+            return zlib.decompress(message['packed']).decode('utf-8')
+        parts = message['parts']
+        if len(parts) > 1:
+            parts[:] = ["".join(parts)]
+        return parts[0] if parts else ""
+
+    def _new_message(self, kind, text):
+        message = {'kind': kind, 'parts': [text] if text else [], 'packed': None, 'expanded': False,
+                   'key': next(self._keys)}
+        if kind == KIND_THINKING:
+            self._compact(message)
+        return message
+
+    def _compact(self, message):
+        parts = message['parts']
+        if message['packed'] is None and sum(len(part) for part in parts) >= COMPACT_MIN_CHARS:
+            message['packed'] = zlib.compress("".join(parts).encode('utf-8'), COMPACT_LEVEL)
+            message['parts'] = []
+
+    def _unpack(self, message):
+        if message['packed'] is not None:
+            message['parts'] = [zlib.decompress(message['packed']).decode('utf-8')]
+            message['packed'] = None
+
+    def compact(self, row):
+        # For reasoning that has finished streaming; later reads decompress on demand
+        self._compact(self._messages[row])
+
+    def stored_size(self, row):
+        message = self._messages[row]
+        if message['packed'] is not None:
+            return len(message['packed'])
+        return sum(len(part) for part in message['parts'])
+
+    def append_message(self, kind, text=""):
+        row = len(self._messages)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._messages.append(self._new_message(kind, text))
+        self.endInsertRows()
+        return row
+
+    def extend_messages(self, messages):
+        if not messages:
+            return
+        row = len(self._messages)
+        self.beginInsertRows(QModelIndex(), row, row + len(messages) - 1)
+        self._messages.extend(self._new_message(kind, text) for kind, text in messages)
+        self.endInsertRows()
+
+    def prepend_messages(self, messages):
+        if not messages:
+            return
+        self.beginInsertRows(QModelIndex(), 0, len(messages) - 1)
+        self._messages[0:0] = [self._new_message(kind, text) for kind, text in messages]
+        self.endInsertRows()
+
+    def append_text(self, row, text):
+        # Parts are joined lazily on read, so streamed appends stay O(1)
+        message = self._messages[row]
+        self._unpack(message)
+        message['parts'].append(text)
+
+    def set_text(self, row, text):
+        self._messages[row]['parts'] = [text] if text else []
+        self._messages[row]['packed'] = None
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.DisplayRole])
+
+    def set_expanded(self, row, expanded):
+        self._messages[row]['expanded'] = expanded
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [self.ExpandedRole])
+
+    def clear(self):
+        self.beginResetModel()
+        self._messages = []
+        self.endResetModel()
@@ -0,0 +1,350 @@
+import json
+from PySide6.QtCore import Signal
+from PySide6.QtWidgets import QWidget, QVBoxLayout
+from api.conversation import ConversationManager
+from api.metrics import format_summary
+from ui.chat_model import KIND_USER, KIND_ASSISTANT, KIND_THINKING, KIND_METRICS
+from ui.chat_widgets import ChatArea
+
+HISTORY_PAGE_SIZE = 50
+TAB_TITLE_CHARS = 24
+
+# One conversation in its own tab: its history, the page of it on screen, its attachments and
+# its reply in flight. Replies in different tabs stream at the same time. A tab that isn't
+# showing only collects its reply as text and puts it into widgets once it is shown (or the
+# reply ends), so streams in background tabs cost no rendering.
+class ChatTab(QWidget):
+    state_changed = Signal(object)
+    reply_finished = Signal(object, str, bool)
+
+    def __init__(self, store, context_budgets=None, strategy='truncate', parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.conversation = ConversationManager(context_budgets=context_budgets, strategy=strategy)
+        self.conversation_id = None
+        self.title = ""
+        self.model = ""
+        self.oldest_seq = 0
+        self.newest_seq = -1
+        self.has_newer = False
+        # Messages in the conversation; the history itself is only read in before the first send
+        self.message_count = 0
+        self.history_loaded = True
+        # DocumentIndexers for the files and folders attached to this chat
+        self.attachments = []
+        self.attach_generation = 0
+        self.indexing = 0
+        # Background refreshes of the attached indexes in flight
+        self.refreshing = 0
+        self.shutting_down = False
+        self.worker = None
+        self.active = False
+        self.queued = False
+        self.unseen = False
+        self._reset_reply()
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.chat_area = ChatArea()
+        self.chat_area.top_reached.connect(self.load_older_messages)
+        self.chat_area.bottom_reached.connect(self.load_newer_messages)
+        layout.addWidget(self.chat_area)
+
+    def _reset_reply(self):
+        self.current_response = ""
+        self.current_bubble = None
+        self.current_thinking = None
+        self.current_metrics = None
+        self.full_thinking_content = ""
+        self._shown_response = 0
+        self._shown_thinking = 0
+
+    def is_blank(self):
+        return self.conversation_id is None and self.worker is None and not self.chat_area.message_model.rowCount()
+
+    def display_title(self):
+        title = self.title or "NEW CHAT"
+        if len(title) > TAB_TITLE_CHARS:
+            title = title[:TAB_TITLE_CHARS - 3] + "..."
+        if self.worker is not None:
+            return f"{title} [{'QUEUED' if self.queued else '...'}]"
+        return f"{title} [+]" if self.unseen else title
+
+    def set_active(self, active):
+        self.active = active
+        if active:
+            self.unseen = False
+            self._render_reply()
+        self.state_changed.emit(self)
+
+    def clear(self):
+        self.detach_all()
+        self.conversation.clear()
+        self.chat_area.clear_chat()
+        self.conversation_id = None
+        self.title = ""
+        self.oldest_seq = 0
+        self.newest_seq = -1
+        self.has_newer = False
+        self.message_count = 0
+        self.history_loaded = True
+        self.state_changed.emit(self)
+
+    def attachments_busy(self):
+        # The running reply's retriever or a refresh still reads the attached indexes
+        return self.worker is not None or self.refreshing > 0
+
+    def detach_all(self):
+        if self.attachments_busy():
+            return False
+        self.attach_generation += 1
+        self.close_attachments()
+        return True
+
+    def close_attachments(self):
+        for indexer in self.attachments:
+            indexer.index.close()
+        self.attachments = []
+
+    def retriever(self, client, embed_model):
+        if not self.attachments:
+            return None
+        from api.rag import Retriever
+        return Retriever(client, self.attachments, embed_model)
+
+    def open_conversation(self, conversation_id, around_seq=None):
+        if self.worker is not None:
+            return False
+        if conversation_id != self.conversation_id:
+            self.clear()
+            self.conversation_id = conversation_id
+            # Showing a conversation only needs a page of it, not its whole history
+            self.message_count = self.store.message_count(conversation_id)
+            self.history_loaded = False
+            conversation = self.store.get_conversation(conversation_id)
+            if conversation:
+                self.title = conversation['title']
+                self.model = conversation['model'] or self.model
+                self._use_summary(conversation)
+        elif around_seq is None:
+            return True
+
+        # Only one page is put on screen; neighbouring pages load as the user scrolls
+        if around_seq is None:
+            page = self.store.load_page(conversation_id, limit=HISTORY_PAGE_SIZE)
+        else:
+            half = HISTORY_PAGE_SIZE // 2
+            page = self.store.load_page(conversation_id, before_seq=around_seq + 1, limit=half)
+            page += self.store.load_page_after(conversation_id, around_seq, limit=half)
+        self._show_page(page, around_seq)
+        self.state_changed.emit(self)
+        return True
+
+    def _load_history(self):
+        if not self.history_loaded:
+            for role, content in self.store.load_history(self.conversation_id):
+                self.conversation.add_message(role, content)
+            self.history_loaded = True
+
+    def _use_summary(self, conversation):
+        # A running summary saved by the background jobs (or an earlier reply) stands in for
+        # the turns it covers once they no longer fit the context window
+        if conversation['summary'] and conversation['summarized_upto'] > self.conversation.summarized_upto:
+            self.conversation.set_summary(conversation['summary'], conversation['summarized_upto'])
+
+    def load_older_messages(self):
+        if self.conversation_id is None or self.oldest_seq <= 0:
+            return
+        page = self.store.load_page(self.conversation_id, before_seq=self.oldest_seq,
+                                    limit=HISTORY_PAGE_SIZE)
+        if page:
+            self.oldest_seq = page[0]['seq']
+            self.chat_area.prepend_messages(self._page_rows(page)[0])
+        else:
+            self.oldest_seq = 0
+
+    def load_newer_messages(self):
+        if self.conversation_id is None or not self.has_newer:
+            return
+        page = self.store.load_page_after(self.conversation_id, self.newest_seq, limit=HISTORY_PAGE_SIZE)
+        if page:
+            self.newest_seq = page[-1]['seq']
+            self.chat_area.append_messages(self._page_rows(page)[0])
+        self.has_newer = bool(page) and self.newest_seq < self.message_count - 1
+
+    def _show_page(self, page, target_seq=None):
+        self.chat_area.clear_chat()
+        self.oldest_seq = page[0]['seq'] if page else 0
+        self.newest_seq = page[-1]['seq'] if page else -1
+        self.has_newer = self.newest_seq < self.message_count - 1
+
+        rows, target_row = self._page_rows(page, target_seq)
+        self.chat_area.append_messages(rows)
+        if target_row is None:
+            self.chat_area.scroll_to_bottom()
+        else:
+            self.chat_area.scroll_to_row(target_row)
+
+    def _page_rows(self, page, target_seq=None):
+        rows = []
+        target_row = None
+        for message in page:
+            if message['thinking'].strip():
+                rows.append((KIND_THINKING, message['thinking']))
+            if message['seq'] == target_seq:
+                target_row = len(rows)
+            kind = KIND_USER if message['role'] == 'user' else KIND_ASSISTANT
+            rows.append((kind, message['content'].lstrip()))
+            summary = format_summary(json.loads(message['metrics'])) if message['metrics'] else ""
+            if summary:
+                rows.append((KIND_METRICS, summary))
+        return rows, target_row
+
+    def add_user_message(self, message, model):
+        # Returns the conversation dict when this message started a new saved conversation
+        if self.has_newer:
+            # Replies go at the end, so bring the newest page back before sending
+            self._show_page(self.store.load_page(self.conversation_id, limit=HISTORY_PAGE_SIZE))
+        self.chat_area.add_message(message, is_user=True)
+
+        created = None
+        if self.conversation_id is None:
+            self.conversation_id = self.store.create_conversation(model, message[:60])
+            self.title = message[:60]
+            created = {'id': self.conversation_id, 'title': self.title, 'model': model}
+        else:
+            # Picks up a summary the background jobs wrote since the conversation was opened
+            conversation = self.store.get_conversation(self.conversation_id)
+            if conversation:
+                self._use_summary(conversation)
+        self.model = model
+        self._load_history()
+        self.conversation.add_message("user", message)
+        self.store.add_message(self.conversation_id, self.message_count, "user", message, model=model)
+        self.message_count += 1
+        return created
+
+    def start_reply(self, worker):
+        # Call before worker.start(); it may wait on the shared limit before it streams
+        self._reset_reply()
+        self._saved_summary_upto = self.conversation.summarized_upto
+        self.worker = worker
+        self.queued = True
+        worker.message_received.connect(self.on_message_received)
+        worker.thinking_received.connect(self.on_thinking_received)
+        worker.error_occurred.connect(self.on_error)
+        worker.response_started.connect(self.on_response_started)
+        worker.metrics_ready.connect(self.on_metrics)
+        worker.finished.connect(self.on_chat_finished)
+        self.state_changed.emit(self)
+
+    def stop(self):
+        if self.worker is not None:
+            self.worker.stop()
+
+    def on_response_started(self):
+        self.queued = False
+        self.state_changed.emit(self)
+
+    def on_metrics(self, metrics):
+        self.current_metrics = metrics
+
+    def on_thinking_received(self, chunk):
+        self.full_thinking_content += chunk
+        if self.active:
+            self._render_thinking()
+
+    def on_message_received(self, chunk):
+        self.current_response += chunk
+        if self.active:
+            self._render_response()
+
+    def _render_reply(self):
+        self._render_thinking()
+        self._render_response()
+
+    def _render_thinking(self):
+        if self._shown_thinking == len(self.full_thinking_content):
+            return
+        if self.current_thinking is None:
+            if not self.full_thinking_content.strip():
+                return
+            self.current_thinking = self.chat_area.add_thinking_section()
+        self.current_thinking.add_thinking_content(self.full_thinking_content[self._shown_thinking:])
+        self._shown_thinking = len(self.full_thinking_content)
+
+    def _render_response(self):
+        if self._shown_response == len(self.current_response):
+            return
+        if self.current_bubble is None:
+            # Don't open a bubble for the whitespace models emit after a think block
+            if not self.current_response.strip():
+                return
+            self.current_bubble = self.chat_area.add_streaming_message(is_user=False)
+            chunk = self.current_response.lstrip()
+        else:
+            chunk = self.current_response[self._shown_response:]
+        self._shown_response = len(self.current_response)
+        self.current_bubble.append_text(chunk)
+
+    def on_error(self, error_msg):
+        self._render_reply()
+        self.chat_area.add_message(f"Error: {error_msg}", is_user=False)
+
+    def on_chat_finished(self):
+        # A background tab lays its reply out once, here, without it being painted
+        self._render_reply()
+        if self.current_thinking is not None:
+            self.current_thinking.flush()
+        if self.current_bubble is not None:
+            self.chat_area.finish_streaming_message(self.current_bubble)
+
+        record = None
+        if self.current_metrics is not None:
+            if self.current_bubble is not None:
+                self.current_metrics.first_visible = self.current_bubble.first_flush_at
+            self.current_metrics.mark('render_done')
+            record = self.current_metrics.to_dict()
+
+        summary_upto = self.conversation.summarized_upto
+        if summary_upto > self._saved_summary_upto:
+            # Summarized for this reply; saved so the background jobs carry on from it
+            self.store.set_summary(self.conversation_id, self.conversation.summary, summary_upto)
+
+        replied = bool(self.current_response.strip())
+        if replied:
+            self.conversation.add_message("assistant", self.current_response)
+            self.store.add_message(self.conversation_id, self.message_count,
+                                   "assistant", self.current_response, self.full_thinking_content,
+                                   metrics=record)
+            self.message_count += 1
+            summary = format_summary(record) if record else ""
+            if summary:
+                self.chat_area.add_metrics(summary)
+
+        worker = self.worker
+        if worker.stopped:
+            self.chat_area.add_message("[STOPPED]", is_user=False)
+        self.worker = None
+        if self.shutting_down and not self.attachments_busy():
+            self.close_attachments()
+        self.queued = False
+        self.unseen = not self.active
+        self._reset_reply()
+        self.reply_finished.emit(self, worker.model, replied)
+        self.state_changed.emit(self)
+
+    def refresh_finished(self):
+        self.refreshing -= 1
+        if self.shutting_down and not self.attachments_busy():
+            self.close_attachments()
+
+    def shutdown(self):
+        # A running reply is stopped; what streamed so far is still saved when it finishes. The
+        # attached indexes are closed once neither it nor a refresh is reading them
+        self.shutting_down = True
+        self.attach_generation += 1
+        if self.worker is not None:
+            self.worker.stop()
+        if not self.attachments_busy():
+            self.close_attachments()
@@ -1,56 +1,253 @@
-from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
-                             QScrollArea, QFrame, QPushButton, QTextEdit, QSizePolicy)
-from PySide6.QtCore import Qt, Signal, QPropertyAnimation, QRect, QEasingCurve
-from PySide6.QtGui import QFont, QPainter, QPainterPath, QColor
+import bisect
+import itertools
+import math
+import time
+from collections import OrderedDict
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QAbstractItemView, QApplication,
+                             QFrame, QPushButton, QTextEdit, QSizePolicy, QStyledItemDelegate,
+                             QStyle, QStyleOptionViewItem, QMenu)
+from PySide6.QtCore import (Qt, Signal, QEvent, QRect, QRectF, QSize, QTimer, QModelIndex,
+                            QPersistentModelIndex)
+from PySide6.QtGui import (QFont, QFontMetrics, QColor, QPen, QPainter, QPalette, QRegion, QTextCursor,
+                           QTextDocument, QAbstractTextDocumentLayout)
+from api.profiling import SPANS
+from ui.chat_model import ChatMessageModel, KIND_USER, KIND_ASSISTANT, KIND_THINKING, KIND_METRICS
+from ui.markdown_render import (BlockSplitter, MarkdownRenderer, highlighter, BLOCK_CODE,
+                                TAIL_HIGHLIGHT_LIMIT)
 
-class MessageBubble(QLabel):
-    def __init__(self, message, is_user=True, parent=None):
+# Streamed text is coalesced and applied at most once per frame (~60 fps)
+FRAME_INTERVAL_MS = 16
+
+BUBBLE_MAX_WIDTH = 500
+BUBBLE_PADDING_X = 12
+BUBBLE_PADDING_Y = 8
+ROW_MARGIN_X = 30
+ROW_SPACING = 5
+# An expanded reasoning section shows this much at once and loads the rest in slices
+THINKING_FIRST_CHARS = 8000
+THINKING_CHUNK_CHARS = 16000
+# Number of viewport widths whose wrapped heights are kept around
+CACHED_WIDTHS = 4
+# Rendered Markdown documents kept for painted assistant rows, keyed by (message, width)
+CACHED_DOCUMENTS = 64
+
+class StreamingMessageBubble(QTextEdit):
+    height_changed = Signal()
+    
+    def __init__(self, is_user=False, parent=None):
+        super().__init__(parent)
         self.is_user = is_user
+        self.index = None
+        self.first_flush_at = None
+        self._pending = []
+        self._text_parts = []
         
-        # Add prefix for user/assistant
-        prefix = "[USER]" if self.is_user else "[ASSISTANT]"
-        full_message = f"{prefix} {message}"
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(FRAME_INTERVAL_MS)
+        self._flush_timer.timeout.connect(self.flush)
         
-        super().__init__(full_message, parent)
         self.setup_ui()
         
+        prefix = "[USER]" if self.is_user else "[ASSISTANT]"
+        self._cursor = QTextCursor(self.document())
+        self._cursor.insertText(f"{prefix} ")
+        
+        # Assistant text is rendered as Markdown. Everything before _stable_position is laid
+        # down once; only the live tail after it (the unfinished paragraph, or the unfinished
+        # last line of an open code block) is rebuilt on each flush. Code is inserted plain and
+        # recoloured in place when the highlighter thread posts its runs back.
+        self._splitter = BlockSplitter()
+        self._renderer = MarkdownRenderer()
+        self._stable_position = self._cursor.position()
+        self._first_block = True
+        self._code_blocks = 0
+        self._open_code = None
+        self._recolor = {}
+        self._tail_job = None
+        self._tail_generation = 0
+        if not self.is_user:
+            highlighter().highlighted.connect(self._on_highlighted)
+        
     def setup_ui(self):
-        self.setWordWrap(True)
+        self.setReadOnly(True)
         self.setTextInteractionFlags(Qt.TextSelectableByMouse)
-        self.setSizePolicy(QSizePolicy.Policy.Preferred, QSizePolicy.Policy.Minimum)
-        self.setAlignment(Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setSizePolicy(QSizePolicy.Policy.Preferred, QSizePolicy.Policy.Fixed)
+        self.setMaximumWidth(500)
         
         font = QFont("Courier New", 12)
         self.setFont(font)
         
+        self.document().setDocumentMargin(0)
+        # Appended to while streaming and never edited, so no undo history
+        self.setUndoRedoEnabled(False)
+        self.document().documentLayout().documentSizeChanged.connect(self._update_height)
+        
+        self.setStyleSheet("""
+            QTextEdit {
+                background: #001a00;
+                border: 1px solid #00aa00;
+                border-radius: 3px;
+                padding: 8px 12px;
+                color: #00cc00;
+            }
+        """)
+        
+    def sizeHint(self):
+        return QSize(500, self.height())
+        
+    def append_text(self, text):
+        self._pending.append(text)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+            
+    def flush(self):
+        self._flush_timer.stop()
+        if not self._pending:
+            return
+        started = SPANS.start()
+        text = "".join(self._pending)
+        self._pending = []
+        self._text_parts.append(text)
         if self.is_user:
-            self.setStyleSheet("""
-                QLabel {
-                    background: #001100;
-                    border: 1px solid #00ff00;
-                    border-radius: 3px;
-                    padding: 8px 12px;
-                    color: #00ff00;
-                    max-width: 500px;
-                }
-            """)
+            self._cursor.movePosition(QTextCursor.MoveOperation.End)
+            self._cursor.insertText(text)
         else:
-            self.setStyleSheet("""
-                QLabel {
-                    background: #001a00;
-                    border: 1px solid #00aa00;
-                    border-radius: 3px;
-                    padding: 8px 12px;
-                    color: #00cc00;
-                    max-width: 500px;
-                }
-            """)
+            self._render(self._splitter.feed(text))
+        SPANS.end('bubble.flush', started)
+        if self.first_flush_at is None:
+            self.first_flush_at = time.perf_counter()
+        
+    def text(self):
+        return "".join(self._text_parts)
+        
+    def _render(self, finished):
+        cursor = self._cursor
+        cursor.beginEditBlock()
+        cursor.setPosition(self._stable_position)
+        cursor.movePosition(QTextCursor.MoveOperation.End, QTextCursor.MoveMode.KeepAnchor)
+        cursor.removeSelectedText()
+        
+        for block in finished:
+            if block[0] == BLOCK_CODE:
+                self._close_code(block)
+            else:
+                self._renderer.insert_block(cursor, block, self._first_block)
+                self._first_block = False
+            self._stable_position = cursor.position()
+        
+        tail = self._splitter.tail()
+        if tail is not None and tail[0] == BLOCK_CODE:
+            self._extend_code(tail)
+        elif tail is not None:
+            self._renderer.insert_block(cursor, tail, self._first_block)
+        cursor.endEditBlock()
+        
+    def _open_code_block(self, lang):
+        self._cursor.insertBlock(self._renderer.code_block_format, self._renderer.char_format(None))
+        self._first_block = False
+        self._code_blocks += 1
+        self._stable_position = self._cursor.position()
+        self._open_code = {'start': self._stable_position, 'lang': lang, 'inserted': 0, 'runs': [],
+                           'highlighted': 0}
+        self._tail_generation += 1
+        self._tail_job = None
+        
+    def _extend_code(self, tail):
+        if self._open_code is None:
+            self._open_code_block(tail[1])
+        code = self._open_code
+        text = tail[2]
+        # Complete lines become stable; the unfinished last line stays live
+        complete = max(0, text.rfind("\n"))
+        if complete > code['inserted']:
+            self._cursor.insertText(text[code['inserted']:complete], self._renderer.char_format(None))
+            code['inserted'] = complete
+            self._stable_position = self._cursor.position()
+        self._cursor.insertText(text[code['inserted']:], self._renderer.char_format(None))
+        
+        # One tail job in flight at a time, each re-lexing the block's complete lines
+        if (code['lang'] and self._tail_job is None and code['inserted'] > code['highlighted']
+                and code['inserted'] <= TAIL_HIGHLIGHT_LIMIT):
+            self._tail_job = ('tail', id(self), self._tail_generation, code['inserted'])
+            highlighter().request(self._tail_job, code['lang'], text[:code['inserted']])
+            
+    def _close_code(self, block):
+        kind, lang, text, closed = block
+        if self._open_code is None:
+            self._open_code_block(lang)
+        code = self._open_code
+        self._open_code = None
+        self._tail_job = None
+        if len(text) < code['inserted']:
+            # Trailing blank lines inside the fence were already laid down
+            self._cursor.setPosition(code['start'] + len(text))
+            self._cursor.movePosition(QTextCursor.MoveOperation.End, QTextCursor.MoveMode.KeepAnchor)
+            self._cursor.removeSelectedText()
+            code['inserted'] = len(text)
+        self._cursor.insertText(text[code['inserted']:], self._renderer.char_format(None))
+        
+        runs = highlighter().runs(lang, text)
+        if runs is not None:
+            self._renderer.apply_runs(self.document(), code['start'], code['runs'], runs)
+        else:
+            self._recolor[highlighter().key(lang, text)] = (code['start'], code['runs'])
+            
+    def _on_highlighted(self, key, runs):
+        if key == self._tail_job and self._open_code is not None:
+            self._tail_job = None
+            code = self._open_code
+            self._renderer.apply_runs(self.document(), code['start'], code['runs'], runs)
+            code['runs'] = runs
+            code['highlighted'] = key[3]
+        elif key in self._recolor:
+            start, applied = self._recolor.pop(key)
+            self._renderer.apply_runs(self.document(), start, applied, runs)
+        
+    def take_document(self):
+        # Hands the rendered document to the painted row so a long answer isn't built and laid
+        # out a second time; returns it with its code block count and pending highlight keys
+        pending = set(self._recolor)
+        if self._open_code is not None and self._open_code['lang']:
+            tail = self._splitter.tail()
+            if highlighter().runs(tail[1], tail[2]) is None:
+                pending.add(highlighter().key(tail[1], tail[2]))
+        highlighter().highlighted.disconnect(self._on_highlighted)
+        document = self.document()
+        document.documentLayout().documentSizeChanged.disconnect(self._update_height)
+        document.setParent(None)
+        self.setDocument(QTextDocument(self))
+        return document, self._code_blocks, pending
+        
+    def _update_height(self, size):
+        chrome = self.height() - self.viewport().height()
+        height = int(size.height()) + chrome
+        if height != self.height():
+            self.setFixedHeight(height)
+            self.height_changed.emit()
 
 class ThinkingSection(QFrame):
+    toggled = Signal(bool)
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self.is_expanded = False
-        self.thinking_content = ""
+        self._pending = []
+        # Text not yet in the document; streamed appends queue behind it to keep the order
+        self._remaining = []
+        
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(FRAME_INTERVAL_MS)
+        self._flush_timer.timeout.connect(self.flush)
+        
+        # One slice per frame, so input and painting get a turn in between
+        self._load_timer = QTimer(self)
+        self._load_timer.setInterval(FRAME_INTERVAL_MS)
+        self._load_timer.timeout.connect(self._load_more)
+        
         self.setup_ui()
         
     def setup_ui(self):
@@ -85,6 +282,8 @@ class ThinkingSection(QFrame):
         self.content_area = QTextEdit()
         self.content_area.setVisible(False)
         self.content_area.setReadOnly(True)
+        # Every programmatic insert would otherwise be kept on the undo stack
+        self.content_area.setUndoRedoEnabled(False)
         self.content_area.setMaximumHeight(200)
         self.content_area.setStyleSheet("""
             QTextEdit {
@@ -122,16 +321,46 @@ class ThinkingSection(QFrame):
         self.setSizePolicy(QSizePolicy.Policy.Preferred, QSizePolicy.Policy.Minimum)
         
     def add_thinking_content(self, content):
-        self.thinking_content += content
-        self.content_area.setPlainText(self.thinking_content)
+        self._pending.append(content)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+            
+    @property
+    def thinking_content(self):
+        return self.content_area.toPlainText() + "".join(self._remaining) + "".join(self._pending)
+        
+    def flush(self):
+        self._flush_timer.stop()
+        if not self._pending:
+            return
+        text = "".join(self._pending)
+        self._pending = []
+        if self._remaining:
+            self._remaining.append(text)
+            return
         
-        cursor = self.content_area.textCursor()
-        cursor.moveToEnd()
-        self.content_area.setTextCursor(cursor)
+        scrollbar = self.content_area.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum()
+        
+        cursor = QTextCursor(self.content_area.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.insertText(text)
+        
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
         
     def set_thinking_content(self, content):
-        self.thinking_content = content
-        self.content_area.setPlainText(content)
+        self._flush_timer.stop()
+        self._pending = []
+        self._remaining = []
+        # The first screen now, cut at a line break; the rest one slice per frame
+        cut = len(content)
+        if cut > THINKING_FIRST_CHARS:
+            cut = content.rfind("\n", 0, THINKING_FIRST_CHARS) + 1 or THINKING_FIRST_CHARS
+            self._remaining = [content[i:i + THINKING_CHUNK_CHARS]
+                               for i in range(cut, len(content), THINKING_CHUNK_CHARS)]
+            self._load_timer.start()
+        self.content_area.setPlainText(content[:cut])
         
         if content.strip():
             self.toggle_button.setText("[SHOW REASONING]")
@@ -139,6 +368,16 @@ class ThinkingSection(QFrame):
         else:
             self.toggle_button.setVisible(False)
         
+    def _load_more(self):
+        if not self._remaining:
+            self._load_timer.stop()
+            return
+        cursor = QTextCursor(self.content_area.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.insertText(self._remaining.pop(0))
+        if not self._remaining:
+            self._load_timer.stop()
+        
     def toggle_expanded(self):
         self.is_expanded = not self.is_expanded
         self.content_area.setVisible(self.is_expanded)
@@ -147,30 +386,295 @@ class ThinkingSection(QFrame):
             self.toggle_button.setText("[HIDE REASONING]")
         else:
             self.toggle_button.setText("[SHOW REASONING]")
+        self.toggled.emit(self.is_expanded)
+
+class ThinkingRow:
+    def __init__(self, chat_area, index):
+        self.chat_area = chat_area
+        self.index = index
+        self.key = index.data(ChatMessageModel.KeyRole)
+        
+    def add_thinking_content(self, content):
+        self.chat_area.message_model.append_text(self.index.row(), content)
+        section = self.chat_area.thinking_widgets.get(self.key)
+        if section is not None:
+            section.add_thinking_content(content)
+            
+    def set_thinking_content(self, content):
+        self.chat_area.message_model.set_text(self.index.row(), content)
+        section = self.chat_area.thinking_widgets.get(self.key)
+        if section is not None:
+            section.set_thinking_content(content)
+            
+    def flush(self):
+        # Called once the reasoning is complete
+        section = self.chat_area.thinking_widgets.get(self.key)
+        if section is not None:
+            section.flush()
+        if self.index.isValid():
+            self.chat_area.message_model.compact(self.index.row())
 
-class ChatArea(QScrollArea):
+class MessageDelegate(QStyledItemDelegate):
+    def __init__(self, view):
+        super().__init__(view)
+        self.view = view
+        self.font = QFont("Courier New", 12)
+        self.metrics = QFontMetrics(self.font)
+        self.button_font = QFont("Courier New", 10, QFont.Weight.Bold)
+        self.button_metrics = QFontMetrics(self.button_font)
+        self.stats_font = QFont("Courier New", 9)
+        self.stats_metrics = QFontMetrics(self.stats_font)
+        
+        # width -> {message key: (bubble size, exact)}; off-screen rows only get a cheap estimate
+        self._sizes = OrderedDict()
+        self._paragraphs = {}
+        # (message key, text width) -> (document, code blocks, highlight keys still pending)
+        self._documents = OrderedDict()
+        self.renderer = MarkdownRenderer()
+        highlighter().highlighted.connect(self._on_highlighted)
+        
+    def invalidate(self, key=None):
+        if key is None:
+            self._sizes.clear()
+            self._paragraphs.clear()
+            self._documents.clear()
+            return
+        self._paragraphs.pop(key, None)
+        for sizes in self._sizes.values():
+            sizes.pop(key, None)
+        for cache_key in [cache_key for cache_key in self._documents if cache_key[0] == key]:
+            del self._documents[cache_key]
+            
+    def row_width(self):
+        return max(1, self.view.viewport().width() - 2 * ROW_SPACING)
+        
+    def sizeHint(self, option, index):
+        width = self.row_width()
+        widget = self.view.indexWidget(index)
+        if widget is not None:
+            return QSize(width, widget.sizeHint().height())
+        kind = index.data(ChatMessageModel.KindRole)
+        if kind == KIND_THINKING:
+            return QSize(width, self._button_size().height())
+        if kind == KIND_METRICS:
+            return QSize(width, self.stats_metrics.height())
+        return QSize(width, self._bubble_size(index, width, exact=False).height())
+        
+    def paint(self, painter, option, index):
+        if self.view.indexWidget(index) is not None:
+            return
+        
+        painter.save()
+        painter.setRenderHint(painter.RenderHint.Antialiasing)
+        hovered = bool(option.state & QStyle.StateFlag.State_MouseOver)
+        
+        kind = index.data(ChatMessageModel.KindRole)
+        if kind == KIND_THINKING:
+            self._paint_button(painter, option.rect, hovered)
+        elif kind == KIND_METRICS:
+            painter.setFont(self.stats_font)
+            painter.setPen(QColor("#888800"))
+            painter.drawText(option.rect.adjusted(ROW_MARGIN_X + 4, 0, -ROW_MARGIN_X, 0),
+                             Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, index.data())
+        else:
+            self._paint_bubble(painter, option.rect, index)
+        painter.restore()
+        
+    def _paint_bubble(self, painter, row_rect, index):
+        width = self.row_width()
+        estimated = self._cached_size(index.data(ChatMessageModel.KeyRole), width)
+        size = self._bubble_size(index, width, exact=True)
+        if estimated is not None and estimated.height() != size.height():
+            self.sizeHintChanged.emit(index)
+        
+        is_user = index.data(ChatMessageModel.KindRole) == KIND_USER
+        if is_user:
+            x = row_rect.right() - ROW_MARGIN_X - size.width()
+            background, border, color = "#001100", "#00ff00", "#00ff00"
+        else:
+            x = row_rect.left() + ROW_MARGIN_X
+            background, border, color = "#001a00", "#00aa00", "#00cc00"
+        if index.data(ChatMessageModel.KeyRole) == self.view.highlight_key:
+            border = "#ffff00"
+        
+        bubble = QRect(x, row_rect.top(), size.width(), size.height())
+        painter.setPen(QPen(QColor(border), 1))
+        painter.setBrush(QColor(background))
+        painter.drawRoundedRect(bubble.adjusted(0, 0, -1, -1), 3, 3)
+        
+        painter.setFont(self.font)
+        painter.setPen(QColor(color))
+        text_rect = bubble.adjusted(BUBBLE_PADDING_X + 1, BUBBLE_PADDING_Y + 1,
+                                    -BUBBLE_PADDING_X - 1, -BUBBLE_PADDING_Y - 1)
+        if is_user:
+            painter.drawText(text_rect, Qt.TextFlag.TextWordWrap, self._display_text(index))
+            return
+        
+        document = self._document(index, self._text_width(width))[0]
+        context = QAbstractTextDocumentLayout.PaintContext()
+        palette = context.palette
+        palette.setColor(QPalette.ColorRole.Text, QColor(color))
+        context.palette = palette
+        # Rows can be far taller than the viewport; only lay out and draw what is visible
+        visible = text_rect.intersected(self.view.viewport().rect())
+        context.clip = QRectF(visible.translated(-text_rect.topLeft()))
+        painter.setClipRect(visible)
+        painter.translate(text_rect.topLeft())
+        document.documentLayout().draw(painter, context)
+        
+    def _paint_button(self, painter, row_rect, hovered):
+        size = self._button_size()
+        button = QRect(row_rect.left() + ROW_MARGIN_X + 8, row_rect.top() + 4,
+                       size.width(), size.height() - 8)
+        painter.setPen(QPen(QColor("#ffffff" if hovered else "#ffff00"), 1))
+        painter.setBrush(QColor("#004400" if hovered else "#003300"))
+        painter.drawRect(button.adjusted(0, 0, -1, -1))
+        painter.setFont(self.button_font)
+        painter.drawText(button, Qt.AlignmentFlag.AlignCenter, "[SHOW REASONING]")
+        
+    def _button_size(self):
+        metrics = self.button_metrics
+        return QSize(metrics.horizontalAdvance("[SHOW REASONING]") + 18, metrics.height() + 18)
+        
+    def _display_text(self, index):
+        prefix = "[USER]" if index.data(ChatMessageModel.KindRole) == KIND_USER else "[ASSISTANT]"
+        return f"{prefix} {index.data()}"
+        
+    def _text_width(self, width):
+        return max(1, min(BUBBLE_MAX_WIDTH, width - 2 * ROW_MARGIN_X) - 2 * (BUBBLE_PADDING_X + 1))
+        
+    def _document(self, index, text_width):
+        cache_key = (index.data(ChatMessageModel.KeyRole), text_width)
+        entry = self._documents.get(cache_key)
+        if entry is not None:
+            self._documents.move_to_end(cache_key)
+            return entry
+        
+        document = QTextDocument()
+        document.setDefaultFont(self.font)
+        document.setDocumentMargin(0)
+        code_blocks, pending = self.renderer.render(document, "[ASSISTANT] ", index.data())
+        document.setTextWidth(text_width)
+        entry = self._documents[cache_key] = (document, code_blocks, pending)
+        while len(self._documents) > CACHED_DOCUMENTS:
+            self._documents.popitem(last=False)
+        return entry
+        
+    def adopt_document(self, index, document, code_blocks, pending):
+        text_width = self._text_width(self.row_width())
+        if document.textWidth() != text_width:
+            return
+        self._documents[(index.data(ChatMessageModel.KeyRole), text_width)] = (document, code_blocks, pending)
+        while len(self._documents) > CACHED_DOCUMENTS:
+            self._documents.popitem(last=False)
+            
+    def _on_highlighted(self, key, runs):
+        # Colours don't change the layout, so a repaint is enough
+        stale = [cache_key for cache_key, entry in self._documents.items() if key in entry[2]]
+        for cache_key in stale:
+            del self._documents[cache_key]
+        if stale:
+            self.view.viewport().update()
+            
+    def _cached_size(self, key, width):
+        entry = self._sizes.get(width, {}).get(key)
+        return entry[0] if entry is not None else None
+        
+    def _bubble_size(self, index, width, exact):
+        sizes = self._sizes.get(width)
+        if sizes is None:
+            sizes = self._sizes[width] = {}
+            while len(self._sizes) > CACHED_WIDTHS:
+                self._sizes.popitem(last=False)
+        else:
+            self._sizes.move_to_end(width)
+        
+        key = index.data(ChatMessageModel.KeyRole)
+        entry = sizes.get(key)
+        if entry is not None and (entry[1] or not exact):
+            return entry[0]
+        
+        chrome_x = 2 * (BUBBLE_PADDING_X + 1)
+        chrome_y = 2 * (BUBBLE_PADDING_Y + 1)
+        available = self._text_width(width)
+        
+        if exact and index.data(ChatMessageModel.KindRole) == KIND_ASSISTANT:
+            document, code_blocks, pending = self._document(index, available)
+            # Code blocks are shaded across the full text width, so those bubbles don't shrink
+            text_width = available if code_blocks else min(available, math.ceil(document.idealWidth()))
+            size = QSize(text_width + chrome_x, math.ceil(document.size().height()) + chrome_y)
+        elif exact:
+            rect = self.metrics.boundingRect(QRect(0, 0, available, 1 << 24),
+                                             Qt.TextFlag.TextWordWrap, self._display_text(index))
+            size = QSize(rect.width() + chrome_x, rect.height() + chrome_y)
+        else:
+            paragraphs = self._paragraphs.get(key)
+            if paragraphs is None:
+                paragraphs = [len(line) for line in self._display_text(index).split("\n")]
+                self._paragraphs[key] = paragraphs
+            per_line = max(1, available // max(1, self.metrics.averageCharWidth()))
+            lines = sum(max(1, -(-length // per_line)) for length in paragraphs)
+            size = QSize(available + chrome_x, lines * self.metrics.lineSpacing() + chrome_y)
+        
+        sizes[key] = (size, exact)
+        return size
+
+class ChatArea(QAbstractItemView):
+    top_reached = Signal()
+    bottom_reached = Signal()
+    
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.stick_to_bottom = True
+        self.highlight_key = None
+        self._anchor_from_bottom = None
+        self.thinking_widgets = {}
+        # Row heights at _layout_width and each row's top. An appended or resized row is measured
+        # on its own; only a new width asks the delegate about every row again.
+        self._heights = []
+        self._tops = [ROW_SPACING]
+        self._layout_width = None
+        self._changed_rows = set()
+        self._hover_row = None
+        self._option = QStyleOptionViewItem()
+        self.message_model = ChatMessageModel(self)
         self.setup_ui()
         
     def setup_ui(self):
-        self.setWidgetResizable(True)
+        self.setModel(self.message_model)
+        self.delegate = MessageDelegate(self)
+        self.setItemDelegate(self.delegate)
+        
+        # Size changes reported while painting or streaming are measured together on the next pass
+        self._layout_timer = QTimer(self)
+        self._layout_timer.setSingleShot(True)
+        self._layout_timer.setInterval(0)
+        self._layout_timer.timeout.connect(self._layout_changed_rows)
+        self.delegate.sizeHintChanged.connect(self._on_size_hint_changed)
+        
         self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
         self.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+        self.verticalScrollBar().setSingleStep(self.delegate.metrics.lineSpacing())
+        self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.setMouseTracking(True)
+        
+        self.clicked.connect(self._on_clicked)
+        self.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.customContextMenuRequested.connect(self._show_context_menu)
         
-        self.chat_widget = QWidget()
-        self.chat_widget.setStyleSheet("background: #000000;")
-        self.chat_layout = QVBoxLayout(self.chat_widget)
-        self.chat_layout.setContentsMargins(20, 20, 20, 20)
-        self.chat_layout.setSpacing(10)
-        self.chat_layout.addStretch()
+        self.message_model.modelReset.connect(self._on_model_reset)
         
-        self.setWidget(self.chat_widget)
+        # Keep following the tail while streamed bubbles grow, unless the user scrolled up
+        scrollbar = self.verticalScrollBar()
+        scrollbar.valueChanged.connect(self._on_scroll)
+        scrollbar.rangeChanged.connect(self._on_range_changed)
         
         self.setStyleSheet("""
-            QScrollArea {
+            QAbstractItemView {
                 background: #000000;
                 border: none;
+                padding: 15px 0px;
             }
             QScrollBar:vertical {
                 background: #001100;
@@ -189,47 +693,292 @@ class ChatArea(QScrollArea):
         """)
         
     def add_message(self, message, is_user=True):
-        bubble = MessageBubble(message, is_user)
+        started = SPANS.start()
+        row = self.message_model.append_message(KIND_USER if is_user else KIND_ASSISTANT, message)
+        self.scroll_to_bottom()
+        SPANS.end('chat_area.add_message', started)
+        return row
         
-        # Create container for alignment
-        container = QWidget()
-        container_layout = QHBoxLayout(container)
-        container_layout.setContentsMargins(0, 0, 0, 0)
+    def add_streaming_message(self, is_user=False):
+        row = self.message_model.append_message(KIND_USER if is_user else KIND_ASSISTANT)
+        index = self.message_model.index(row)
+        
+        # The growing tail is a live QTextEdit; it becomes a painted row once finished
+        bubble = StreamingMessageBubble(is_user)
+        bubble.index = QPersistentModelIndex(index)
+        bubble.height_changed.connect(lambda: self.delegate.sizeHintChanged.emit(QModelIndex(bubble.index)))
+        self.setIndexWidget(index, self._wrap(bubble, is_user))
         
-        if is_user:
-            container_layout.addStretch()
-            container_layout.addWidget(bubble)
-            container_layout.addSpacing(10)
-        else:
-            container_layout.addSpacing(10)
-            container_layout.addWidget(bubble)
-            container_layout.addStretch()
-            
-        self.chat_layout.insertWidget(self.chat_layout.count() - 1, container)
         self.scroll_to_bottom()
+        return bubble
         
-    def add_thinking_section(self):
-        self.current_thinking = ThinkingSection()
+    def finish_streaming_message(self, bubble):
+        bubble.flush()
+        index = QModelIndex(bubble.index)
+        if not index.isValid():
+            return
+        self.message_model.set_text(index.row(), bubble.text())
+        if not bubble.is_user:
+            self.delegate.adopt_document(index, *bubble.take_document())
+        self.setIndexWidget(index, None)
+        self.delegate.sizeHintChanged.emit(index)
         
-        # Create container for alignment (same as assistant messages)
-        container = QWidget()
-        container_layout = QHBoxLayout(container)
-        container_layout.setContentsMargins(0, 0, 0, 0)
+    def prepend_messages(self, messages):
+        # messages are (kind, text) pairs; keep the rows currently on screen where they are
+        scrollbar = self.verticalScrollBar()
+        if not self.stick_to_bottom:
+            self._anchor_from_bottom = scrollbar.maximum() - scrollbar.value()
+        self.message_model.prepend_messages(messages)
+        
+    def add_metrics(self, summary):
+        self.message_model.append_message(KIND_METRICS, summary)
         
-        container_layout.addSpacing(10)
-        container_layout.addWidget(self.current_thinking)
-        container_layout.addStretch()
+    def append_messages(self, messages):
+        # History pages extend below the reader; don't chase the new bottom
+        if self.message_model.rowCount():
+            self.stick_to_bottom = False
+        self.message_model.extend_messages(messages)
         
-        self.chat_layout.insertWidget(self.chat_layout.count() - 1, container)
+    def scroll_to_row(self, row, highlight=True):
+        index = self.message_model.index(row)
+        if not index.isValid():
+            return
+        self.stick_to_bottom = False
+        self.highlight_key = index.data(ChatMessageModel.KeyRole) if highlight else None
+        self.scrollTo(index, QAbstractItemView.ScrollHint.PositionAtCenter)
+        self.viewport().update()
+        
+    def add_thinking_section(self):
+        row = self.message_model.append_message(KIND_THINKING)
         self.scroll_to_bottom()
-        return self.current_thinking
+        return ThinkingRow(self, QPersistentModelIndex(self.message_model.index(row)))
         
     def scroll_to_bottom(self):
+        started = SPANS.start()
+        self.stick_to_bottom = True
         self.verticalScrollBar().setValue(self.verticalScrollBar().maximum())
+        SPANS.end('chat_area.scroll_to_bottom', started)
+        
+    def _layout(self, rows=None):
+        started = SPANS.start()
+        width = self.viewport().width()
+        if rows is None or width != self._layout_width:
+            self._layout_width = width
+            rows = range(len(self._heights))
+        for row in rows:
+            self._heights[row] = self.delegate.sizeHint(self._option, self.message_model.index(row)).height()
+        self._tops = list(itertools.accumulate((height + ROW_SPACING for height in self._heights),
+                                               initial=ROW_SPACING))
+        self.updateGeometries()
+        self.viewport().update()
+        SPANS.end('chat_area.layout', started)
+        
+    def _on_size_hint_changed(self, index):
+        if index.isValid():
+            self._changed_rows.add(index.row())
+            self._layout_timer.start()
+            
+    def _layout_changed_rows(self):
+        rows = sorted(row for row in self._changed_rows if row < len(self._heights))
+        self._changed_rows.clear()
+        self._layout(rows)
+        
+    def _shift_changed_rows(self, start, delta):
+        self._changed_rows = {row + delta if row >= start else row for row in self._changed_rows
+                              if not start <= row < start - delta}
+        
+    def rowsInserted(self, parent, start, end):
+        self._shift_changed_rows(start, end - start + 1)
+        self._heights[start:start] = [0] * (end - start + 1)
+        self._layout(range(start, end + 1))
+        super().rowsInserted(parent, start, end)
+        
+    def rowsAboutToBeRemoved(self, parent, start, end):
+        self._shift_changed_rows(start, start - end - 1)
+        del self._heights[start:end + 1]
+        self._layout([])
+        super().rowsAboutToBeRemoved(parent, start, end)
         
+    def dataChanged(self, top_left, bottom_right, roles=()):
+        rows = range(top_left.row(), bottom_right.row() + 1)
+        for row in rows:
+            self.delegate.invalidate(self.message_model.key(row))
+        super().dataChanged(top_left, bottom_right, roles)
+        self._layout(rows)
+        
+    def doItemsLayout(self):
+        # Qt asks for this whenever a size hint changes; rows are already laid out unless the width moved
+        if self._layout_width != self.viewport().width():
+            self._layout()
+        super().doItemsLayout()
+        
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self._layout_width != self.viewport().width():
+            self._layout()
+            
+    def updateGeometries(self):
+        scrollbar = self.verticalScrollBar()
+        height = self.viewport().height()
+        scrollbar.setPageStep(height)
+        scrollbar.setRange(0, max(0, self._tops[-1] - height))
+        super().updateGeometries()
+        
+    def visualRect(self, index):
+        if not index.isValid() or index.row() >= len(self._heights):
+            return QRect()
+        row = index.row()
+        return QRect(ROW_SPACING, self._tops[row] - self.verticalOffset(), self.delegate.row_width(),
+                     self._heights[row])
+        
+    def indexAt(self, point):
+        y = point.y() + self.verticalOffset()
+        row = bisect.bisect_right(self._tops, y) - 1
+        if 0 <= row < len(self._heights) and y < self._tops[row] + self._heights[row]:
+            return self.message_model.index(row)
+        return QModelIndex()
+        
+    def scrollTo(self, index, hint=QAbstractItemView.ScrollHint.EnsureVisible):
+        rect = self.visualRect(index)
+        if not rect.isValid():
+            return
+        scrollbar = self.verticalScrollBar()
+        height = self.viewport().height()
+        top = rect.top() + scrollbar.value()
+        if hint == QAbstractItemView.ScrollHint.PositionAtTop:
+            scrollbar.setValue(top)
+        elif hint == QAbstractItemView.ScrollHint.PositionAtBottom:
+            scrollbar.setValue(top + rect.height() - height)
+        elif hint == QAbstractItemView.ScrollHint.PositionAtCenter:
+            scrollbar.setValue(top + (rect.height() - height) // 2)
+        elif rect.top() < 0:
+            scrollbar.setValue(top)
+        elif rect.bottom() >= height:
+            scrollbar.setValue(min(top, top + rect.height() - height))
+            
+    def verticalOffset(self):
+        return self.verticalScrollBar().value()
+        
+    def horizontalOffset(self):
+        return 0
+        
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().scroll(dx, dy)
+        
+    def moveCursor(self, action, modifiers):
+        return QModelIndex()
+        
+    def isIndexHidden(self, index):
+        return False
+        
+    def setSelection(self, rect, flags):
+        pass
+        
+    def visualRegionForSelection(self, selection):
+        return QRegion()
+        
+    def paintEvent(self, event):
+        started = SPANS.start()
+        painter = QPainter(self.viewport())
+        option = QStyleOptionViewItem()
+        self.initViewItemOption(option)
+        state = option.state
+        area = event.rect()
+        offset = self.verticalOffset()
+        # Only the rows crossing the damaged area are painted
+        row = max(0, bisect.bisect_right(self._tops, area.top() + offset) - 1)
+        while row < len(self._heights) and self._tops[row] - offset <= area.bottom():
+            index = self.message_model.index(row)
+            option.rect = self.visualRect(index)
+            option.state = state | QStyle.StateFlag.State_MouseOver if row == self._hover_row else state
+            self.delegate.paint(painter, option, index)
+            row += 1
+        painter.end()
+        SPANS.end('chat_area.paint', started)
+        
+    def mouseMoveEvent(self, event):
+        super().mouseMoveEvent(event)
+        index = self.indexAt(event.position().toPoint())
+        self._set_hover_row(index.row() if index.isValid() else None)
+        
+    def viewportEvent(self, event):
+        if event.type() == QEvent.Type.Leave:
+            self._set_hover_row(None)
+        return super().viewportEvent(event)
+        
+    def _set_hover_row(self, row):
+        if row != self._hover_row:
+            self._hover_row = row
+            self.viewport().update()
+
     def clear_chat(self):
-        # Remove all widgets except the stretch
-        for i in reversed(range(self.chat_layout.count() - 1)):
-            item = self.chat_layout.itemAt(i)
-            if item.widget():
-                item.widget().setParent(None)
\ No newline at end of file
+        self.highlight_key = None
+        self.message_model.clear()
+        
+    def _wrap(self, widget, is_user):
+        container = QWidget()
+        container_layout = QHBoxLayout(container)
+        container_layout.setContentsMargins(0, 0, 0, 0)
+        
+        if is_user:
+            container_layout.addStretch()
+            container_layout.addWidget(widget)
+            container_layout.addSpacing(ROW_MARGIN_X)
+        else:
+            container_layout.addSpacing(ROW_MARGIN_X)
+            container_layout.addWidget(widget)
+            container_layout.addStretch()
+        return container
+        
+    def _set_thinking_expanded(self, index, expanded):
+        key = index.data(ChatMessageModel.KeyRole)
+        if expanded:
+            section = ThinkingSection()
+            section.set_thinking_content(index.data())
+            section.toggle_expanded()
+            persistent = QPersistentModelIndex(index)
+            section.toggled.connect(
+                lambda checked: checked or self._set_thinking_expanded(QModelIndex(persistent), False))
+            self.thinking_widgets[key] = section
+            self.setIndexWidget(index, self._wrap(section, False))
+        else:
+            self.thinking_widgets.pop(key, None)
+            self.setIndexWidget(index, None)
+        self.message_model.set_expanded(index.row(), expanded)
+        self.delegate.sizeHintChanged.emit(index)
+        
+    def _on_clicked(self, index):
+        if index.data(ChatMessageModel.KindRole) == KIND_THINKING and self.indexWidget(index) is None:
+            self._set_thinking_expanded(index, True)
+            
+    def _show_context_menu(self, pos):
+        index = self.indexAt(pos)
+        if not index.isValid() or index.data(ChatMessageModel.KindRole) in (KIND_THINKING, KIND_METRICS):
+            return
+        menu = QMenu(self)
+        copy_action = menu.addAction("[COPY]")
+        if menu.exec(self.viewport().mapToGlobal(pos)) == copy_action:
+            QApplication.clipboard().setText(index.data())
+            
+    def _on_model_reset(self):
+        self.thinking_widgets.clear()
+        self.delegate.invalidate()
+        self._changed_rows.clear()
+        self._heights = [0] * self.message_model.rowCount()
+        self._layout()
+        
+    def _on_scroll(self, value):
+        scrollbar = self.verticalScrollBar()
+        self.stick_to_bottom = value >= scrollbar.maximum()
+        if value == scrollbar.minimum() and scrollbar.maximum() > 0 and self._anchor_from_bottom is None:
+            self.top_reached.emit()
+        elif value == scrollbar.maximum() and value > 0:
+            self.bottom_reached.emit()
+        
+    def _on_range_changed(self, minimum, maximum):
+        if self._anchor_from_bottom is not None:
+            anchor = self._anchor_from_bottom
+            self._anchor_from_bottom = None
+            self.verticalScrollBar().setValue(maximum - anchor)
+        elif self.stick_to_bottom:
+            self.verticalScrollBar().setValue(maximum)
@@ -0,0 +1,158 @@
+import asyncio
+import time
+from PySide6.QtCore import QObject, QTimer, Signal
+from api.conversation import estimate_tokens, estimate_messages_tokens, make_async_summarizer
+from api.metrics import ResponseMetrics
+from api.profiling import SPANS
+from api.rag import insert_context
+from ui.stream_buffer import DeltaBuffer
+
+# Content is drained into the UI at most once per frame (~60 fps)
+DRAIN_INTERVAL_MS = 16
+
+# Streams one reply on the shared asyncio loop. Content doesn't cross threads one signal per
+# chunk: deltas go into a DeltaBuffer and the UI thread drains it, at most once per frame,
+# re-emitting message_received/thinking_received with the coalesced deltas. Errors and the end
+# of the stream drain first, so nothing arrives after them.
+class ChatWorker(QObject):
+    message_received = Signal(str)
+    thinking_received = Signal(str)
+    error_occurred = Signal(str)
+    response_started = Signal()
+    metrics_ready = Signal(object)
+    finished = Signal()
+    _data_ready = Signal()
+    _failed = Signal(str)
+    _done = Signal()
+    
+    def __init__(self, bridge, client, model, conversation, limiter=None, keep_alive=None, options=None,
+                 retriever=None, context_window=None):
+        super().__init__()
+        self.bridge = bridge
+        self.client = client
+        self.model = model
+        self.conversation = conversation
+        self.limiter = limiter
+        self.keep_alive = keep_alive
+        self.options = options
+        self.retriever = retriever
+        # Coroutine function: model -> tokens Ollama keeps for it (None when unknown)
+        self.context_window = context_window
+        self.metrics = ResponseMetrics(model)
+        self.stopped = False
+        self._task = None
+        
+        self.buffer = DeltaBuffer()
+        self._last_drain = 0
+        self._drain_timer = QTimer(self)
+        self._drain_timer.setSingleShot(True)
+        self._drain_timer.timeout.connect(self._drain)
+        self._data_ready.connect(self._schedule_drain)
+        self._failed.connect(self._on_failed)
+        self._done.connect(self._on_done)
+    
+    def start(self):
+        self.bridge.call_soon(self._start_task)
+    
+    def stop(self):
+        self.stopped = True
+        self.bridge.call_soon(self._cancel_task)
+    
+    def _start_task(self):
+        self._task = asyncio.ensure_future(self.run())
+        self._task.add_done_callback(lambda task: self._done.emit())
+    
+    def _cancel_task(self):
+        if self._task is not None:
+            self._task.cancel()
+    
+    async def run(self):
+        if self.limiter is None:
+            await self._stream()
+        else:
+            # Shared asyncio.Semaphore bounding how many generations hit Ollama at once
+            async with self.limiter:
+                await self._stream()
+    
+    async def _stream(self):
+        try:
+            loop = asyncio.get_running_loop()
+            window = await self.context_window(self.model) if self.context_window is not None else None
+            note = None
+            if self.retriever is not None:
+                query = next((m['content'] for m in reversed(self.conversation.messages) if m['role'] == 'user'), "")
+                try:
+                    note = await self.retriever.context_note(query)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    # Answer without the attachments rather than not at all
+                    self._failed.emit(f"Retrieval failed: {str(e)}")
+            # The excerpts take their share of the budget before the history is windowed
+            extra_tokens = estimate_tokens(note['content']) if note is not None else 0
+            await self._summarize(window, extra_tokens)
+            # Built off the UI thread so a long history never blocks it
+            messages = await loop.run_in_executor(None, self.conversation.build_messages, self.model,
+                                                  window, extra_tokens)
+            messages = insert_context(messages, note)
+            self.metrics.prompt_tokens_estimated = estimate_messages_tokens(messages)
+            self.response_started.emit()
+            async for content_type, content in self.client.chat_stream(self.model, messages, self.metrics,
+                                                                       self.keep_alive, self.options):
+                if content_type not in ('thinking', 'message'):
+                    continue
+                if self.buffer.put(content_type, content):
+                    self._data_ready.emit()
+                if self.buffer.full():
+                    await self.buffer.wait_for_space()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._failed.emit(str(e))
+        finally:
+            self.metrics_ready.emit(self.metrics)
+    
+    async def _summarize(self, window, extra_tokens):
+        # With the 'summarize' strategy, turns about to leave the window are folded into the
+        # summary first, through the same client (and limiter slot) as the reply
+        due = self.conversation.summary_due(self.model, window, extra_tokens)
+        if due is None:
+            return
+        previous, messages, upto = due
+        try:
+            summary = await make_async_summarizer(self.client, self.model, self.keep_alive)(previous, messages)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._failed.emit(f"Summarizing failed: {str(e)}")
+            return
+        if summary:
+            self.conversation.set_summary(summary, upto)
+
+    def _schedule_drain(self):
+        # The first delta goes straight through; after that, one drain per frame
+        wait = DRAIN_INTERVAL_MS - (time.perf_counter() - self._last_drain) * 1000
+        if wait <= 0:
+            self._drain()
+        elif not self._drain_timer.isActive():
+            self._drain_timer.start(int(wait))
+    
+    def _drain(self):
+        self._drain_timer.stop()
+        self._last_drain = time.perf_counter()
+        # Covers the connected slots too: the signals are direct on the UI thread
+        started = SPANS.start()
+        for content_type, content in self.buffer.drain():
+            if content_type == 'thinking':
+                self.thinking_received.emit(content)
+            else:
+                self.message_received.emit(content)
+        SPANS.end('worker.dispatch', started)
+    
+    def _on_failed(self, error_msg):
+        self._drain()
+        self.error_occurred.emit(error_msg)
+    
+    def _on_done(self):
+        self._drain()
+        self.finished.emit()
@@ -0,0 +1,323 @@
+import asyncio
+import os
+import time
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame, QPushButton,
+                             QLineEdit, QListWidget, QListWidgetItem, QSpinBox, QTextEdit, QScrollArea)
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtGui import QFont, QColor, QTextCursor, QTextCharFormat
+from api.conversation import ConversationManager
+from ui.chat_widgets import FRAME_INTERVAL_MS
+from ui.chat_worker import ChatWorker
+from ui.theme import TERMINAL_STYLESHEET
+from api.metrics import eval_rate
+
+def default_concurrency():
+    # Each pane streams a different model, so every stream needs its own loaded model;
+    # OLLAMA_NUM_PARALLEL only adds slots within one model.
+    try:
+        return max(1, int(os.environ.get("OLLAMA_MAX_LOADED_MODELS", "3")))
+    except ValueError:
+        return 3
+
+# A slot in each semaphore in turn: the compare window's own cap first, so a run queued
+# behind it doesn't sit on slots of the app-wide parallel-chats limit meanwhile
+class StackedLimiter:
+    def __init__(self, *limiters):
+        self.limiters = limiters
+
+    async def __aenter__(self):
+        acquired = []
+        try:
+            for limiter in self.limiters:
+                await limiter.acquire()
+                acquired.append(limiter)
+        except BaseException:
+            for limiter in reversed(acquired):
+                limiter.release()
+            raise
+
+    async def __aexit__(self, *exc_info):
+        for limiter in reversed(self.limiters):
+            limiter.release()
+
+class ComparePane(QFrame):
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self.model = model
+        self._pending = []
+        self.reset_stats()
+
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(FRAME_INTERVAL_MS)
+        self._flush_timer.timeout.connect(self.flush)
+
+        self.setup_ui()
+
+    def reset_stats(self):
+        self.started_at = None
+        # The worker's ResponseMetrics: the stream counts tokens there as they arrive, while
+        # this pane only sees them a drained batch per frame
+        self.metrics = None
+        self.server_metrics = {}
+
+    def setup_ui(self):
+        self.setMinimumWidth(320)
+        self.setStyleSheet("""
+            ComparePane {
+                border: 1px solid #00aa00;
+            }
+        """)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(8, 8, 8, 8)
+        layout.setSpacing(4)
+
+        title_label = QLabel(f"[{self.model}]")
+        title_label.setFont(QFont("Courier New", 11, QFont.Weight.Bold))
+
+        self.stats_label = QLabel("QUEUED")
+        self.stats_label.setFont(QFont("Courier New", 9))
+        self.stats_label.setStyleSheet("color: #ffff00;")
+
+        self.output = QTextEdit()
+        self.output.setReadOnly(True)
+        self.output.setFont(QFont("Courier New", 11))
+        self.output.setStyleSheet("""
+            QTextEdit {
+                background: #001a00;
+                border: 1px solid #006600;
+                color: #00cc00;
+                padding: 6px;
+            }
+        """)
+
+        self.message_format = QTextCharFormat()
+        self.message_format.setForeground(QColor("#00cc00"))
+        self.thinking_format = QTextCharFormat()
+        self.thinking_format.setForeground(QColor("#00aaaa"))
+
+        layout.addWidget(title_label)
+        layout.addWidget(self.stats_label)
+        layout.addWidget(self.output)
+
+    def on_started(self):
+        self.started_at = time.perf_counter()
+        self.stats_label.setText("WAITING FOR FIRST TOKEN...")
+
+    def on_thinking(self, text):
+        self._append('thinking', text)
+
+    def on_message(self, text):
+        self._append('message', text)
+
+    def on_metrics(self, metrics):
+        self.server_metrics = dict(metrics.server)
+        self.stats_label.setText(self.stats_text())
+        
+    def on_error(self, error_msg):
+        self.flush()
+        self.stats_label.setText(f"ERROR: {error_msg}")
+
+    def on_finished(self, stopped=False):
+        self.flush()
+        if stopped:
+            self.stats_label.setText(self.stats_text() + " | STOPPED")
+
+    def _append(self, kind, text):
+        if self._pending and self._pending[-1][0] == kind:
+            self._pending[-1][1].append(text)
+        else:
+            self._pending.append((kind, [text]))
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def flush(self):
+        self._flush_timer.stop()
+        if not self._pending:
+            return
+        cursor = QTextCursor(self.output.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        for kind, parts in self._pending:
+            text_format = self.thinking_format if kind == 'thinking' else self.message_format
+            cursor.insertText("".join(parts), text_format)
+        self._pending = []
+
+        scrollbar = self.output.verticalScrollBar()
+        scrollbar.setValue(scrollbar.maximum())
+        self.stats_label.setText(self.stats_text())
+
+    def stats_text(self):
+        metrics = self.metrics
+        if self.started_at is None or metrics is None or metrics.first_token is None:
+            return "NO OUTPUT"
+        ttft_ms = (metrics.first_token - (metrics.request_sent or self.started_at)) * 1000
+        # Prefer Ollama's own eval timings once the final chunk arrives; until then
+        # one NDJSON chunk per token is a close enough estimate
+        rate = eval_rate(self.server_metrics)
+        tokens = self.server_metrics.get('eval_count', metrics.chunk_count)
+        if rate is None:
+            elapsed = metrics.last_token - metrics.first_token
+            rate = (metrics.chunk_count - 1) / elapsed if elapsed > 0 else 0.0
+        return f"TTFT {ttft_ms:.0f} ms | {rate:.1f} tok/s | {tokens} tok"
+
+class CompareWindow(QWidget):
+    def __init__(self, bridge, client, models, selected_model=None, idle_jobs=None, context_window=None,
+                 limiter=None, parent=None):
+        super().__init__(parent)
+        self.bridge = bridge
+        self.client = client
+        self.idle_jobs = idle_jobs
+        self.context_window = context_window
+        # The main window's limit on generations in flight; PARALLEL only narrows it
+        self.limiter = limiter
+        self.workers = []
+        self.panes = []
+        self.setup_ui(models, selected_model)
+
+    def setup_ui(self, models, selected_model):
+        self.setWindowTitle("JGxAAI v1.337 - COMPARE")
+        self.resize(1200, 700)
+        self.setStyleSheet(TERMINAL_STYLESHEET + """
+            CompareWindow {
+                background: #000000;
+            }
+            QListWidget, QSpinBox {
+                background: #001100;
+                border: 1px solid #00ff00;
+                color: #00ff00;
+            }
+        """)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(5, 5, 5, 5)
+        layout.setSpacing(5)
+
+        controls_layout = QHBoxLayout()
+
+        self.model_list = QListWidget()
+        self.model_list.setFont(QFont("Courier New", 10))
+        self.model_list.setFixedSize(240, 110)
+        self.set_models(models, selected_model)
+
+        self.prompt_input = QLineEdit()
+        self.prompt_input.setPlaceholderText("> PROMPT FOR ALL SELECTED MODELS...")
+        self.prompt_input.setFont(QFont("Courier New", 12))
+        self.prompt_input.setMinimumHeight(35)
+        self.prompt_input.returnPressed.connect(self.run)
+
+        concurrency_label = QLabel("PARALLEL:")
+        concurrency_label.setFont(QFont("Courier New", 10, QFont.Weight.Bold))
+
+        self.concurrency_spin = QSpinBox()
+        self.concurrency_spin.setRange(1, 16)
+        self.concurrency_spin.setValue(default_concurrency())
+        self.concurrency_spin.setFont(QFont("Courier New", 10))
+        self.concurrency_spin.setToolTip(
+            "Streams allowed at once. Keep at or below OLLAMA_MAX_LOADED_MODELS,\n"
+            "otherwise Ollama swaps models in and out between requests.")
+
+        self.run_button = QPushButton("[RUN]")
+        self.run_button.setFont(QFont("Courier New", 10, QFont.Weight.Bold))
+        self.run_button.setMinimumSize(70, 35)
+        self.run_button.clicked.connect(self.run)
+
+        self.stop_button = QPushButton("[STOP]")
+        self.stop_button.setFont(QFont("Courier New", 10, QFont.Weight.Bold))
+        self.stop_button.setMinimumSize(70, 35)
+        self.stop_button.setEnabled(False)
+        self.stop_button.clicked.connect(self.stop)
+
+        controls_layout.addWidget(self.model_list)
+        controls_layout.addWidget(self.prompt_input, 1)
+        controls_layout.addWidget(concurrency_label)
+        controls_layout.addWidget(self.concurrency_spin)
+        controls_layout.addWidget(self.run_button)
+        controls_layout.addWidget(self.stop_button)
+        layout.addLayout(controls_layout)
+
+        self.panes_widget = QWidget()
+        self.panes_widget.setObjectName("comparePanes")
+        self.panes_widget.setStyleSheet("#comparePanes { background: #000000; }")
+        self.panes_layout = QHBoxLayout(self.panes_widget)
+        self.panes_layout.setContentsMargins(0, 0, 0, 0)
+        self.panes_layout.setSpacing(5)
+
+        scroll_area = QScrollArea()
+        scroll_area.setWidgetResizable(True)
+        scroll_area.setWidget(self.panes_widget)
+        scroll_area.setStyleSheet("QScrollArea { background: #000000; border: none; }")
+        layout.addWidget(scroll_area, 1)
+
+    def set_models(self, models, selected_model=None):
+        # Models still listed keep their tick when the window is opened again
+        checked = set(self.selected_models()) or {selected_model}
+        self.model_list.clear()
+        for model in models:
+            item = QListWidgetItem(model)
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Checked if model in checked else Qt.CheckState.Unchecked)
+            self.model_list.addItem(item)
+
+    def selected_models(self):
+        models = []
+        for i in range(self.model_list.count()):
+            item = self.model_list.item(i)
+            if item.checkState() == Qt.CheckState.Checked:
+                models.append(item.text())
+        return models
+
+    def run(self):
+        prompt = self.prompt_input.text().strip()
+        models = self.selected_models()
+        if not prompt or not models or self.workers:
+            return
+
+        for pane in self.panes:
+            pane.setParent(None)
+        self.panes = []
+
+        limiter = asyncio.Semaphore(self.concurrency_spin.value())
+        if self.limiter is not None:
+            limiter = StackedLimiter(limiter, self.limiter)
+        for model in models:
+            pane = ComparePane(model)
+            self.panes_layout.addWidget(pane)
+            self.panes.append(pane)
+
+            conversation = ConversationManager()
+            conversation.add_message("user", prompt)
+
+            worker = ChatWorker(self.bridge, self.client, model, conversation, limiter,
+                                context_window=self.context_window)
+            pane.metrics = worker.metrics
+            worker.response_started.connect(pane.on_started)
+            worker.thinking_received.connect(pane.on_thinking)
+            worker.message_received.connect(pane.on_message)
+            worker.error_occurred.connect(pane.on_error)
+            worker.metrics_ready.connect(pane.on_metrics)
+            worker.finished.connect(lambda w=worker, p=pane: self._on_worker_finished(w, p))
+            self.workers.append(worker)
+
+        self.run_button.setEnabled(False)
+        self.stop_button.setEnabled(True)
+        for worker in self.workers:
+            if self.idle_jobs is not None:
+                self.idle_jobs.track(worker)
+            worker.start()
+
+    def stop(self):
+        for worker in self.workers:
+            worker.stop()
+
+    def _on_worker_finished(self, worker, pane):
+        pane.on_finished(worker.stopped)
+        if worker in self.workers:
+            self.workers.remove(worker)
+        if not self.workers:
+            self.run_button.setEnabled(True)
+            self.stop_button.setEnabled(False)
+
+    def closeEvent(self, event):
+        self.stop()
+        super().closeEvent(event)
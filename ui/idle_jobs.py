@@ -0,0 +1,256 @@
+import asyncio
+import time
+from PySide6.QtCore import QObject, QTimer, Signal
+from api.conversation import summary_request
+
+JOB_TITLE = 'title'
+JOB_SUMMARY = 'summary'
+
+DEFAULT_IDLE_SECONDS = 10
+SUMMARY_MIN_NEW_MESSAGES = 6
+SUMMARY_BATCH_CHARS = 12000
+TITLE_INPUT_CHARS = 2000
+TITLE_CHARS = 60
+
+TITLE_PROMPT = (
+    "Write a title of at most six words for the conversation below. "
+    "Reply with the title only, without quotes."
+)
+
+def clean_title(text):
+    lines = [line.strip() for line in text.strip().splitlines() if line.strip()]
+    title = lines[0] if lines else ""
+    if title.lower().startswith("title:"):
+        title = title[len("title:"):]
+    return title.strip('"\'*#` ')[:TITLE_CHARS]
+
+def title_request(messages):
+    transcript = "\n\n".join(f"{m['role'].upper()}: {m['content'][:TITLE_INPUT_CHARS]}" for m in messages)
+    return [
+        {"role": "system", "content": TITLE_PROMPT},
+        {"role": "user", "content": transcript}
+    ]
+
+def summary_batch(messages, max_chars=SUMMARY_BATCH_CHARS):
+    # The leading messages that fit in one summarization request (always at least one, cut)
+    batch = []
+    used = 0
+    for message in messages:
+        content = message['content'][:max_chars]
+        if batch and used + len(content) > max_chars:
+            break
+        batch.append({"role": message['role'], "content": content})
+        used += len(content)
+    return batch
+
+# Titles and running summaries for saved conversations, generated only while nothing in the
+# foreground talks to Ollama. Jobs start once no ChatWorker has run and the user hasn't typed
+# for idle_seconds, and only on the model get_model() returns (the selected one, while it is
+# hot), so they never trigger a model load or swap. hold() (every foreground worker goes
+# through track()) cancels a running job before the worker's own request is sent; closing
+# the stream is what makes Ollama stop generating, so the user's request isn't queued behind
+# it. Summaries advance one batch per job and every batch is stored, so a preempted job only
+# redoes that batch and covered messages are never summarized again. All store access
+# happens on the UI thread; the asyncio side only sees plain messages.
+class IdleJobQueue(QObject):
+    title_ready = Signal(str, str)
+    summary_ready = Signal(str, str)
+    _job_done = Signal(object, object)
+    _job_failed = Signal(object, str)
+    _job_cancelled = Signal(object)
+
+    def __init__(self, bridge, get_client, store, get_model, keep_alive=None,
+                 idle_seconds=DEFAULT_IDLE_SECONDS, parent=None):
+        super().__init__(parent)
+        self.bridge = bridge
+        self.get_client = get_client
+        self.store = store
+        self.get_model = get_model
+        self.keep_alive = keep_alive
+        self.idle_seconds = idle_seconds
+        self.jobs = []
+        self.foreground = 0
+        self.last_activity = time.monotonic()
+        self.stopped = False
+        self.completed = 0
+        self.preempted = 0
+        self.failed = 0
+        self._running = None
+        self._future = None
+        # conversation_id -> (summary, summarized_upto) written since the store was last read
+        self._summaries = {}
+
+        self._job_done.connect(self._on_job_done)
+        self._job_failed.connect(self._on_job_failed)
+        self._job_cancelled.connect(self._on_job_cancelled)
+
+        self._idle_timer = QTimer(self)
+        self._idle_timer.setSingleShot(True)
+        self._idle_timer.timeout.connect(self._run_next)
+
+    def enqueue(self, kind, conversation_id, front=False):
+        job = (kind, conversation_id)
+        if job in self.jobs or job == self._running:
+            return
+        if front:
+            self.jobs.insert(0, job)
+        elif kind == JOB_TITLE:
+            # Titles are one short call and the sidebar shows them; they go before summaries
+            index = next((i for i, (k, _) in enumerate(self.jobs) if k != JOB_TITLE), len(self.jobs))
+            self.jobs.insert(index, job)
+        else:
+            self.jobs.append(job)
+        self._schedule()
+
+    def enqueue_conversation(self, conversation_id):
+        # Whether there is anything to do is decided when the job runs
+        self.enqueue(JOB_TITLE, conversation_id)
+        self.enqueue(JOB_SUMMARY, conversation_id)
+
+    def enqueue_pending(self):
+        for row in self.store.background_candidates(SUMMARY_MIN_NEW_MESSAGES):
+            if not row['titled']:
+                self.enqueue(JOB_TITLE, row['id'])
+            if row['messages'] - row['summarized_upto'] >= SUMMARY_MIN_NEW_MESSAGES:
+                self.enqueue(JOB_SUMMARY, row['id'])
+
+    def busy(self):
+        return self._running is not None
+
+    def track(self, worker):
+        # Call before worker.start(), so a running job is cancelled before the worker's request
+        self.hold()
+        worker.finished.connect(self.release)
+
+    def hold(self):
+        self.foreground += 1
+        self.last_activity = time.monotonic()
+        self._idle_timer.stop()
+        if self._future is not None:
+            self._future.cancel()
+
+    def release(self):
+        self.foreground = max(0, self.foreground - 1)
+        self.last_activity = time.monotonic()
+        self._schedule()
+
+    def note_activity(self):
+        # Keystrokes push the next job back; a running one is left alone until the send
+        self.last_activity = time.monotonic()
+        if self._idle_timer.isActive():
+            self._schedule()
+
+    def stop(self):
+        self.stopped = True
+        self._idle_timer.stop()
+        if self._future is not None:
+            self._future.cancel()
+
+    def _schedule(self, delay=None):
+        if self.stopped or self.foreground or self._running is not None or not self.jobs:
+            return
+        if delay is None:
+            delay = self.idle_seconds - (time.monotonic() - self.last_activity)
+        self._idle_timer.start(int(max(0, delay) * 1000))
+
+    def _run_next(self):
+        if self.stopped or self.foreground or self._running is not None:
+            return
+        model = self.get_model()
+        if not model:
+            # Nothing hot to run on; look again later rather than loading a model
+            self._schedule(self.idle_seconds)
+            return
+        while self.jobs:
+            job = self.jobs.pop(0)
+            coro = self._prepare(job, model)
+            if coro is not None:
+                self._running = job
+                self._future = self.bridge.submit(coro)
+                # Also covers a job cancelled before its coroutine got to run
+                self._future.add_done_callback(lambda future, job=job: self._on_future_done(job, future))
+                return
+
+    def _prepare(self, job, model):
+        kind, conversation_id = job
+        conversation = self.store.get_conversation(conversation_id)
+        if conversation is None:
+            return None
+        if kind == JOB_TITLE:
+            if conversation['titled']:
+                return None
+            history = self.store.load_page_after(conversation_id, -1, limit=2)
+            if len(history) < 2:
+                return None
+            messages = title_request(history)
+            return self._generate(job, model, messages, None)
+
+        summary, upto = conversation['summary'], conversation['summarized_upto']
+        if self._summaries.get(conversation_id, (None, -1))[1] > upto:
+            summary, upto = self._summaries[conversation_id]
+        pending = [{"role": role, "content": content}
+                   for role, content in self.store.load_history(conversation_id, upto)]
+        if len(pending) < SUMMARY_MIN_NEW_MESSAGES:
+            return None
+        batch = summary_batch(pending)
+        messages = summary_request(summary, batch)
+        return self._generate(job, model, messages, (upto + len(batch), len(pending) - len(batch)))
+
+    async def _generate(self, job, model, messages, progress):
+        content = []
+        try:
+            async for content_type, text in self.get_client().chat_stream(model, messages, None,
+                                                                          self.keep_alive):
+                if content_type == 'message':
+                    content.append(text)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._job_failed.emit(job, str(e))
+            return
+        self._job_done.emit(job, ("".join(content).strip(), progress))
+
+    def _on_future_done(self, job, future):
+        # Runs on whichever thread finished the future; the signal gets it to the UI thread
+        if future.cancelled():
+            self._job_cancelled.emit(job)
+
+    def _on_job_done(self, job, result):
+        self._finish_job(job)
+        text, progress = result
+        kind, conversation_id = job
+        if not text:
+            self.failed += 1
+        elif kind == JOB_TITLE:
+            title = clean_title(text)
+            if title:
+                self.store.set_title(conversation_id, title, generated=True)
+                self.title_ready.emit(conversation_id, title)
+        else:
+            upto, remaining = progress
+            self.store.set_summary(conversation_id, text, upto)
+            self._summaries[conversation_id] = (text, upto)
+            self.summary_ready.emit(conversation_id, text)
+            if remaining >= SUMMARY_MIN_NEW_MESSAGES:
+                self.enqueue(JOB_SUMMARY, conversation_id, front=True)
+        self.completed += 1
+        self._schedule(0)
+
+    def _on_job_failed(self, job, error_msg):
+        # Dropped, not retried: it comes back with the conversation's next reply or restart
+        self._finish_job(job)
+        self.failed += 1
+        self._schedule(self.idle_seconds)
+
+    def _on_job_cancelled(self, job):
+        self._finish_job(job)
+        self.preempted += 1
+        if not self.stopped:
+            self.jobs.insert(0, job)
+        self._schedule()
+
+    def _finish_job(self, job):
+        # A result can still arrive for a job whose cancellation was already counted
+        if job == self._running:
+            self._running = None
+            self._future = None
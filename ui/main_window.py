@@ -1,41 +1,118 @@
+import asyncio
+import threading
 from PySide6.QtWidgets import (QMainWindow, QVBoxLayout, QHBoxLayout, 
                              QWidget, QComboBox, QLineEdit, 
-                             QPushButton, QLabel, QFrame)
-from PySide6.QtCore import Qt, QThread, Signal
-from PySide6.QtGui import QFont, QIcon
-from api.ollama_client import OllamaClient
-from ui.chat_widgets import ChatArea, ThinkingSection
+                             QPushButton, QLabel, QFrame, QFileDialog, QMenu, QTabWidget)
+from PySide6.QtCore import Qt, Signal, QTimer
+from PySide6.QtGui import QFont, QIcon, QKeySequence, QShortcut
+from api.conversation import context_window, OLLAMA_DEFAULT_CONTEXT
+from api.metrics import write_jsonl, write_prometheus
+from ui.async_bridge import AsyncBridge
+from ui.chat_tab import ChatTab
+from ui.chat_worker import ChatWorker
+from ui.model_warmer import (ModelWarmer, STATE_LOADING, STATE_HOT, DEFAULT_KEEP_ALIVE,
+                             DEFAULT_PING_SECONDS, DEFAULT_IDLE_MINUTES, POLICY_KEEP)
+from ui.theme import TERMINAL_STYLESHEET
+from ui.session_sidebar import SessionSidebar
+from ui.idle_jobs import IdleJobQueue, DEFAULT_IDLE_SECONDS
+from storage.conversation_store import ConversationStore
+from storage.settings import Settings
 
-class ChatWorker(QThread):
-    message_received = Signal(str)
-    thinking_received = Signal(str)
-    error_occurred = Signal(str)
-    response_started = Signal()
-    
-    def __init__(self, client, model, message):
-        super().__init__()
-        self.client = client
-        self.model = model
-        self.message = message
-    
-    def run(self):
-        try:
-            self.response_started.emit()
-            for content_type, content in self.client.chat_stream(self.model, self.message):
-                if content_type == 'thinking':
-                    self.thinking_received.emit(content)
-                elif content_type == 'message':
-                    self.message_received.emit(content)
-        except Exception as e:
-            self.error_occurred.emit(str(e))
+DEFAULT_BASE_URL = "http://localhost:11434"
+# Replies streaming at once across all tabs; the rest wait their turn
+DEFAULT_PARALLEL_CHATS = 2
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    models_loaded = Signal(list)
+    models_failed = Signal(str)
+    attachment_progress = Signal(object, str, int, int)
+    attachment_ready = Signal(object, object, object, int)
+    attachment_failed = Signal(object, str, str, int)
+    attachments_refreshed = Signal(object)
+    archive_progress = Signal(str, int)
+    archive_done = Signal(str, object)
+    archive_failed = Signal(str, str)
+    store_failed = Signal(str)
+    
+    def __init__(self, base_url=DEFAULT_BASE_URL):
         super().__init__()
-        self.ollama_client = OllamaClient()
-        self.conversation_history = []
+        self.base_url = base_url
+        # aiohttp takes longer to import than the whole window takes to build, so the
+        # client is created on first use (normally by model discovery, off the UI thread)
+        self.async_client = None
+        self._client_lock = threading.Lock()
+        self.bridge = AsyncBridge()
+        self.settings = Settings()
+        self.compare_window = None
+        # Write errors happen on the store's writer thread; the signal brings them to the UI
+        self.store = ConversationStore(on_error=self.store_failed.emit)
+        # Every tab's ChatWorker runs as a task on the one asyncio loop; this bounds how many
+        # of them talk to Ollama at a time
+        self.limiter = asyncio.Semaphore(max(1, int(self.settings.get('parallel_chats', DEFAULT_PARALLEL_CHATS))))
+        # Tabs closed mid-reply or mid-indexing, kept until that finishes
+        self.closing_tabs = []
+        # model -> context window from /api/show; only touched on the asyncio thread
+        self.context_windows = {}
+        self.archiving = False
+        self.archive_stop = threading.Event()
+        self.archive_future = None
+        self.perf_overlay = None
+        self.warmer = ModelWarmer(
+            self.bridge, self.get_client,
+            keep_alive=self.settings.get('keep_alive', DEFAULT_KEEP_ALIVE),
+            ping_seconds=self.settings.get('warmup_ping_seconds', DEFAULT_PING_SECONDS),
+            idle_minutes=self.settings.get('warmup_idle_minutes', DEFAULT_IDLE_MINUTES),
+            policy=self.settings.get('warmup_policy', POLICY_KEEP), parent=self)
+        self.idle_jobs = IdleJobQueue(
+            self.bridge, self.get_client, self.store, self._idle_model, keep_alive=self.warmer.keep_alive,
+            idle_seconds=self.settings.get('background_idle_seconds', DEFAULT_IDLE_SECONDS), parent=self)
+        self.idle_jobs.title_ready.connect(lambda cid, title: self.sidebar.update_conversation(cid, title=title))
+        self.idle_jobs.summary_ready.connect(
+            lambda cid, summary: self.sidebar.update_conversation(cid, summary=summary))
         self.init_ui()
-        self.load_models()
+        self.new_tab()
+        self.models_loaded.connect(self.on_models_loaded)
+        self.models_failed.connect(self.on_models_failed)
+        self.attachment_progress.connect(self.on_attachment_progress)
+        self.attachment_ready.connect(self.on_attachment_ready)
+        self.attachment_failed.connect(self.on_attachment_failed)
+        self.attachments_refreshed.connect(self.on_attachments_refreshed)
+        self.archive_progress.connect(self.on_archive_progress)
+        self.archive_done.connect(self.on_archive_done)
+        self.archive_failed.connect(self.on_archive_failed)
+        self.store_failed.connect(self.on_store_failed)
+        self.model_combo.currentTextChanged.connect(self._on_model_selected)
+        self.warmer.state_changed.connect(self._on_model_state)
+        # Last known list first, so the combo is usable before Ollama answers
+        self.set_models(self.settings.get('models', []))
+        self.load_sessions()
+        if self.settings.get('background_jobs', True):
+            self.idle_jobs.enqueue_pending()
+        if self.settings.get('perf_overlay', False):
+            self.toggle_perf_overlay()
+        # Discovery waits until the first frame is up; it imports aiohttp on the asyncio thread
+        QTimer.singleShot(0, self.load_models)
+    
+    def get_client(self):
+        with self._client_lock:
+            if self.async_client is None:
+                from api.endpoints import parse_endpoints
+                urls = parse_endpoints(self.base_url)
+                if len(urls) > 1:
+                    from api.endpoints import EndpointPool
+                    from api.multi_client import AsyncMultiOllamaClient
+                    client = AsyncMultiOllamaClient(EndpointPool(urls))
+                else:
+                    from api.async_client import AsyncOllamaClient
+                    client = AsyncOllamaClient(self.base_url)
+                if self.settings.get('response_cache'):
+                    from api.cached_client import AsyncCachedOllamaClient, REPLAY_INSTANT
+                    from storage.response_cache import ResponseCache
+                    cache = ResponseCache(max_bytes=int(self.settings.get('response_cache_mb', 64)) << 20)
+                    client = AsyncCachedOllamaClient(client, cache,
+                                                     self.settings.get('response_cache_replay', REPLAY_INSTANT))
+                self.async_client = client
+            return self.async_client
     
     def init_ui(self):
         self.setWindowTitle("JGxAAI v1.337")
@@ -63,6 +140,36 @@ class MainWindow(QMainWindow):
         self.new_chat_button.clicked.connect(self.new_chat)
         self.new_chat_button.setFont(QFont("Courier New", 10, QFont.Weight.Bold))
         
+        self.compare_button = QPushButton("[COMPARE]")
+        self.compare_button.clicked.connect(self.open_compare)
+        self.compare_button.setFont(QFont("Courier New", 10, QFont.Weight.Bold))
+        
+        self.metrics_button = QPushButton("[METRICS]")
+        self.metrics_button.clicked.connect(self.export_metrics)
+        self.metrics_button.setToolTip("Export per-response timings as JSONL or Prometheus text")
+        self.metrics_button.setFont(QFont("Courier New", 10, QFont.Weight.Bold))
+        
+        self.attach_button = QPushButton("[ATTACH]")
+        self.attach_button.setToolTip("Attach files or a folder; relevant excerpts are sent along with each question")
+        self.attach_button.setFont(QFont("Courier New", 10, QFont.Weight.Bold))
+        attach_menu = QMenu(self.attach_button)
+        attach_menu.addAction("[FOLDER]", self.attach_folder)
+        attach_menu.addAction("[FILES]", self.attach_files)
+        attach_menu.addAction("[DETACH ALL]", self.detach_all)
+        self.attach_button.setMenu(attach_menu)
+        
+        self.archive_button = QPushButton("[ARCHIVE]")
+        self.archive_button.setToolTip("Export conversations with reasoning and metrics to JSONL or Markdown, or import them")
+        self.archive_button.setFont(QFont("Courier New", 10, QFont.Weight.Bold))
+        archive_menu = QMenu(self.archive_button)
+        archive_menu.addAction("[EXPORT CHAT]", self.export_chat)
+        archive_menu.addAction("[EXPORT ALL]", self.export_all)
+        archive_menu.addAction("[IMPORT]", self.import_chats)
+        self.archive_button.setMenu(archive_menu)
+        
+        self.attach_status = QLabel("")
+        self.attach_status.setFont(QFont("Courier New", 9, QFont.Weight.Bold))
+        
         model_label = QLabel("MODEL:")
         model_font = QFont("Courier New", 10, QFont.Weight.Bold)
         model_label.setFont(model_font)
@@ -71,17 +178,44 @@ class MainWindow(QMainWindow):
         self.model_combo.setMinimumWidth(180)
         self.model_combo.setFont(QFont("Courier New", 10))
         
+        self.model_status = QLabel("[COLD]")
+        self.model_status.setFont(QFont("Courier New", 9, QFont.Weight.Bold))
+        self.model_status.setMinimumWidth(80)
+        
         header_layout.addWidget(title_label)
         header_layout.addStretch()
         header_layout.addWidget(self.new_chat_button)
+        header_layout.addWidget(self.compare_button)
+        header_layout.addWidget(self.metrics_button)
+        header_layout.addWidget(self.archive_button)
+        header_layout.addWidget(self.attach_button)
+        header_layout.addWidget(self.attach_status)
         header_layout.addSpacing(10)
         header_layout.addWidget(model_label)
         header_layout.addWidget(self.model_combo)
+        header_layout.addWidget(self.model_status)
         
         layout.addWidget(header_frame)
         
-        self.chat_area = ChatArea()
-        layout.addWidget(self.chat_area)
+        body_layout = QHBoxLayout()
+        body_layout.setSpacing(5)
+        
+        self.sidebar = SessionSidebar()
+        self.sidebar.conversation_selected.connect(self.open_conversation)
+        self.sidebar.search_requested.connect(self.search_history)
+        self.sidebar.result_selected.connect(self.jump_to_message)
+        
+        self.tabs = QTabWidget()
+        self.tabs.setTabsClosable(True)
+        self.tabs.setMovable(True)
+        self.tabs.setDocumentMode(True)
+        self.tabs.tabBar().setFont(QFont("Courier New", 9, QFont.Weight.Bold))
+        self.tabs.tabCloseRequested.connect(self.close_tab)
+        self.tabs.currentChanged.connect(self._on_tab_changed)
+        
+        body_layout.addWidget(self.sidebar)
+        body_layout.addWidget(self.tabs)
+        layout.addLayout(body_layout)
         
         input_frame = QFrame()
         input_frame.setFixedHeight(60)
@@ -91,6 +225,9 @@ class MainWindow(QMainWindow):
         self.message_input = QLineEdit()
         self.message_input.setPlaceholderText("> ENTER COMMAND...")
         self.message_input.returnPressed.connect(self.send_message)
+        # Typing is the cue to get the model loaded before the message is sent
+        self.message_input.textEdited.connect(self.warmer.note_activity)
+        self.message_input.textEdited.connect(self.idle_jobs.note_activity)
         self.message_input.setFont(QFont("Courier New", 12))
         self.message_input.setMinimumHeight(35)
         
@@ -99,156 +236,498 @@ class MainWindow(QMainWindow):
         self.send_button.setFont(QFont("Courier New", 10, QFont.Weight.Bold))
         self.send_button.setMinimumSize(70, 35)
         
+        self.stop_button = QPushButton("[STOP]")
+        self.stop_button.clicked.connect(self.stop_generation)
+        self.stop_button.setFont(QFont("Courier New", 10, QFont.Weight.Bold))
+        self.stop_button.setMinimumSize(70, 35)
+        self.stop_button.setEnabled(False)
+        
         input_layout.addWidget(self.message_input)
         input_layout.addSpacing(10)
         input_layout.addWidget(self.send_button)
+        input_layout.addWidget(self.stop_button)
         
         layout.addWidget(input_frame)
         
-        self.setStyleSheet("""
-            QMainWindow {
-                background: #000000;
-                color: #00ff00;
-            }
-            QFrame {
-                background: #000000;
-                border: none;
-                color: #00ff00;
-            }
-            QLabel {
-                color: #00ff00;
-                font-weight: bold;
-            }
-            QLineEdit {
-                background: #001100;
-                border: 1px solid #00ff00;
-                border-radius: 0px;
-                padding: 8px;
-                color: #00ff00;
-                font-size: 12px;
-                selection-background-color: #003300;
-            }
-            QLineEdit:focus {
-                border: 2px solid #00ff00;
-                background: #002200;
-            }
-            QPushButton {
-                background: #003300;
-                color: #00ff00;
-                border: 1px solid #00ff00;
-                border-radius: 0px;
-                font-weight: bold;
-                padding: 8px;
-            }
-            QPushButton:hover {
-                background: #004400;
-                color: #ffffff;
-                border: 1px solid #ffffff;
-            }
-            QPushButton:pressed {
-                background: #002200;
-                color: #00aa00;
-            }
-            QPushButton:disabled {
-                background: #001100;
-                color: #006600;
-                border: 1px solid #006600;
-            }
-            QComboBox {
-                background: #001100;
-                border: 1px solid #00ff00;
-                border-radius: 0px;
-                padding: 5px 8px;
-                color: #00ff00;
-            }
-            QComboBox:hover {
-                background: #002200;
-            }
-            QComboBox::drop-down {
-                border: none;
-                width: 20px;
-            }
-            QComboBox::down-arrow {
-                image: none;
-                border-left: 4px solid transparent;
-                border-right: 4px solid transparent;
-                border-top: 4px solid #00ff00;
-                margin-right: 5px;
-            }
-            QComboBox QAbstractItemView {
-                background: #001100;
-                border: 1px solid #00ff00;
-                selection-background-color: #003300;
-                color: #00ff00;
-            }
-        """)
+        QShortcut(QKeySequence("Ctrl+T"), self, self.new_tab)
+        QShortcut(QKeySequence("Ctrl+W"), self, lambda: self.close_tab(self.tabs.currentIndex()))
+        # Debug overlay: FPS, event-loop lag, widgets, RSS, hot-path spans and profiling
+        QShortcut(QKeySequence("F12"), self, self.toggle_perf_overlay)
+        
+        self.setStyleSheet(TERMINAL_STYLESHEET)
     
     def load_models(self):
+        self.bridge.submit(self._discover_models())
+    
+    async def _discover_models(self):
+        # Runs on the asyncio thread; results come back through queued signals
         try:
-            models = self.ollama_client.get_models()
-            self.model_combo.clear()
-            for model in models:
-                self.model_combo.addItem(model['name'])
-            if models:
-                self.model_combo.setCurrentIndex(0)
+            models = await self.get_client().get_models()
         except Exception as e:
-            self.chat_area.add_message(f"Error loading models: {str(e)}", is_user=False)
+            self.models_failed.emit(str(e))
+            return
+        self.models_loaded.emit([model['name'] for model in models])
+    
+    async def _close_client(self):
+        if self.async_client is not None:
+            await self.async_client.close()
+    
+    def set_models(self, names):
+        current = self.model_combo.currentText() or self.settings.get('last_model')
+        self.model_combo.blockSignals(True)
+        self.model_combo.clear()
+        self.model_combo.addItems(names)
+        index = self.model_combo.findText(current) if current else -1
+        self.model_combo.setCurrentIndex(index if index >= 0 else 0)
+        self.model_combo.blockSignals(False)
+        # Track the model without loading it; opening the app shouldn't claim VRAM
+        self.warmer.set_model(self.model_combo.currentText(), warm=False)
+        self._show_model_state()
+    
+    def on_models_loaded(self, names):
+        self.set_models(names)
+        self.settings.set('models', names)
+        self.model_combo.setToolTip("")
+        self.warmer.refresh()
+    
+    def on_models_failed(self, error_msg):
+        if self.model_combo.count():
+            self.model_combo.setToolTip(f"Showing the last known models: {error_msg}")
+        else:
+            self.current_tab().chat_area.add_message(f"Error loading models: {error_msg}", is_user=False)
+    
+    def _on_model_selected(self, model):
+        if model:
+            self.settings.set('last_model', model)
+            self.current_tab().model = model
+        self.warmer.set_model(model)
+        self._show_model_state()
+    
+    def _on_model_state(self, model, state):
+        if model == self.model_combo.currentText():
+            self._show_model_state()
+    
+    def _show_model_state(self):
+        model = self.model_combo.currentText()
+        state = self.warmer.state(model)
+        if state == STATE_HOT:
+            self.model_status.setText("[HOT]")
+            self.model_status.setStyleSheet("color: #00ff00;")
+        elif state == STATE_LOADING:
+            self.model_status.setText("[LOADING]")
+            self.model_status.setStyleSheet("color: #ffff00;")
+        else:
+            self.model_status.setText("[COLD]")
+            self.model_status.setStyleSheet("color: #888800;")
+        load_ms = self.warmer.last_load_ms.get(model)
+        self.model_status.setToolTip(f"Last load took {load_ms / 1000:.1f}s" if load_ms else "")
+    
+    def _idle_model(self):
+        # Background jobs only run on the model that is already loaded for the user
+        model = self.model_combo.currentText()
+        return model if model and self.warmer.state(model) == STATE_HOT else None
+    
+    def load_sessions(self):
+        self.sidebar.set_conversations(self.store.list_conversations(), self.current_tab().conversation_id)
+    
+    def current_tab(self):
+        return self.tabs.currentWidget()
+    
+    def all_tabs(self):
+        return [self.tabs.widget(i) for i in range(self.tabs.count())]
+    
+    def new_tab(self):
+        tab = ChatTab(self.store, self.settings.get('context_budgets'),
+                      self.settings.get('context_strategy', 'truncate'))
+        tab.model = self.model_combo.currentText()
+        tab.state_changed.connect(self._on_tab_state)
+        tab.reply_finished.connect(self.on_reply_finished)
+        self.tabs.setCurrentIndex(self.tabs.addTab(tab, tab.display_title()))
+        self.message_input.setFocus()
+        return tab
+    
+    def close_tab(self, index):
+        tab = self.tabs.widget(index)
+        if tab is None:
+            return
+        if self.tabs.count() == 1:
+            # There is always one tab; closing the last one just empties it
+            self.new_chat()
+            return
+        self.tabs.removeTab(index)
+        tab.set_active(False)
+        tab.shutdown()
+        self.closing_tabs.append(tab)
+        self._release_closed_tabs()
+    
+    def _release_closed_tabs(self):
+        for tab in [t for t in self.closing_tabs if not t.attachments_busy() and t.indexing == 0]:
+            self.closing_tabs.remove(tab)
+            tab.deleteLater()
+    
+    def _on_tab_changed(self, index):
+        tab = self.tabs.widget(index)
+        for other in self.all_tabs():
+            if other is not tab and other.active:
+                other.set_active(False)
+        if tab is None:
+            return
+        tab.set_active(True)
+        if tab.model and tab.model != self.model_combo.currentText():
+            model_index = self.model_combo.findText(tab.model)
+            if model_index >= 0:
+                # Switching tabs shows the tab's model without loading it
+                self.model_combo.blockSignals(True)
+                self.model_combo.setCurrentIndex(model_index)
+                self.model_combo.blockSignals(False)
+                self.warmer.set_model(tab.model, warm=False)
+                self._show_model_state()
+        self.sidebar.select(tab.conversation_id)
+        self._show_attachments()
+    
+    def _on_tab_state(self, tab):
+        index = self.tabs.indexOf(tab)
+        if index < 0:
+            return
+        self.tabs.setTabText(index, tab.display_title())
+        self.tabs.setTabToolTip(index, tab.title)
+        if tab is self.current_tab():
+            generating = tab.worker is not None
+            self.message_input.setEnabled(not generating)
+            self.send_button.setEnabled(not generating)
+            self.stop_button.setEnabled(generating and not tab.worker.stopped)
+    
+    def _tab_for(self, conversation_id):
+        return next((tab for tab in self.all_tabs() if tab.conversation_id == conversation_id), None)
     
     def new_chat(self):
-        self.conversation_history = []
-        self.chat_area.clear_chat()
+        tab = self.current_tab()
+        if tab.worker is None:
+            tab.clear()
+        else:
+            # The reply keeps streaming in its tab; the new chat gets one of its own
+            self.new_tab()
+        self.sidebar.select(None)
+        self._show_attachments()
+    
+    def open_conversation(self, conversation_id, around_seq=None):
+        # An open conversation is switched to; otherwise it opens in the current tab when that
+        # is empty, and in a new tab when not
+        tab = self._tab_for(conversation_id)
+        if tab is None:
+            tab = self.current_tab() if self.current_tab().is_blank() else self.new_tab()
+        self.tabs.setCurrentWidget(tab)
+        if not tab.open_conversation(conversation_id, around_seq):
+            # Busy with a reply; jumping to a message waits until it is done
+            self.sidebar.select(tab.conversation_id)
+            return
+        self._on_tab_changed(self.tabs.currentIndex())
+    
+    def jump_to_message(self, conversation_id, seq):
+        self.open_conversation(conversation_id, around_seq=seq)
+    
+    def search_history(self, query):
+        if query:
+            self.sidebar.set_results(self.store.search(query))
     
     def send_message(self):
+        tab = self.current_tab()
         message = self.message_input.text().strip()
-        if not message:
+        if not message or tab.worker is not None:
             return
         
         selected_model = self.model_combo.currentText()
         if not selected_model:
-            self.chat_area.add_message("No model selected", is_user=False)
+            tab.chat_area.add_message("No model selected", is_user=False)
             return
         
         self.message_input.clear()
-        self.message_input.setEnabled(False)
-        self.send_button.setEnabled(False)
-        
-        self.chat_area.add_message(message, is_user=True)
+        created = tab.add_user_message(message, selected_model)
+        if created is not None:
+            self.sidebar.add_conversation(created)
         
-        self.conversation_history.append({"role": "user", "content": message})
-        
-        self.current_response = ""
-        self.current_thinking = None
-        self.full_thinking_content = ""
-        
-        self.worker = ChatWorker(self.ollama_client, selected_model, self.conversation_history)
-        self.worker.message_received.connect(self.on_message_received)
-        self.worker.thinking_received.connect(self.on_thinking_received)
-        self.worker.error_occurred.connect(self.on_error)
-        self.worker.response_started.connect(self.on_response_started)
-        self.worker.finished.connect(self.on_chat_finished)
-        self.worker.start()
+        # Same keep_alive as the warmer, so chatting doesn't shorten the model's stay
+        worker = ChatWorker(self.bridge, self.get_client(), selected_model, tab.conversation, self.limiter,
+                            keep_alive=self.warmer.keep_alive, options=self.settings.get('options'),
+                            retriever=tab.retriever(self.get_client(), self._embed_model()),
+                            context_window=self._context_window)
+        tab.start_reply(worker)
+        self.idle_jobs.track(worker)
+        worker.start()
     
-    def on_response_started(self):
-        pass
+    def on_reply_finished(self, tab, model, replied):
+        if replied:
+            self.warmer.mark_used(model)
+            if self.settings.get('background_jobs', True):
+                self.idle_jobs.enqueue_conversation(tab.conversation_id)
+        if not tab.shutting_down:
+            self._refresh_attachments(tab)
+        if tab in self.closing_tabs:
+            self._release_closed_tabs()
+        elif tab is self.current_tab():
+            self.message_input.setFocus()
     
-    def on_thinking_received(self, full_thinking):
-        self.full_thinking_content = full_thinking
+    async def _context_window(self, model):
+        # Looked up once per model and session; the options and settings still apply if
+        # /api/show can't be reached
+        window = self.context_windows.get(model)
+        if window is None:
+            default = self.settings.get('context_length', OLLAMA_DEFAULT_CONTEXT)
+            try:
+                show = await self.get_client().show(model)
+            except Exception:
+                return context_window({}, self.settings.get('options'), default)
+            window = self.context_windows[model] = context_window(show, self.settings.get('options'), default)
+        return window
     
-    def on_message_received(self, chunk):
-        self.current_response += chunk
+    def _embed_model(self):
+        from api.rag import DEFAULT_EMBED_MODEL
+        return self.settings.get('embed_model', DEFAULT_EMBED_MODEL)
     
-    def on_error(self, error_msg):
-        self.chat_area.add_message(f"Error: {error_msg}", is_user=False)
+    def attach_folder(self):
+        path = QFileDialog.getExistingDirectory(self, "Attach folder")
+        if path:
+            self.attach([path])
     
-    def on_chat_finished(self):
-        if self.current_response.strip():
-            self.chat_area.add_message(self.current_response, is_user=False)
-            self.conversation_history.append({"role": "assistant", "content": self.current_response})
-        
-        if self.full_thinking_content.strip():
-            thinking_section = self.chat_area.add_thinking_section()
-            thinking_section.set_thinking_content(self.full_thinking_content)
-        
-        self.message_input.setEnabled(True)
-        self.send_button.setEnabled(True)
-        self.message_input.setFocus()
\ No newline at end of file
+    def attach_files(self):
+        paths, _ = QFileDialog.getOpenFileNames(self, "Attach files")
+        if paths:
+            self.attach(paths)
+    
+    def attach(self, paths):
+        tab = self.current_tab()
+        for path in paths:
+            tab.indexing += 1
+            self.bridge.submit(self._index_attachment(tab, path, tab.attach_generation))
+        self._show_attachments()
+    
+    async def _index_attachment(self, tab, path, generation):
+        # Opening, scanning and embedding all happen here on the asyncio thread (and its
+        # executor); the window only hears about progress and the finished index
+        from api.rag import DocumentIndexer
+        from storage.vector_index import VectorIndex, index_dir_for
+        loop = asyncio.get_running_loop()
+        index = None
+        try:
+            index = await loop.run_in_executor(None, VectorIndex, index_dir_for(path), self._embed_model())
+            indexer = DocumentIndexer(self.get_client(), index, path, self._embed_model())
+            stats = await indexer.refresh(lambda done, total: self.attachment_progress.emit(tab, path, done, total))
+        except Exception as e:
+            if index is not None:
+                index.close()
+            self.attachment_failed.emit(tab, path, str(e), generation)
+            return
+        self.attachment_ready.emit(tab, indexer, stats, generation)
+    
+    def _refresh_attachments(self, tab):
+        # Edits made to attached files are picked up between questions, so a question never
+        # waits on re-indexing
+        stale = [indexer for indexer in tab.attachments if indexer.stale()]
+        if stale:
+            tab.refreshing += 1
+            self.bridge.submit(self._refresh_indexers(tab, stale))
+    
+    async def _refresh_indexers(self, tab, indexers):
+        try:
+            for indexer in indexers:
+                try:
+                    await indexer.refresh()
+                except Exception:
+                    # The index still answers from what it had; tried again after the next reply
+                    pass
+        finally:
+            self.attachments_refreshed.emit(tab)
+    
+    def on_attachments_refreshed(self, tab):
+        tab.refresh_finished()
+        self._release_closed_tabs()
+        self._show_attachments()
+    
+    def on_attachment_progress(self, tab, path, done, total):
+        if tab is self.current_tab():
+            self.attach_status.setText(f"[INDEXING {done}/{total}]")
+    
+    def on_attachment_ready(self, tab, indexer, stats, generation):
+        tab.indexing -= 1
+        if generation != tab.attach_generation:
+            # Finished after the chat it was attached to was left or closed
+            indexer.index.close()
+        else:
+            for existing in [a for a in tab.attachments if a.root == indexer.root]:
+                tab.attachments.remove(existing)
+                existing.index.close()
+            tab.attachments.append(indexer)
+        self._release_closed_tabs()
+        self._show_attachments()
+    
+    def on_attachment_failed(self, tab, path, error_msg, generation):
+        tab.indexing -= 1
+        if generation == tab.attach_generation:
+            tab.chat_area.add_message(f"Error indexing {path}: {error_msg}", is_user=False)
+        self._release_closed_tabs()
+        self._show_attachments()
+    
+    def detach_all(self):
+        self.current_tab().detach_all()
+        self._show_attachments()
+    
+    def _show_attachments(self):
+        tab = self.current_tab()
+        if tab.indexing > 0:
+            if not self.attach_status.text().startswith("[INDEXING"):
+                self.attach_status.setText("[INDEXING]")
+            return
+        if self.archiving:
+            return
+        self.attach_status.setText(f"[{len(tab.attachments)} ATTACHED]" if tab.attachments else "")
+        self.attach_status.setToolTip("\n".join(f"{indexer.root} ({indexer.index.chunk_count()} chunks)"
+                                                 for indexer in tab.attachments))
+    
+    def open_compare(self):
+        from ui.compare_view import CompareWindow
+        models = [self.model_combo.itemText(i) for i in range(self.model_combo.count())]
+        # One compare window; clicking again brings it back instead of leaving the old one's
+        # workers running unreferenced
+        if self.compare_window is None:
+            self.compare_window = CompareWindow(self.bridge, self.get_client(), models,
+                                                self.model_combo.currentText(), self.idle_jobs,
+                                                self._context_window, self.limiter)
+        else:
+            self.compare_window.set_models(models, self.model_combo.currentText())
+        self.compare_window.show()
+        self.compare_window.raise_()
+        self.compare_window.activateWindow()
+    
+    def export_metrics(self):
+        path, selected_filter = QFileDialog.getSaveFileName(
+            self, "Export metrics", "metrics.jsonl",
+            "JSON Lines (*.jsonl);;Prometheus text (*.prom)")
+        if not path:
+            return
+        self.store.flush()
+        records = self.store.load_metrics()
+        try:
+            if path.endswith(".prom") or selected_filter.startswith("Prometheus"):
+                write_prometheus(records, path)
+            else:
+                write_jsonl(records, path)
+        except OSError as e:
+            self.current_tab().chat_area.add_message(f"Error exporting metrics: {str(e)}", is_user=False)
+    
+    def export_chat(self):
+        tab = self.current_tab()
+        if tab.conversation_id is None:
+            tab.chat_area.add_message("Nothing to export: open or start a conversation first", is_user=False)
+            return
+        self.export_archive([tab.conversation_id])
+    
+    def export_all(self):
+        self.export_archive(None)
+    
+    def export_archive(self, conversation_ids):
+        if self.archiving:
+            return
+        path, selected_filter = QFileDialog.getSaveFileName(
+            self, "Export conversations", "conversations.jsonl",
+            "JSON Lines (*.jsonl);;Markdown (*.md)")
+        if not path:
+            return
+        if selected_filter.startswith("Markdown") and not path.lower().endswith((".md", ".markdown")):
+            path += ".md"
+        self._start_archive(path, conversation_ids, False)
+    
+    def import_chats(self):
+        if self.archiving:
+            return
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Import conversations", "", "Archives (*.jsonl *.md *.markdown);;All files (*)")
+        if path:
+            self._start_archive(path, None, True)
+    
+    def _start_archive(self, path, conversation_ids, importing):
+        self.archiving = True
+        self.archive_button.setEnabled(False)
+        self.attach_status.setText("[IMPORTING]" if importing else "[EXPORTING]")
+        self.archive_stop.clear()
+        self.archive_future = self.bridge.submit(self._run_archive(path, conversation_ids, importing))
+    
+    async def _run_archive(self, path, conversation_ids, importing):
+        # The whole archive streams through an executor thread; the window only sees progress
+        from storage.archive import export_archive, import_archive
+        loop = asyncio.get_running_loop()
+        progress = lambda messages: self.archive_progress.emit(path, messages)
+        try:
+            if importing:
+                result = await loop.run_in_executor(None, import_archive, self.store, path, progress,
+                                                    self.archive_stop)
+            else:
+                result = await loop.run_in_executor(None, export_archive, self.store, path,
+                                                    conversation_ids, progress, self.archive_stop)
+        except Exception as e:
+            self.archive_failed.emit(path, str(e))
+            return
+        self.archive_done.emit(path, result)
+    
+    def on_archive_progress(self, path, messages):
+        self.attach_status.setText(f"[{messages} MESSAGES]")
+    
+    def on_archive_done(self, path, result):
+        self._finish_archive()
+        if 'ids' not in result:
+            return
+        self.load_sessions()
+        # A single imported chat is opened; only its last page is put on screen
+        if len(result['ids']) == 1:
+            self.open_conversation(result['ids'][0])
+    
+    def on_archive_failed(self, path, error_msg):
+        self._finish_archive()
+        self.current_tab().chat_area.add_message(f"Error with archive {path}: {error_msg}", is_user=False)
+    
+    def on_store_failed(self, error_msg):
+        self.current_tab().chat_area.add_message(f"Error saving history: {error_msg}", is_user=False)
+    
+    def _finish_archive(self):
+        self.archiving = False
+        self.archive_future = None
+        self.archive_button.setEnabled(True)
+        self._show_attachments()
+    
+    def toggle_perf_overlay(self):
+        if self.perf_overlay is None:
+            from ui.perf_overlay import PerfOverlay
+            self.perf_overlay = PerfOverlay(self, self.centralWidget())
+        if self.perf_overlay.shown:
+            self.perf_overlay.hide_overlay()
+        else:
+            self.perf_overlay.show_overlay()
+    
+    def stop_generation(self):
+        tab = self.current_tab()
+        if tab.worker is not None:
+            self.stop_button.setEnabled(False)
+            tab.stop()
+    
+    def closeEvent(self, event):
+        tabs = self.all_tabs() + self.closing_tabs
+        for tab in tabs:
+            tab.shutdown()
+        if self.compare_window is not None:
+            self.compare_window.close()
+        self.warmer.stop()
+        self.idle_jobs.stop()
+        if self.perf_overlay is not None:
+            self.perf_overlay.stop()
+        if self.archive_future is not None:
+            # The export or import backs out (removing what it wrote) before the store closes
+            self.archive_stop.set()
+            try:
+                self.archive_future.result(10)
+            except Exception:
+                pass
+        self.bridge.shutdown(self._close_client())
+        for tab in tabs:
+            # A reply stopped above won't get to finish now the loop is gone
+            tab.close_attachments()
+        self.store.close()
+        super().closeEvent(event)
\ No newline at end of file
@@ -0,0 +1,262 @@
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtGui import QTextCursor, QTextCharFormat, QTextBlockFormat, QColor
+
+try:
+    from pygments.lexers import get_lexer_by_name
+    from pygments.util import ClassNotFound
+except ImportError:
+    get_lexer_by_name = None
+
+BLOCK_PROSE = 'prose'
+BLOCK_CODE = 'code'
+
+FENCE_RE = re.compile(r"^ {0,3}(`{3,}|~{3,})\s*([^\s`]*)[^`]*$")
+
+CODE_BACKGROUND = "#000d00"
+CODE_COLOR = "#00cc00"
+# Pygments token type prefixes, most specific first, mapped onto the terminal palette
+TOKEN_COLORS = (
+    ("Token.Comment", "#888800"),
+    ("Token.Keyword", "#ffff00"),
+    ("Token.Literal.String", "#00ffff"),
+    ("Token.Literal.Number", "#ff8800"),
+    ("Token.Name.Function", "#00ff00"),
+    ("Token.Name.Class", "#00ff00"),
+    ("Token.Name.Builtin", "#66ff66"),
+    ("Token.Name.Decorator", "#ff8800"),
+    ("Token.Operator", "#00aa00"),
+)
+
+HIGHLIGHT_CACHE_SIZE = 256
+# Unfinished code blocks longer than this stay plain until they close; re-lexing the
+# whole tail on every update would keep the worker (and the GIL) busy for the whole stream
+TAIL_HIGHLIGHT_LIMIT = 20000
+
+# Splits Markdown into top-level blocks: fenced code blocks and prose chunks separated by
+# blank lines. Text is fed incrementally and only complete lines are examined, so each
+# feed costs O(new text); blocks already returned by feed() never change.
+class BlockSplitter:
+    def __init__(self):
+        self._kind = BLOCK_PROSE
+        self._lang = ""
+        self._fence = ""
+        self._lines = []
+        self._partial = ""
+
+    def feed(self, text):
+        finished = []
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self._add_line(line + "\n", finished)
+        return finished
+
+    def flush(self):
+        finished = []
+        if self._partial:
+            self._add_line(self._partial, finished)
+            self._partial = ""
+        tail = self.tail()
+        if tail is not None:
+            finished.append(tail)
+        self._kind, self._lines = BLOCK_PROSE, []
+        return finished
+
+    def tail(self):
+        text = "".join(self._lines) + self._partial
+        if self._kind == BLOCK_PROSE and not text.strip():
+            return None
+        return (self._kind, self._lang if self._kind == BLOCK_CODE else "", text, False)
+
+    def _add_line(self, line, finished):
+        stripped = line.rstrip("\n")
+        if self._kind == BLOCK_CODE:
+            if stripped.strip().startswith(self._fence) and not stripped.strip().strip(self._fence[0]):
+                finished.append((BLOCK_CODE, self._lang, "".join(self._lines).rstrip("\n"), True))
+                self._kind, self._lines = BLOCK_PROSE, []
+            else:
+                self._lines.append(line)
+            return
+
+        match = FENCE_RE.match(stripped)
+        if match:
+            self._finish_prose(finished)
+            self._kind, self._fence, self._lang = BLOCK_CODE, match.group(1), match.group(2).lower()
+            return
+        if not stripped.strip():
+            self._finish_prose(finished)
+            return
+        self._lines.append(line)
+
+    def _finish_prose(self, finished):
+        text = "".join(self._lines)
+        if text.strip():
+            finished.append((BLOCK_PROSE, "", text, True))
+        self._lines = []
+
+def split_blocks(text):
+    splitter = BlockSplitter()
+    return splitter.feed(text) + splitter.flush()
+
+def _token_color(token_type, colors):
+    color = colors.get(token_type)
+    if color is None:
+        name = str(token_type)
+        color = next((value for prefix, value in TOKEN_COLORS if name.startswith(prefix)), "")
+        colors[token_type] = color
+    return color or None
+
+def highlight_runs(lang, code):
+    # Pure Python, safe to run off the UI thread: [(color or None, text), ...]
+    if get_lexer_by_name is None or not lang:
+        return [(None, code)]
+    try:
+        lexer = get_lexer_by_name(lang, stripnl=False, ensurenl=False)
+    except ClassNotFound:
+        return [(None, code)]
+    colors = {}
+    runs = []
+    for token_type, value in lexer.get_tokens(code):
+        color = _token_color(token_type, colors)
+        if runs and runs[-1][0] == color:
+            runs[-1][1].append(value)
+        else:
+            runs.append((color, [value]))
+    return [(color, "".join(parts)) for color, parts in runs]
+
+# Highlights code blocks on a worker thread. Finished blocks are cached by content; results
+# come back through the queued `highlighted` signal as (key, runs).
+class CodeHighlighter(QObject):
+    highlighted = Signal(object, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="highlight")
+        self._cache = OrderedDict()
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(lang, code):
+        return (lang, len(code), hash(code))
+
+    def runs(self, lang, code):
+        # Cached runs, or None after scheduling the work
+        if get_lexer_by_name is None or not lang:
+            return [(None, code)]
+        key = self.key(lang, code)
+        with self._lock:
+            runs = self._cache.get(key)
+            if runs is not None:
+                self._cache.move_to_end(key)
+                return runs
+            if key in self._pending:
+                return None
+            self._pending.add(key)
+        self._executor.submit(self._highlight, key, lang, code, True)
+        return None
+
+    def request(self, key, lang, code):
+        # One-off job whose result is delivered but not cached (e.g. a growing tail)
+        self._executor.submit(self._highlight, key, lang, code, False)
+
+    def _highlight(self, key, lang, code, cache):
+        runs = highlight_runs(lang, code)
+        if cache:
+            with self._lock:
+                self._pending.discard(key)
+                self._cache[key] = runs
+                while len(self._cache) > HIGHLIGHT_CACHE_SIZE:
+                    self._cache.popitem(last=False)
+        self.highlighted.emit(key, runs)
+
+_highlighter = None
+
+def highlighter():
+    global _highlighter
+    if _highlighter is None:
+        _highlighter = CodeHighlighter()
+    return _highlighter
+
+# Builds blocks into a QTextDocument through a cursor. Prose goes through Qt's own Markdown
+# parser; code blocks are inserted as coloured runs on a shaded block.
+class MarkdownRenderer:
+    def __init__(self):
+        self._formats = {}
+        self.code_block_format = QTextBlockFormat()
+        self.code_block_format.setBackground(QColor(CODE_BACKGROUND))
+        self.code_block_format.setLeftMargin(6)
+        self.code_block_format.setRightMargin(6)
+
+    def char_format(self, color):
+        text_format = self._formats.get(color)
+        if text_format is None:
+            text_format = self._formats[color] = QTextCharFormat()
+            text_format.setForeground(QColor(color or CODE_COLOR))
+        return text_format
+
+    def insert_block(self, cursor, block, first, runs=None):
+        kind, lang, text, closed = block
+        if kind == BLOCK_PROSE:
+            if not first:
+                cursor.insertBlock(QTextBlockFormat(), QTextCharFormat())
+            cursor.insertMarkdown(text.rstrip("\n"))
+            return
+
+        cursor.insertBlock(self.code_block_format, self.char_format(None))
+        if runs is None:
+            runs = [(None, text)]
+        for color, value in runs:
+            cursor.insertText(value, self.char_format(color))
+        covered = sum(len(value) for color, value in runs)
+        if covered < len(text):
+            cursor.insertText(text[covered:], self.char_format(None))
+
+    def insert_markdown(self, cursor, text, first=True):
+        # Whole-message rendering; returns the number of code blocks and the highlight keys
+        # still being worked on (those blocks went in uncoloured)
+        code_blocks = 0
+        pending = set()
+        cursor.beginEditBlock()
+        for block in split_blocks(text):
+            runs = None
+            if block[0] == BLOCK_CODE:
+                code_blocks += 1
+                runs = highlighter().runs(block[1], block[2])
+                if runs is None:
+                    pending.add(highlighter().key(block[1], block[2]))
+            self.insert_block(cursor, block, first, runs)
+            first = False
+        cursor.endEditBlock()
+        return code_blocks, pending
+
+    def render(self, document, prefix, text):
+        cursor = QTextCursor(document)
+        cursor.insertText(prefix)
+        return self.insert_markdown(cursor, text)
+
+    def apply_runs(self, document, start, old_runs, runs):
+        # Recolours text that is already in the document. Runs shared with what was applied
+        # before are skipped, so re-highlighting a grown block only touches what changed.
+        offset = start
+        same = 0
+        for old, new in zip(old_runs, runs):
+            if old != new:
+                break
+            offset += len(new[1])
+            same += 1
+        end = document.characterCount() - 1
+        cursor = QTextCursor(document)
+        cursor.beginEditBlock()
+        for color, value in runs[same:]:
+            if offset >= end:
+                break
+            cursor.setPosition(offset)
+            cursor.setPosition(min(end, offset + len(value)), QTextCursor.MoveMode.KeepAnchor)
+            cursor.setCharFormat(self.char_format(color))
+            offset += len(value)
+        cursor.endEditBlock()
@@ -0,0 +1,140 @@
+import time
+from PySide6.QtCore import QObject, QTimer, Signal
+
+STATE_COLD = 'cold'
+STATE_LOADING = 'loading'
+STATE_HOT = 'hot'
+
+POLICY_KEEP = 'keep'
+POLICY_EXCLUSIVE = 'exclusive'
+
+DEFAULT_KEEP_ALIVE = "10m"
+DEFAULT_PING_SECONDS = 240
+DEFAULT_IDLE_MINUTES = 30
+
+# Preloads the selected model before the first message needs it and keeps it resident.
+# Loads are empty-prompt /api/chat requests with our keep_alive; /api/ps tells us what
+# Ollama actually has loaded. Pings stop once the user has been idle for idle_minutes,
+# so an unattended window doesn't pin VRAM forever. With policy 'exclusive' the model we
+# warmed before is unloaded when the selection changes.
+class ModelWarmer(QObject):
+    state_changed = Signal(str, str)
+    _preloaded = Signal(str, object)
+    _preload_failed = Signal(str, str)
+    _running_loaded = Signal(list)
+
+    def __init__(self, bridge, get_client, keep_alive=DEFAULT_KEEP_ALIVE, ping_seconds=DEFAULT_PING_SECONDS,
+                 idle_minutes=DEFAULT_IDLE_MINUTES, policy=POLICY_KEEP, parent=None):
+        super().__init__(parent)
+        self.bridge = bridge
+        self.get_client = get_client
+        self.keep_alive = keep_alive
+        self.idle_seconds = idle_minutes * 60
+        self.policy = policy
+        self.active_model = None
+        self.states = {}
+        self.warmed_at = {}
+        self.last_load_ms = {}
+        self.last_activity = time.monotonic()
+
+        self._preloaded.connect(self._on_preloaded)
+        self._preload_failed.connect(self._on_preload_failed)
+        self._running_loaded.connect(self._on_running_loaded)
+
+        self.ping_interval = max(1, ping_seconds)
+        self._ping_timer = QTimer(self)
+        self._ping_timer.setInterval(int(self.ping_interval * 1000))
+        self._ping_timer.timeout.connect(self._ping)
+        self._ping_timer.start()
+
+    def state(self, model):
+        return self.states.get(model, STATE_COLD)
+
+    def set_model(self, model, warm=True):
+        previous = self.active_model
+        self.active_model = model or None
+        if warm:
+            self.note_activity()
+        if self.policy == POLICY_EXCLUSIVE and previous and previous != self.active_model:
+            self.unload(previous)
+
+    def note_activity(self):
+        # Called on selection, keystrokes and sends; cheap when the model is already hot
+        self.last_activity = time.monotonic()
+        if self.active_model:
+            self.warm(self.active_model)
+
+    def warm(self, model, force=False):
+        state = self.state(model)
+        if state == STATE_LOADING:
+            return
+        recent = time.monotonic() - self.warmed_at.get(model, float('-inf')) < self.ping_interval
+        if state == STATE_HOT and recent and not force:
+            return
+        self._set_state(model, STATE_LOADING if state == STATE_COLD else state)
+        self.warmed_at[model] = time.monotonic()
+        self.bridge.submit(self._preload(model, self.keep_alive))
+
+    def unload(self, model):
+        self.warmed_at.pop(model, None)
+        self._set_state(model, STATE_COLD)
+        self.bridge.submit(self._preload(model, 0))
+
+    def mark_used(self, model):
+        # A finished chat loaded the model as surely as a preload would have
+        self.warmed_at[model] = time.monotonic()
+        self._set_state(model, STATE_HOT)
+
+    def refresh(self):
+        self.bridge.submit(self._fetch_running())
+
+    def stop(self):
+        self._ping_timer.stop()
+
+    def _ping(self):
+        if time.monotonic() - self.last_activity > self.idle_seconds:
+            return
+        if self.active_model:
+            self.warm(self.active_model, force=True)
+        self.refresh()
+
+    def _set_state(self, model, state):
+        if self.states.get(model) != state:
+            self.states[model] = state
+            self.state_changed.emit(model, state)
+
+    async def _preload(self, model, keep_alive):
+        try:
+            data = await self.get_client().preload(model, keep_alive)
+        except Exception as e:
+            self._preload_failed.emit(model, str(e))
+            return
+        if keep_alive != 0:
+            self._preloaded.emit(model, data)
+
+    async def _fetch_running(self):
+        try:
+            models = await self.get_client().running_models()
+        except Exception:
+            return
+        self._running_loaded.emit([model.get('name', '') for model in models])
+
+    def _on_preloaded(self, model, data):
+        if data.get('load_duration'):
+            self.last_load_ms[model] = data['load_duration'] / 1e6
+        self._set_state(model, STATE_HOT)
+
+    def _on_preload_failed(self, model, error_msg):
+        self.warmed_at.pop(model, None)
+        self._set_state(model, STATE_COLD)
+
+    def _on_running_loaded(self, names):
+        resident = set(names)
+        for model in list(self.states):
+            if self.states[model] == STATE_HOT and model not in resident:
+                # Evicted behind our back (another client, memory pressure, expiry)
+                self.warmed_at.pop(model, None)
+                self._set_state(model, STATE_COLD)
+        for model in resident:
+            if self.state(model) == STATE_COLD:
+                self._set_state(model, STATE_HOT)
@@ -0,0 +1,225 @@
+import os
+import time
+from collections import deque
+from PySide6.QtCore import Qt, QObject, QEvent, QTimer, Signal
+from PySide6.QtGui import QFont
+from PySide6.QtWidgets import QApplication, QFrame, QLabel, QPushButton, QVBoxLayout, QHBoxLayout
+from api.profiling import SPANS, Profiler
+
+SAMPLE_INTERVAL_MS = 1000
+LAG_PROBE_MS = 50
+# Once-a-second samples kept for dumps: the last hour
+HISTORY_SAMPLES = 3600
+OVERLAY_SPANS = ('stream.parse', 'worker.dispatch', 'bubble.flush', 'chat_area.add_message',
+                 'chat_area.scroll_to_bottom', 'chat_area.layout', 'chat_area.paint')
+
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+# Samples the UI thread once a second while running: frames (the window's repaints, from
+# its UpdateRequest events), event-loop lag (how late a LAG_PROBE_MS timer fires), live
+# widgets and RSS. Starting it also turns on the hot-path spans in api/profiling.py.
+class PerfMonitor(QObject):
+    sampled = Signal(dict)
+
+    def __init__(self, window, parent=None):
+        super().__init__(parent)
+        self.window = window
+        self.running = False
+        self.history = deque(maxlen=HISTORY_SAMPLES)
+        self._frames = 0
+        self._lag_total = 0.0
+        self._lag_max = 0.0
+        self._probes = 0
+        self._last_probe = None
+        self._last_sample = None
+
+        self._probe_timer = QTimer(self)
+        self._probe_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._probe_timer.setInterval(LAG_PROBE_MS)
+        self._probe_timer.timeout.connect(self._probe)
+        self._sample_timer = QTimer(self)
+        self._sample_timer.setInterval(SAMPLE_INTERVAL_MS)
+        self._sample_timer.timeout.connect(self._sample)
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        SPANS.enable()
+        self.window.installEventFilter(self)
+        self._last_probe = self._last_sample = time.perf_counter()
+        self._probe_timer.start()
+        self._sample_timer.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        SPANS.disable()
+        self.window.removeEventFilter(self)
+        self._probe_timer.stop()
+        self._sample_timer.stop()
+
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Type.UpdateRequest:
+            self._frames += 1
+        return False
+
+    def _probe(self):
+        now = time.perf_counter()
+        lag = max(0.0, now - self._last_probe - LAG_PROBE_MS / 1000)
+        self._last_probe = now
+        self._lag_total += lag
+        self._lag_max = max(self._lag_max, lag)
+        self._probes += 1
+
+    def _sample(self):
+        now = time.perf_counter()
+        elapsed = max(now - self._last_sample, 1e-6)
+        rss = rss_bytes()
+        sample = {
+            "time": time.time(),
+            "fps": round(self._frames / elapsed, 1),
+            "lag_ms": round(self._lag_total / self._probes * 1000, 2) if self._probes else 0.0,
+            "lag_max_ms": round(self._lag_max * 1000, 2),
+            "widgets": len(QApplication.allWidgets()),
+            "rss_mb": round(rss / 1e6, 1) if rss is not None else None
+        }
+        self._last_sample = now
+        self._frames = 0
+        self._lag_total = 0.0
+        self._lag_max = 0.0
+        self._probes = 0
+        self.history.append(sample)
+        self.sampled.emit(sample)
+
+# Small always-on-top panel over the window's top-right corner with the monitor's numbers,
+# the slowest hot-path spans, and buttons to toggle cProfile (UI thread) and tracemalloc and
+# to dump everything collected so far to ~/.jgxaai/profiles/.
+class PerfOverlay(QFrame):
+    def __init__(self, window, parent):
+        super().__init__(parent)
+        self.monitor = PerfMonitor(window, self)
+        self.profiler = Profiler()
+        self.shown = False
+        self.monitor.sampled.connect(self._show_sample)
+        self.setup_ui()
+        parent.installEventFilter(self)
+
+    def setup_ui(self):
+        self.setObjectName("perfOverlay")
+        self.setStyleSheet("""
+            QFrame#perfOverlay {
+                background: rgba(0, 17, 0, 230);
+                border: 1px solid #00aa00;
+            }
+        """)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(8, 6, 8, 6)
+        layout.setSpacing(4)
+
+        self.stats_label = QLabel("[SAMPLING...]")
+        self.stats_label.setFont(QFont("Courier New", 9, QFont.Weight.Bold))
+        self.stats_label.setTextFormat(Qt.TextFormat.PlainText)
+        layout.addWidget(self.stats_label)
+
+        self.spans_label = QLabel("")
+        self.spans_label.setFont(QFont("Courier New", 8))
+        self.spans_label.setTextFormat(Qt.TextFormat.PlainText)
+        layout.addWidget(self.spans_label)
+
+        buttons = QHBoxLayout()
+        self.cpu_button = QPushButton("[CPU OFF]")
+        self.cpu_button.setToolTip("cProfile the UI thread")
+        self.cpu_button.clicked.connect(self.toggle_cpu)
+        self.memory_button = QPushButton("[MEM OFF]")
+        self.memory_button.setToolTip("Trace allocations with tracemalloc (slows everything down)")
+        self.memory_button.clicked.connect(self.toggle_memory)
+        self.dump_button = QPushButton("[DUMP]")
+        self.dump_button.setToolTip("Write the profile, allocations and the last hour of samples to disk")
+        self.dump_button.clicked.connect(self.dump)
+        for button in (self.cpu_button, self.memory_button, self.dump_button):
+            button.setFont(QFont("Courier New", 8, QFont.Weight.Bold))
+            buttons.addWidget(button)
+        layout.addLayout(buttons)
+
+        self.dump_label = QLabel("")
+        self.dump_label.setFont(QFont("Courier New", 8))
+        self.dump_label.setWordWrap(True)
+        self.dump_label.hide()
+        layout.addWidget(self.dump_label)
+
+    def show_overlay(self):
+        self.shown = True
+        self.monitor.start()
+        self.show()
+        self.raise_()
+        self._place()
+
+    def hide_overlay(self):
+        # Profiling that is still on keeps running (and keeps the spans on) until dumped or toggled
+        self.shown = False
+        self.hide()
+        if not self.profiler.cpu_running and not self.profiler.memory_running:
+            self.monitor.stop()
+
+    def toggle_cpu(self):
+        if self.profiler.cpu_running:
+            self.profiler.stop_cpu()
+        else:
+            self.profiler.start_cpu()
+        self.cpu_button.setText("[CPU ON]" if self.profiler.cpu_running else "[CPU OFF]")
+
+    def toggle_memory(self):
+        if self.profiler.memory_running:
+            self.profiler.stop_memory()
+        else:
+            self.profiler.start_memory()
+        self.memory_button.setText("[MEM ON]" if self.profiler.memory_running else "[MEM OFF]")
+
+    def dump(self):
+        try:
+            directory, written = self.profiler.dump(list(self.monitor.history))
+        except OSError as e:
+            self.dump_label.setText(f"DUMP FAILED: {str(e)}")
+        else:
+            self.dump_label.setText(f"DUMPED {len(written)} FILES TO {directory}")
+        self.dump_label.show()
+        self._place()
+
+    def stop(self):
+        self.monitor.stop()
+        self.profiler.stop_cpu()
+        if self.profiler.memory_running:
+            self.profiler.stop_memory()
+
+    def _show_sample(self, sample):
+        rss = f"{sample['rss_mb']:.0f} MB" if sample['rss_mb'] is not None else "n/a"
+        self.stats_label.setText(
+            f"FPS {sample['fps']:.0f} | LAG {sample['lag_ms']:.1f} ms (max {sample['lag_max_ms']:.0f}) | "
+            f"WIDGETS {sample['widgets']} | RSS {rss}")
+        spans = SPANS.snapshot()
+        lines = []
+        for name in OVERLAY_SPANS:
+            stats = spans.get(name)
+            if stats is not None:
+                lines.append(f"{name:<27} p50 {stats['p50_ms']:7.2f}  p95 {stats['p95_ms']:7.2f}  "
+                             f"max {stats['max_ms']:7.1f} ms  x{stats['count']}")
+        self.spans_label.setText("\n".join(lines) if lines else "no spans recorded yet")
+        if self.shown:
+            self._place()
+
+    def _place(self):
+        self.adjustSize()
+        parent = self.parentWidget()
+        self.move(max(0, parent.width() - self.width() - 10), 60)
+
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Type.Resize and self.shown:
+            self._place()
+        return False
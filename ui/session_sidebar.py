@@ -0,0 +1,155 @@
+from PySide6.QtWidgets import QFrame, QVBoxLayout, QLabel, QListWidget, QListWidgetItem, QLineEdit
+from PySide6.QtCore import Qt, Signal, QTimer
+from PySide6.QtGui import QFont
+
+SEARCH_DELAY_MS = 150
+
+class SessionSidebar(QFrame):
+    conversation_selected = Signal(str)
+    search_requested = Signal(str)
+    result_selected = Signal(str, int)
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setup_ui()
+        
+    def setup_ui(self):
+        self.setFixedWidth(220)
+        
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(5, 5, 5, 5)
+        layout.setSpacing(5)
+        
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("> SEARCH...")
+        self.search_input.setFont(QFont("Courier New", 10))
+        self.search_input.textChanged.connect(self._on_search_changed)
+        
+        # Debounce so a query only runs once typing pauses
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(SEARCH_DELAY_MS)
+        self._search_timer.timeout.connect(
+            lambda: self.search_requested.emit(self.search_input.text().strip()))
+        
+        self.title_label = QLabel("SESSIONS:")
+        self.title_label.setFont(QFont("Courier New", 10, QFont.Weight.Bold))
+        
+        self.session_list = QListWidget()
+        self.session_list.setFont(QFont("Courier New", 10))
+        self.session_list.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.session_list.itemClicked.connect(self._on_item_clicked)
+        
+        self.result_list = QListWidget()
+        self.result_list.setFont(QFont("Courier New", 9))
+        self.result_list.setWordWrap(True)
+        self.result_list.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.result_list.itemClicked.connect(self._on_result_clicked)
+        self.result_list.setVisible(False)
+        
+        self.setStyleSheet("""
+            QListWidget {
+                background: #001100;
+                border: 1px solid #00aa00;
+                color: #00cc00;
+            }
+            QListWidget::item {
+                padding: 4px;
+                border-bottom: 1px solid #002200;
+            }
+            QListWidget::item:selected {
+                background: #003300;
+                color: #00ff00;
+            }
+            QListWidget::item:hover {
+                background: #002200;
+            }
+            QScrollBar:vertical {
+                background: #001100;
+                width: 12px;
+            }
+            QScrollBar::handle:vertical {
+                background: #00aa00;
+                min-height: 30px;
+            }
+            QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical {
+                height: 0px;
+            }
+        """)
+        
+        layout.addWidget(self.search_input)
+        layout.addWidget(self.title_label)
+        layout.addWidget(self.session_list)
+        layout.addWidget(self.result_list)
+        
+    def set_conversations(self, conversations, current_id=None):
+        self.session_list.clear()
+        for conversation in conversations:
+            self.session_list.addItem(self._make_item(conversation))
+        self.select(current_id)
+        
+    def add_conversation(self, conversation):
+        self.session_list.insertItem(0, self._make_item(conversation))
+        self.select(conversation['id'])
+        
+    def _make_item(self, conversation):
+        item = QListWidgetItem()
+        item.setData(Qt.ItemDataRole.UserRole, conversation['id'])
+        self._describe(item, dict(conversation))
+        return item
+        
+    def _describe(self, item, conversation):
+        title = conversation['title'] or "(untitled)"
+        item.setData(Qt.ItemDataRole.UserRole + 1, conversation)
+        item.setText(f"> {title}")
+        tooltip = f"{title}\n{conversation['model']}"
+        if conversation.get('summary'):
+            tooltip += f"\n\n{conversation['summary'][:600]}"
+        item.setToolTip(tooltip)
+        
+    def update_conversation(self, conversation_id, **changes):
+        # title= or summary= from the background jobs
+        for i in range(self.session_list.count()):
+            item = self.session_list.item(i)
+            if item.data(Qt.ItemDataRole.UserRole) == conversation_id:
+                conversation = dict(item.data(Qt.ItemDataRole.UserRole + 1))
+                conversation.update(changes)
+                self._describe(item, conversation)
+                return
+            
+    def select(self, conversation_id):
+        for i in range(self.session_list.count()):
+            item = self.session_list.item(i)
+            if item.data(Qt.ItemDataRole.UserRole) == conversation_id:
+                self.session_list.setCurrentItem(item)
+                return
+        self.session_list.clearSelection()
+        
+    def set_results(self, results):
+        self.result_list.clear()
+        for result in results:
+            title = result['title'] or "(untitled)"
+            item = QListWidgetItem(f"{title}\n{result['snippet']}")
+            item.setData(Qt.ItemDataRole.UserRole, (result['conversation_id'], result['seq']))
+            self.result_list.addItem(item)
+        if not results:
+            self.result_list.addItem(QListWidgetItem("NO MATCHES"))
+        
+    def _on_search_changed(self, text):
+        searching = bool(text.strip())
+        self.title_label.setText("RESULTS:" if searching else "SESSIONS:")
+        self.session_list.setVisible(not searching)
+        self.result_list.setVisible(searching)
+        if searching:
+            self._search_timer.start()
+        else:
+            self._search_timer.stop()
+            self.result_list.clear()
+        
+    def _on_item_clicked(self, item):
+        self.conversation_selected.emit(item.data(Qt.ItemDataRole.UserRole))
+        
+    def _on_result_clicked(self, item):
+        target = item.data(Qt.ItemDataRole.UserRole)
+        if target:
+            self.result_selected.emit(target[0], target[1])
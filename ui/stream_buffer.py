@@ -0,0 +1,73 @@
+import asyncio
+import threading
+from collections import deque
+
+# Characters the producer may get ahead of the UI before it has to wait for a drain
+DEFAULT_MAX_CHARS = 1 << 20
+
+def _release(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+# Hand-off between a stream running on the asyncio thread and the UI thread. The producer
+# put()s (kind, text) deltas; consecutive deltas of the same kind are coalesced into one
+# entry, so the queue only grows when the stream switches between thinking and answer.
+# put() reports whether the consumer needs waking: that happens once per drain, however many
+# deltas arrive in between, so a fast stream can't flood the Qt event queue. Once max_chars
+# are waiting the producer awaits wait_for_space() until the UI has drained, which in turn
+# stops reading from the socket and pushes back on Ollama.
+class DeltaBuffer:
+    def __init__(self, max_chars=DEFAULT_MAX_CHARS):
+        self.max_chars = max_chars
+        self.puts = 0
+        self.wakeups = 0
+        self.drains = 0
+        self.waits = 0
+        self._items = deque()
+        self._chars = 0
+        self._signalled = False
+        self._waiter = None
+        self._waiter_loop = None
+        self._lock = threading.Lock()
+
+    def put(self, kind, text):
+        with self._lock:
+            self.puts += 1
+            if self._items and self._items[-1][0] == kind:
+                self._items[-1][1].append(text)
+            else:
+                self._items.append((kind, [text]))
+            self._chars += len(text)
+            wake = not self._signalled
+            if wake:
+                self._signalled = True
+                self.wakeups += 1
+        return wake
+
+    def full(self):
+        return self._chars >= self.max_chars
+
+    async def wait_for_space(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._chars < self.max_chars:
+                return
+            self.waits += 1
+            self._waiter = loop.create_future()
+            self._waiter_loop = loop
+            waiter = self._waiter
+        await waiter
+
+    def drain(self):
+        # [(kind, text), ...] in arrival order; called from the consumer's thread
+        with self._lock:
+            items = [(kind, "".join(parts)) for kind, parts in self._items]
+            self._items.clear()
+            self._chars = 0
+            self._signalled = False
+            waiter, self._waiter = self._waiter, None
+            if items:
+                self.drains += 1
+        if waiter is not None:
+            self._waiter_loop.call_soon_threadsafe(_release, waiter)
+        return items
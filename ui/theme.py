@@ -0,0 +1,95 @@
+# Shared green-on-black look for every top-level window
+TERMINAL_STYLESHEET = """
+    QMainWindow {
+        background: #000000;
+        color: #00ff00;
+    }
+    QFrame {
+        background: #000000;
+        border: none;
+        color: #00ff00;
+    }
+    QLabel {
+        color: #00ff00;
+        font-weight: bold;
+    }
+    QLineEdit {
+        background: #001100;
+        border: 1px solid #00ff00;
+        border-radius: 0px;
+        padding: 8px;
+        color: #00ff00;
+        font-size: 12px;
+        selection-background-color: #003300;
+    }
+    QLineEdit:focus {
+        border: 2px solid #00ff00;
+        background: #002200;
+    }
+    QPushButton {
+        background: #003300;
+        color: #00ff00;
+        border: 1px solid #00ff00;
+        border-radius: 0px;
+        font-weight: bold;
+        padding: 8px;
+    }
+    QPushButton:hover {
+        background: #004400;
+        color: #ffffff;
+        border: 1px solid #ffffff;
+    }
+    QPushButton:pressed {
+        background: #002200;
+        color: #00aa00;
+    }
+    QPushButton:disabled {
+        background: #001100;
+        color: #006600;
+        border: 1px solid #006600;
+    }
+    QComboBox {
+        background: #001100;
+        border: 1px solid #00ff00;
+        border-radius: 0px;
+        padding: 5px 8px;
+        color: #00ff00;
+    }
+    QComboBox:hover {
+        background: #002200;
+    }
+    QComboBox::drop-down {
+        border: none;
+        width: 20px;
+    }
+    QComboBox::down-arrow {
+        image: none;
+        border-left: 4px solid transparent;
+        border-right: 4px solid transparent;
+        border-top: 4px solid #00ff00;
+        margin-right: 5px;
+    }
+    QComboBox QAbstractItemView {
+        background: #001100;
+        border: 1px solid #00ff00;
+        selection-background-color: #003300;
+        color: #00ff00;
+    }
+    QTabWidget::pane {
+        border: none;
+    }
+    QTabBar::tab {
+        background: #001100;
+        color: #00aa00;
+        border: 1px solid #006600;
+        padding: 4px 10px;
+    }
+    QTabBar::tab:selected {
+        background: #003300;
+        color: #00ff00;
+        border: 1px solid #00ff00;
+    }
+    QTabBar::tab:hover {
+        color: #ffffff;
+    }
+"""